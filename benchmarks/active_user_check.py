@@ -0,0 +1,77 @@
+"""Cost of checking that a token's user is still active.
+
+Calls ``get_current_user`` with a valid token against a temporary SQLite
+database, once looking the user up on every call (``active_user_cache_ttl``
+of 0) and once with the default TTL, where only the first call in each
+window reaches the database. Against MySQL the lookup also pays a network
+round trip, so the gap is wider than shown here.
+
+    python -m benchmarks.active_user_check --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import database_models  # noqa: F401
+from common.auth import Role, create_access_token, get_current_user
+from config import get_settings
+from database import Base
+from user.infra.db_models.user import User
+from user.infra.repository.async_user_repo import AsyncUserRepository
+from utils.cache import LocalCache
+
+USER_ID = "BENCH_USER_ID"
+
+
+def seed(session_factory):
+    now = datetime.now()
+    with session_factory() as session:
+        session.add(User(id=USER_ID, name="bench", email="bench@example.com", password="", created_at=now, updated_at=now))
+        session.commit()
+
+
+async def run(label: str, ttl: float, requests: int, user_repo: AsyncUserRepository, token: str):
+    with mock.patch("common.auth.active_users", LocalCache(ttl=ttl)):
+        await get_current_user(token, user_repo)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await get_current_user(token, user_repo)
+        elapsed = time.perf_counter() - started
+    print(f"{label:>12}: {requests / elapsed:9.0f} checks/s  {elapsed / requests * 1e6:7.1f} us/check")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    settings = get_settings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        seed(sessionmaker(bind=engine))
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        user_repo = AsyncUserRepository(session_factory=async_sessionmaker(bind=async_engine))
+        token = create_access_token({"user_id": USER_ID}, role=Role.USER)
+
+        async def scenarios():
+            await run("every call", 0, args.requests, user_repo, token)
+            ttl = settings.active_user_cache_ttl
+            await run(f"ttl {ttl:g}s", ttl, args.requests, user_repo, token)
+            await async_engine.dispose()
+
+        asyncio.run(scenarios())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Compare the threadpool and native async database stacks.
+
+Both stacks serve ``GET /notes`` and ``GET /notes/{id}`` from the same SQLite
+file; only ``Container.database_io`` changes between runs.
+
+    python -m benchmarks.db_io --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+from dependency_injector import providers
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from ulid import ULID  # type: ignore
+
+import database_models  # noqa: F401
+from common.auth import Role, create_access_token
+from database import Base, session_scope, sync_session_scope, unit_of_work
+from main import app
+from note.infra.db_models.note import Note
+from note.infra.repository.async_note_repo import AsyncNoteRepository
+from note.infra.repository.note_repo import NoteRepository
+from user.infra.db_models.user import User
+from user.infra.repository.async_user_repo import AsyncUserRepository
+from user.infra.repository.user_repo import UserRepository
+
+USER_ID = "BENCH_USER_ID"
+
+
+def seed(session_factory, notes: int) -> list[str]:
+    ulid = ULID()
+    now = datetime.now()
+    ids = [ulid.generate() for _ in range(notes)]
+    with session_factory() as session:
+        # The token's user: every request looks it up.
+        session.add(User(id=USER_ID, name="bench", email="bench@example.com", password="", created_at=now, updated_at=now))
+        session.add_all(
+            Note(
+                id=id,
+                user_id=USER_ID,
+                title=f"title {i}",
+                content="content " * 32,
+                memo_date="20250101",
+                created_at=now,
+                updated_at=now,
+            )
+            for i, id in enumerate(ids)
+        )
+        session.commit()
+    return ids
+
+
+async def load(client: httpx.AsyncClient, paths: list[str], concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    queue = iter(paths)
+
+    async def worker():
+        for path in queue:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def run(mode: str, paths: list[str], concurrency: int, token: str):
+    app.container.database_io.override(providers.Object(mode))  # type: ignore
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        await load(client, paths[:concurrency], concurrency)
+        started = time.perf_counter()
+        latencies = await load(client, paths, concurrency)
+        elapsed = time.perf_counter() - started
+
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    print(f"{mode:>10}: {len(latencies) / elapsed:8.1f} req/s  p99 {p99 * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--notes", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Base.metadata.create_all(engine)
+
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        async_session_factory = async_sessionmaker(autoflush=False, bind=async_engine)
+        ids = seed(session_factory, args.notes)
+
+        async def bench_unit_of_work():
+            if container.database_io() == "native":
+                scope = session_scope(async_session_factory)
+            else:
+                scope = sync_session_scope(session_factory)
+            async with scope as session:
+                yield session
+
+        container = app.container  # type: ignore
+        app.dependency_overrides[unit_of_work] = bench_unit_of_work
+        container.sync_note_repo.override(providers.Factory(NoteRepository, session_factory=session_factory))
+        container.async_note_repo.override(providers.Factory(AsyncNoteRepository, session_factory=async_session_factory))
+        container.sync_user_repo.override(providers.Factory(UserRepository, session_factory=session_factory.begin))
+        container.async_user_repo.override(providers.Factory(AsyncUserRepository, session_factory=async_session_factory))
+
+        token = create_access_token({"user_id": USER_ID}, role=Role.USER)
+        paths = [
+            f"/notes/{ids[i % len(ids)]}" if i % 2 else f"/notes?page={i % 10 + 1}"
+            for i in range(args.requests)
+        ]
+        for mode in ("threadpool", "native"):
+            asyncio.run(run(mode, paths, args.concurrency, token))
+
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
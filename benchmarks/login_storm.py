@@ -0,0 +1,144 @@
+"""Latency of an unrelated endpoint while logins flood the server.
+
+A storm of concurrent ``POST /users/login`` requests runs while a probe
+measures ``GET /notes``, once with bcrypt on the event loop's default
+threadpool and once on the bounded process pool with admission control.
+
+    python -m benchmarks.login_storm --storm 64 --probes 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import httpx
+from dependency_injector import providers
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import database_models  # noqa: F401
+from common.auth import Role, create_access_token
+from config import get_settings
+from database import Base, session_scope, unit_of_work
+from main import app
+from note.infra.repository.async_note_repo import AsyncNoteRepository
+from user.infra.db_models.user import User
+from user.infra.repository.async_user_repo import AsyncUserRepository
+from utils.crypto import Crypto, _hash
+
+USER_COUNT = 32
+PASSWORD = "storm-password"
+
+
+def seed(session_factory, rounds: int):
+    password = _hash(PASSWORD, rounds)
+    now = datetime.now()
+    with session_factory() as session:
+        session.add_all(
+            User(
+                id=f"STORM_USER_{i}",
+                name=f"storm {i}",
+                email=f"storm{i}@example.com",
+                password=password,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(USER_COUNT)
+        )
+        session.commit()
+
+
+async def storm(client: httpx.AsyncClient, stop: asyncio.Event, statuses: Counter, worker: int):
+    while not stop.is_set():
+        response = await client.post(
+            "/users/login",
+            data={"username": f"storm{worker % USER_COUNT}@example.com", "password": PASSWORD},
+        )
+        statuses[response.status_code] += 1
+        if response.status_code == 503:
+            await asyncio.sleep(float(response.headers["Retry-After"]))
+
+
+async def probe(client: httpx.AsyncClient, requests: int, token: str) -> list[float]:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get("/notes", headers={"Authorization": f"Bearer {token}"})
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def run(label: str, storm_size: int, probes: int, token: str):
+    statuses: Counter = Counter()
+    stop = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await probe(client, 5, token)
+        workers = [asyncio.create_task(storm(client, stop, statuses, i)) for i in range(storm_size)]
+        started = time.perf_counter()
+        latencies = await probe(client, probes, token)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*workers)
+
+    p50 = statistics.median(latencies)
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    print(
+        f"{label:>10}: GET /notes p50 {p50 * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms  "
+        f"logins {statuses[200] / elapsed:6.1f}/s ok, {statuses[503]} refused"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--storm", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+    settings = get_settings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        seed(sessionmaker(bind=engine), settings.bcrypt_rounds)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async_session_factory = async_sessionmaker(autoflush=False, bind=async_engine)
+
+        async def bench_unit_of_work():
+            async with session_scope(async_session_factory) as session:
+                yield session
+
+        app.dependency_overrides[unit_of_work] = bench_unit_of_work
+        container = app.container  # type: ignore
+        container.async_user_repo.override(
+            providers.Factory(AsyncUserRepository, session_factory=async_session_factory, session=container.db_session)
+        )
+        container.async_note_repo.override(
+            providers.Factory(AsyncNoteRepository, session_factory=async_session_factory, session=container.db_session)
+        )
+        token = create_access_token({"user_id": "STORM_USER_0"}, role=Role.USER)
+
+        async def scenarios():
+            await run("idle", 0, args.probes, token)
+            # What the service did before: every hash on a thread, nothing refused.
+            with container.crypto.override(
+                providers.Singleton(Crypto, rounds=settings.bcrypt_rounds, max_pending=args.storm)
+            ):
+                await run("threadpool", args.storm, args.probes, token)
+            await run("process", args.storm, args.probes, token)
+            container.shutdown_resources()
+            await async_engine.dispose()
+
+        asyncio.run(scenarios())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
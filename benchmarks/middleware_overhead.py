@@ -0,0 +1,114 @@
+"""Per-request cost of the auth/context middleware on a no-op route.
+
+Compares no middleware, the previous ``@app.middleware("http")`` version
+(built on BaseHTTPMiddleware) and the raw ASGI ``AuthContextMiddleware``.
+Requests carry a valid bearer token and are sent straight through ASGI,
+and the access log is silenced so only the middleware itself is measured.
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+
+from common.auth import Role, create_access_token, parse_current_user
+from common.logger import logger
+from context_vars import user_context
+from middlewares import AuthContextMiddleware
+
+
+def base_http_middleware(app: FastAPI):
+    @app.middleware("http")
+    async def get_current_user_middleware(request: Request, call_next):
+        current_user = None
+        authorization = request.headers.get("Authorization")
+        if authorization:
+            splits = authorization.split(" ")
+            if splits[0] == "Bearer" and len(splits) == 2:
+                try:
+                    current_user = parse_current_user(splits[1])
+                except HTTPException:
+                    pass
+        context_token = user_context.set(current_user)
+        try:
+            logger.info(request.url)
+            return await call_next(request)
+        finally:
+            user_context.reset(context_token)
+
+
+def create_app(middleware: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop")
+    async def noop():
+        return None
+
+    if middleware == "base_http":
+        base_http_middleware(app)
+    elif middleware == "asgi":
+        app.add_middleware(AuthContextMiddleware)
+    return app
+
+
+async def request(app, headers: list[tuple[bytes, bytes]]):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/noop",
+            "raw_path": b"/noop",
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        },
+        receive,
+        send,
+    )
+
+
+async def run(middleware: str, requests: int, concurrency: int, headers: list[tuple[bytes, bytes]]):
+    app = create_app(middleware)
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            await request(app, headers)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    started = time.perf_counter()
+    remaining = iter(range(requests))
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{middleware:>10}: {requests / elapsed:9.1f} req/s  {elapsed / requests * 1e6:7.1f} us/req")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    token = create_access_token({"user_id": "BENCH_USER_ID"}, role=Role.USER)
+    headers = [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())]
+    for middleware in ("none", "base_http", "asgi"):
+        asyncio.run(run(middleware, args.requests, args.concurrency, headers))
+
+
+if __name__ == "__main__":
+    main()
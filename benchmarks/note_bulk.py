@@ -0,0 +1,184 @@
+"""Throughput and peak memory of ``POST /notes:batchImport`` and ``GET /notes:export``.
+
+Each phase runs in a fresh process against the same SQLite file, so the
+reported peak RSS belongs to that phase alone. The app is driven through
+ASGI directly: test clients buffer whole bodies, which would hide whether
+the endpoints stream.
+
+    python -m benchmarks.note_bulk --notes 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+USER_ID = "BENCH_USER_ID"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+async def request(app, method: str, path: str, token: str, body=None, on_chunk=None) -> int:
+    """Sends one request to ``app``, streaming ``body`` chunks in and response chunks to ``on_chunk``."""
+    done = asyncio.Event()
+    status = 0
+
+    chunks = iter(body if body is not None else ())
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                return {"type": "http.request", "body": chunk, "more_body": True}
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect; only report one once the response is done.
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if on_chunk is not None:
+                on_chunk(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        },
+        receive,
+        send,
+    )
+    return status
+
+
+def import_body(notes: int, chunk_size: int = 500):
+    for start in range(0, notes, chunk_size):
+        yield b"".join(
+            json.dumps(
+                {
+                    "title": f"title {i}",
+                    "content": "content " * 32,
+                    "memo_date": "20250101",
+                    "tags": [f"tag-{i % 100}", f"tag-{i % 7}"],
+                }
+            ).encode()
+            + b"\n"
+            for i in range(start, min(start + chunk_size, notes))
+        )
+
+
+def run_phase(phase: str, path: str, notes: int):
+    from datetime import datetime
+
+    from dependency_injector import providers
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import database_models  # noqa: F401
+    from common.auth import Role, create_access_token
+    from database import Base, session_scope, unit_of_work
+    from main import app
+    from note.infra.repository.async_note_repo import AsyncNoteRepository
+    from user.infra.db_models.user import User
+    from user.infra.repository.async_user_repo import AsyncUserRepository
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    if phase == "import":
+        # The token's user: every request looks it up.
+        with sessionmaker(bind=engine).begin() as session:
+            now = datetime.now()
+            session.add(User(id=USER_ID, name="bench", email="bench@example.com", password="", created_at=now, updated_at=now))
+    engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async_session_factory = async_sessionmaker(autoflush=False, bind=async_engine)
+
+    async def bench_unit_of_work():
+        async with session_scope(async_session_factory) as session:
+            yield session
+
+    app.dependency_overrides[unit_of_work] = bench_unit_of_work
+    container = app.container  # type: ignore
+    container.async_note_repo.override(
+        providers.Factory(AsyncNoteRepository, session_factory=async_session_factory, session=container.db_session)
+    )
+    container.async_user_repo.override(
+        providers.Factory(AsyncUserRepository, session_factory=async_session_factory, session=container.db_session)
+    )
+    token = create_access_token({"user_id": USER_ID}, role=Role.USER)
+    baseline = peak_rss_mb()
+
+    async def run():
+        if phase == "import":
+            status = await request(app, "POST", "/notes:batchImport", token, body=import_body(notes))
+            count = notes
+        else:
+            count = 0
+
+            def count_lines(chunk: bytes):
+                nonlocal count
+                count += chunk.count(b"\n")
+
+            status = await request(app, "GET", "/notes:export", token, on_chunk=count_lines)
+        assert status in (200, 201), status
+        return count
+
+    started = time.perf_counter()
+    count = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    asyncio.run(async_engine.dispose())
+    print(
+        f"{phase:>7}: {count} notes in {elapsed:6.2f} s  {count / elapsed:9.1f} notes/s  "
+        f"peak RSS {peak_rss_mb():7.1f} MiB (+{peak_rss_mb() - baseline:.1f} over startup)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--phase", choices=("import", "export"))
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    if args.phase:
+        run_phase(args.phase, args.db, args.notes)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        for phase in ("import", "export"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.note_bulk", "--phase", phase, "--db", path, "--notes", str(args.notes)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
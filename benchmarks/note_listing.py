@@ -0,0 +1,97 @@
+"""Rows/sec for note listing: joinedload + row_to_dict versus projection + batched tags.
+
+    python -m benchmarks.note_listing
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database_models  # noqa: F401
+from database import Base
+from note.domain.note import Note as NoteVO
+from note.infra.db_models.note import Note, Tag, note_tag_association
+from note.infra.repository.note_repo import NoteRepository
+from utils.db_utils import row_to_dict
+
+USER_ID = "BENCH_USER_ID"
+
+
+def seed(session_factory, notes: int, max_tags: int):
+    now = datetime.now()
+    with session_factory() as session:
+        if max_tags:
+            session.execute(
+                insert(Tag),
+                [{"id": f"TAG{i:04}", "name": f"tag-{i}", "created_at": now, "updated_at": now} for i in range(max_tags)],
+            )
+        session.execute(
+            insert(Note),
+            [
+                {
+                    "id": f"NOTE{i:08}",
+                    "user_id": USER_ID,
+                    "title": f"title {i}",
+                    "content": "content " * 32,
+                    "memo_date": "20250101",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(notes)
+            ],
+        )
+        links = [
+            {"note_id": f"NOTE{i:08}", "tag_id": f"TAG{t:04}"}
+            for i in range(notes)
+            for t in range(i % (max_tags + 1))
+        ]
+        if links:
+            session.execute(insert(note_tag_association), links)
+
+
+def joinedload_page(session_factory, items_per_page: int) -> list[NoteVO]:
+    with session_factory() as session:
+        query = session.query(Note).options(joinedload(Note.tags)).filter(Note.user_id == USER_ID)
+        query.count()
+        notes = query.order_by(Note.id).limit(items_per_page).all()
+        return [NoteVO(**row_to_dict(note)) for note in notes]
+
+
+def projection_page(session_factory, items_per_page: int) -> list[NoteVO]:
+    return NoteRepository(session_factory).get_notes(USER_ID, 1, items_per_page)[1]
+
+
+def measure(fn, session_factory, items_per_page: int, seconds: float) -> float:
+    rows = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        rows += len(fn(session_factory, items_per_page))
+    return rows / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for max_tags in (0, 8, 32):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        seed(session_factory.begin, 1000, max_tags)
+
+        for items_per_page in (10, 100, 1000):
+            before = measure(joinedload_page, session_factory, items_per_page, args.seconds)
+            after = measure(projection_page, session_factory, items_per_page, args.seconds)
+            print(
+                f"tags 0-{max_tags:<2} page {items_per_page:>4}: "
+                f"joinedload {before:10.0f} rows/s  projection {after:10.0f} rows/s  x{after / before:.1f}"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
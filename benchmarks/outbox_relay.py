@@ -0,0 +1,78 @@
+"""Outbox messages relayed per second to an in-memory Celery broker.
+
+Fills the Outbox table of a temporary SQLite database and times
+``OutboxRelay.relay_all`` per batch size. A batch of 1 is close to
+publishing each message on its own: one SELECT, one publish and one
+DELETE + COMMIT per message. Welcome emails are merged into one task
+call per batch, as ``python -m common.outbox_relay`` does. The memory
+broker costs next to nothing, so against RabbitMQ or Redis the saving
+from publishing a batch over one producer is larger than shown here.
+
+    python -m benchmarks.outbox_relay --messages 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from celery import Celery
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from common.outbox import OutboxMessage, add_to_outbox
+from common.outbox_relay import OutboxBatching, OutboxRelay
+from database import Base
+from ulid import ULID  # type: ignore
+
+
+def fill_outbox(session_factory, count: int):
+    now = datetime.now()
+    with session_factory.begin() as session:
+        add_to_outbox(
+            session,
+            [
+                OutboxMessage(
+                    id=ULID().generate(),
+                    task="send_welcome_email_task",
+                    kwargs={"receiver_email": f"user{i}@example.com"},
+                    created_at=now,
+                )
+                for i in range(count)
+            ],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'outbox.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        app = Celery("outbox-relay-benchmark", broker="memory://localhost/")
+
+        for batch_size in (1, 100, 500):
+            fill_outbox(session_factory, args.messages)
+            relay = OutboxRelay(
+                session_factory,
+                app,
+                batch_size=batch_size,
+                batching={"send_welcome_email_task": OutboxBatching("send_welcome_emails_task", "receiver_email", "receiver_emails")},
+            )
+            started = time.perf_counter()
+            relayed = relay.relay_all()
+            elapsed = time.perf_counter() - started
+            assert relayed == args.messages
+            print(f"batch {batch_size:>4}: {relayed / elapsed:9.0f} messages/s")
+
+        with app.connection_for_read() as connection:
+            connection.default_channel.queue_purge("celery")
+        app.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Time to serialize a page of notes, per page size.
+
+Compares the previous path (``asdict`` per note, then FastAPI validating the
+dict against ``GetNotesResponse`` and encoding it with ``json``) with
+``note_json`` rendered by ``FastJSONResponse``. Only serialization is
+measured; the notes are built in memory.
+
+    python -m benchmarks.response_serialization
+"""
+import argparse
+import json
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+from pydantic import TypeAdapter
+
+from note.domain.note import Note, Tag
+from note.interface.controllers.note_controller import GetNotesResponse, notes_json
+from utils.json_response import FastJSONResponse, orjson
+
+RESPONSE = TypeAdapter(GetNotesResponse)
+
+
+def make_notes(count: int, tags: int) -> list[Note]:
+    now = datetime.now()
+    return [
+        Note(
+            id=f"NOTE{i:08}",
+            user_id="BENCH_USER_ID",
+            title=f"title {i}",
+            content="content " * 64,
+            memo_date="20250101",
+            tags=[Tag(id=f"TAG{t:04}", name=f"tag-{t}", created_at=now, updated_at=now) for t in range(tags)],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def validated(notes: list[Note]) -> bytes:
+    res_notes = []
+    for note in notes:
+        note_dict = asdict(note)
+        note_dict.update({"tags": [tag.name for tag in note.tags]})
+        res_notes.append(note_dict)
+    content = {"total_count": len(notes), "page": 1, "notes": res_notes, "next_cursor": None}
+    # What FastAPI's serialize_response and JSONResponse do with a returned dict.
+    encoded = RESPONSE.dump_python(RESPONSE.validate_python(content), mode="json")
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(notes: list[Note]) -> bytes:
+    content = {"total_count": len(notes), "page": 1, "notes": notes_json(notes, None), "next_cursor": None}
+    return FastJSONResponse(content).body
+
+
+def measure(fn, notes: list[Note], seconds: float) -> float:
+    """Mean microseconds per page."""
+    pages = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn(notes)
+        pages += 1
+    return (time.perf_counter() - started) / pages * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson is not None else 'json'}")
+    for tags in (0, 4):
+        for items_per_page in (10, 100, 1000):
+            notes = make_notes(items_per_page, tags)
+            assert json.loads(validated(notes)) == json.loads(fast_path(notes))
+            before = measure(validated, notes, args.seconds)
+            after = measure(fast_path, notes, args.seconds)
+            print(
+                f"tags {tags} page {items_per_page:>4}: "
+                f"asdict+validate {before:9.1f} us  fast path {after:9.1f} us  x{before / after:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Welcome emails per second against a local aiosmtpd server.
+
+Compares the previous delivery (a new connection and a freshly built
+MIMEMultipart per message) with ``EmailService.send_welcome_emails`` over
+an ``SMTPPool``, which sends the whole batch over one session, and with
+``AsyncEmailService`` queueing each address on the event loop. The local
+server has no TLS or auth, so the real per-connection saving against a
+provider (TCP + STARTTLS + AUTH round trips) is larger than shown here.
+
+    python -m benchmarks.smtp_delivery --messages 2000
+"""
+import argparse
+import asyncio
+import smtplib
+import socket
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+
+from user.application.email_service import WELCOME_BODY, WELCOME_SUBJECT, AsyncEmailService, EmailService
+from utils.async_smtp_pool import AsyncSMTPPool
+from utils.smtp_pool import SMTPPool
+
+SENDER = "sender@example.com"
+
+
+class Sink:
+    def __init__(self):
+        self.count = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.count += 1
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def connection_per_message(port: int, receivers: list[str]):
+    for receiver_email in receivers:
+        message = MIMEMultipart()
+        message["From"] = SENDER
+        message["To"] = receiver_email
+        message["Subject"] = WELCOME_SUBJECT
+        message.attach(MIMEText(WELCOME_BODY, "plain"))
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.send_message(message)
+
+
+def pooled_batches(port: int, receivers: list[str], batch_size: int):
+    email_service = EmailService(SMTPPool("127.0.0.1", port, starttls=False), sender=SENDER)
+    for start in range(0, len(receivers), batch_size):
+        assert email_service.send_welcome_emails(receivers[start:start + batch_size]) == []
+    email_service.smtp_pool.close()
+
+
+def queued_on_event_loop(port: int, receivers: list[str]):
+    async def scenario():
+        pool = AsyncSMTPPool("127.0.0.1", port, starttls=False, size=2)
+        email_service = AsyncEmailService(pool, sender=SENDER, concurrency=2)
+        for receiver_email in receivers:
+            email_service.enqueue_welcome_email(receiver_email)
+        await email_service.close(timeout=60)
+
+    asyncio.run(scenario())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    sink = Sink()
+    port = free_port()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        receivers = [f"user{i}@example.com" for i in range(args.messages)]
+        for label, run in (
+            ("connection per message", lambda: connection_per_message(port, receivers)),
+            (f"pooled, batches of {args.batch_size}", lambda: pooled_batches(port, receivers, args.batch_size)),
+            ("async, 2 sessions", lambda: queued_on_event_loop(port, receivers)),
+        ):
+            sink.count = 0
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            assert sink.count == args.messages
+            print(f"{label:>24}: {args.messages / elapsed:8.0f} messages/s")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Admin user listing: page latency per sort order, before and after the listing indexes.
+
+"Before" drops ix_User_created_at_id and ix_User_name and loads whole User
+rows; "after" keeps the indexes and loads only the ``UserResponse``
+columns. Both run ``UserRepository.get_users`` against SQLite.
+
+    python -m benchmarks.user_listing --users 100000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database_models  # noqa: F401
+from database import Base
+from user.infra.db_models.user import User
+from user.infra.repository import user_repo
+from user.infra.repository.user_repo import UserRepository
+
+
+def seed(session_factory, users: int):
+    started = datetime(2025, 1, 1)
+    with session_factory() as session:
+        session.execute(
+            insert(User),
+            [
+                {
+                    "id": f"USER{i:08}",
+                    "name": f"name-{(i * 7919) % users:08}",
+                    "email": f"user{i}@example{i % 10}.com",
+                    "password": "$2b$12$" + "x" * 53,
+                    "created_at": started + timedelta(seconds=(i * 104729) % users),
+                    "updated_at": started,
+                    "memo": "memo " * 200,
+                    "is_active": True,
+                }
+                for i in range(users)
+            ],
+        )
+
+
+def measure(repository: UserRepository, sort: str, pages: int) -> float:
+    """Mean milliseconds per keyset page of 100, walked from the first page."""
+    started = time.perf_counter()
+    after = None
+    key = sort.lstrip("-")
+    for _ in range(pages):
+        _, users = repository.get_users(1, 100, after, sort=sort)  # type: ignore
+        last = users[-1]
+        after = (last.id,) if key == "id" else (getattr(last, key), last.id)
+    return (time.perf_counter() - started) / pages * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    seed(session_factory.begin, args.users)
+    repository = UserRepository(session_factory.begin)
+    list_columns = user_repo.LIST_COLUMNS
+
+    results = {}
+    for label in ("after", "before"):
+        if label == "before":
+            with engine.begin() as conn:
+                conn.execute(text('DROP INDEX "ix_User_created_at_id"'))
+                conn.execute(text('DROP INDEX "ix_User_name"'))
+            user_repo.LIST_COLUMNS = tuple(User.__table__.columns)  # type: ignore
+        for sort in ("created_at", "-created_at", "name"):
+            results[label, sort] = measure(repository, sort, args.pages)
+    user_repo.LIST_COLUMNS = list_columns
+
+    for sort in ("created_at", "-created_at", "name"):
+        before, after = results["before", sort], results["after", sort]
+        print(f"sort {sort:>11}: before {before:8.2f} ms/page  after {after:8.2f} ms/page  x{before / after:.1f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
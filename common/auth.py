@@ -2,17 +2,27 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import StrEnum
 from typing import Annotated
+from dependency_injector.wiring import Provide, inject
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 
+from common.token_cache import VerifiedTokenCache
 from config import get_settings
+from context_vars import user_context
+from user.domain.repository.user_repo import IAsyncUserRepository
+from utils.cache import LocalCache
 
 settings = get_settings()
 
 SECRET_KEY = settings.jwt_secret
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
+token_cache = VerifiedTokenCache(maxsize=settings.jwt_cache_size)
+# Ids of users found active in the last active_user_cache_ttl seconds.
+active_users: LocalCache[bool] = LocalCache(
+    maxsize=settings.active_user_cache_size, ttl=settings.active_user_cache_ttl
+)
 
 
 class Role(StrEnum):
@@ -29,20 +39,54 @@ class CurrentUser:
         return f"{self.id} ({self.role})"
 
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+def parse_current_user(token: str) -> CurrentUser:
+    """The user a token was issued to; the role is left unchecked."""
     payload = decode_access_token(token)
-    user_id = payload.get("user_id")
-    role = payload.get("role")
+    return CurrentUser(id=payload.get("user_id"), role=payload.get("role"))  # type: ignore
+
+
+def _request_user(token: str) -> CurrentUser:
+    # The middleware has usually parsed this request's token already.
+    current_user = user_context.get()
+    if current_user is None:
+        current_user = parse_current_user(token)
+    return current_user
+
+
+@inject
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    user_repo: IAsyncUserRepository = Depends(Provide["cached_user_repo"]),
+):
+    current_user = _request_user(token)
+    user_id = current_user.id
+    role = current_user.role
     if not user_id or not role or role != Role.USER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
         )
+    # Tokens outlive deactivation and deletion, so the user is looked up
+    # unless this process found it active within active_user_cache_ttl.
+    if active_users.get(user_id) is None:
+        try:
+            user = await user_repo.find_by_id(user_id)
+        except HTTPException as e:
+            if e.status_code != 422:
+                raise
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is deactivated")
+        active_users.set(user_id, True)
     return CurrentUser(id=user_id, role=Role(role))
 
 
+def forget_active_users(*user_ids: str):
+    """Makes this process look the users up again on their next request."""
+    active_users.delete(*user_ids)
+
+
 def get_admin_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    payload = decode_access_token(token)
-    role = payload.get("role")
+    role = _request_user(token).role
     if not role or role != Role.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
@@ -60,10 +104,14 @@ def create_access_token(
 
 
 def decode_access_token(token: str):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+    token_cache.put(token, payload)
+    return payload
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from common.auth import (
+    CurrentUser,
+    Role,
+    create_access_token,
+    forget_active_users,
+    get_admin_user,
+    get_current_user,
+)
+from common.metrics import cache_requests
+from context_vars import user_context
+from user.domain.repository.user_repo import IAsyncUserRepository
+from user.domain.user import User
+from utils.cache import LocalCache
+
+
+@pytest.fixture(autouse=True)
+def active_users(mocker):
+    return mocker.patch("common.auth.active_users", LocalCache())
+
+
+@pytest.fixture
+def user_repo(mocker):
+    user_repo = mocker.Mock(spec=IAsyncUserRepository)
+    now = datetime(2021, 1, 1)
+    user_repo.find_by_id.return_value = User(
+        id="USER_ID", name="Test User", email="test@example.com", password="HASH", memo=None,
+        created_at=now, updated_at=now,
+    )
+    return user_repo
+
+
+def test_dependencies_reuse_the_user_parsed_by_the_middleware(mocker, user_repo):
+    decode = mocker.patch("common.auth.decode_access_token")
+    context_token = user_context.set(CurrentUser(id="USER_ID", role=Role.USER))
+    try:
+        assert asyncio.run(get_current_user("token", user_repo)) == CurrentUser(id="USER_ID", role=Role.USER)
+        with pytest.raises(HTTPException) as exc_info:
+            get_admin_user("token")
+        assert exc_info.value.status_code == 403
+    finally:
+        user_context.reset(context_token)
+
+    decode.assert_not_called()
+
+
+def test_decode_access_token_caches_verified_tokens(user_repo):
+    token = create_access_token({"user_id": "USER_ID"}, role=Role.USER)
+    hits = cache_requests.labels("token", "local", "hit").get()
+
+    assert asyncio.run(get_current_user(token, user_repo)) == CurrentUser(id="USER_ID", role=Role.USER)
+    assert asyncio.run(get_current_user(token, user_repo)) == CurrentUser(id="USER_ID", role=Role.USER)
+    assert cache_requests.labels("token", "local", "hit").get() == hits + 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(get_current_user(token + "x", user_repo))
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.parametrize("is_active, status_code", [(False, 403), (None, 401)])
+def test_rejects_tokens_of_deactivated_and_deleted_users(user_repo, is_active, status_code):
+    if is_active is None:
+        user_repo.find_by_id.side_effect = HTTPException(status_code=422, detail="User not found")
+    else:
+        user_repo.find_by_id.return_value.is_active = is_active
+    token = create_access_token({"user_id": "USER_ID"}, role=Role.USER)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(get_current_user(token, user_repo))
+    assert exc_info.value.status_code == status_code
+
+
+def test_active_users_are_looked_up_once_per_ttl(user_repo):
+    token = create_access_token({"user_id": "USER_ID"}, role=Role.USER)
+
+    asyncio.run(get_current_user(token, user_repo))
+    asyncio.run(get_current_user(token, user_repo))
+    assert user_repo.find_by_id.call_count == 1
+
+    user_repo.find_by_id.return_value.is_active = False
+    forget_active_users("USER_ID")
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(get_current_user(token, user_repo))
+    assert exc_info.value.status_code == 403
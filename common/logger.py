@@ -1,24 +1,136 @@
+import atexit
+import json
 import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
+
+from config import get_settings
 from context_vars import user_context
 
 log_format = "%(asctime)s %(name)s %(levelname)s:\tuser: %(user)s: %(message)s"
 
+
 class CustomFormatter(logging.Formatter):
     def format(self, record):
         if not hasattr(record, "user"):
             record.user = "Anonymous"
         return super().format(record)
-    
-handler = logging.StreamHandler()
-handler.setFormatter(CustomFormatter(log_format))
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.addHandler(handler)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line.
+
+    Runs on the listener thread, so the message, timestamp and user are only
+    rendered there, never by the code that logs.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "user": getattr(record, "user", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str, ensure_ascii=False)
+
 
 class ContextFilter(logging.Filter):
     def filter(self, record: logging.LogRecord):
-        record.user = str(user_context.get())
+        # Runs on the thread that logged, where the request's ContextVar is
+        # set; attached to the QueueHandler, not the listener, for that reason.
+        # The formatter stringifies the user later, on the listener thread.
+        record.user = user_context.get()
         return True
 
-logger.addFilter(ContextFilter())
\ No newline at end of file
+
+class SamplingFilter(logging.Filter):
+    """Lets through a ``rate`` fraction of records."""
+
+    def __init__(self, rate: float, random: Callable[[], float] = random.random):
+        super().__init__()
+        self.rate = rate
+        self.random = random
+
+    def filter(self, record: logging.LogRecord):
+        return self.rate >= 1 or self.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket allowing ``per_second`` records on average, in bursts of up to ``burst``."""
+
+    def __init__(self, per_second: float, burst: float | None = None, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or max(per_second, 1)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord):
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+            self.updated = now
+            if self.tokens < 1:
+                self.dropped += 1
+                return False
+            self.tokens -= 1
+            return True
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """Hands records to a QueueListener without formatting them or blocking.
+
+    The queue is in-process, so records are passed as they are and formatted
+    by the listener's handlers. When the queue is full records are dropped
+    and counted rather than making the caller wait on a slow stream.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+settings = get_settings()
+
+handler = logging.StreamHandler()
+if settings.log_format == "json":
+    handler.setFormatter(JsonFormatter())
+else:
+    handler.setFormatter(CustomFormatter(log_format))
+
+queue_handler = BackgroundQueueHandler(queue.Queue(settings.log_queue_size))
+queue_handler.addFilter(ContextFilter())
+listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(settings.log_level)
+logger.addHandler(queue_handler)
+
+# One record per request, so it can be sampled and rate limited on its own.
+access_logger = logger.getChild("access")
+if settings.access_log_sample_rate < 1:
+    access_logger.addFilter(SamplingFilter(settings.access_log_sample_rate))
+if settings.access_log_rate_limit is not None:
+    access_logger.addFilter(RateLimitFilter(settings.access_log_rate_limit))
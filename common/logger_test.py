@@ -0,0 +1,68 @@
+import json
+import logging
+import queue
+
+from common.auth import CurrentUser, Role
+from common.logger import BackgroundQueueHandler, ContextFilter, JsonFormatter, RateLimitFilter, SamplingFilter
+from context_vars import user_context
+
+
+def make_record(msg="%s %s", args=("GET", "http://test/notes")) -> logging.LogRecord:
+    return logging.LogRecord("common.logger.access", logging.INFO, __file__, 1, msg, args, None)
+
+
+class Lazy:
+    rendered = 0
+
+    def __str__(self):
+        Lazy.rendered += 1
+        return "http://test/notes"
+
+
+def test_queue_handler_captures_user_without_formatting():
+    handler = BackgroundQueueHandler(queue.Queue())
+    handler.addFilter(ContextFilter())
+    user = CurrentUser(id="USER_ID", role=Role.USER)
+    context_token = user_context.set(user)
+    try:
+        handler.handle(make_record(args=("GET", Lazy())))
+    finally:
+        user_context.reset(context_token)
+
+    record = handler.queue.get_nowait()
+    assert record.user is user
+    assert Lazy.rendered == 0
+
+    line = json.loads(JsonFormatter().format(record))
+    assert Lazy.rendered == 1
+    assert line["message"] == "GET http://test/notes"
+    assert line["user"] == str(user)
+    assert line["level"] == "INFO"
+    assert line["logger"] == "common.logger.access"
+
+
+def test_queue_handler_drops_records_when_full():
+    handler = BackgroundQueueHandler(queue.Queue(1))
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_sampling_filter():
+    draws = iter([0.05, 0.5, 0.09])
+    sampling = SamplingFilter(0.1, random=lambda: next(draws))
+
+    assert [sampling.filter(make_record()) for _ in range(3)] == [True, False, True]
+
+
+def test_rate_limit_filter_refills_over_time():
+    now = [0.0]
+    rate_limit = RateLimitFilter(2, clock=lambda: now[0])
+
+    assert [rate_limit.filter(make_record()) for _ in range(3)] == [True, True, False]
+    now[0] = 0.5
+    assert [rate_limit.filter(make_record()) for _ in range(2)] == [True, False]
+    assert rate_limit.dropped == 2
@@ -1,7 +1,13 @@
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
+from common.outbox_relay import OutboxBatching
 from config import get_settings
-from user.application.send_welcome_email_task import SendWelcomeEmailTask
+from note.application.sweep_orphan_tags_task import SweepOrphanTagsTask
+from note.infra.repository.note_repo import NoteRepository
+from user.application.email_service import EmailService
+from user.application.send_welcome_email_task import SendWelcomeEmailTask, SendWelcomeEmailsTask
+from utils.smtp_pool import SMTPPool
 
 
 settings = get_settings()
@@ -12,4 +18,41 @@ celery = Celery(
     backend=settings.celery_backend_url,
     brocker_connection_retry_on_startup=True,
 )
-celery.register_task(SendWelcomeEmailTask())
\ No newline at end of file
+# Each worker process opens its own connections, on first use.
+smtp_pool = SMTPPool(
+    host=settings.smtp_host,
+    port=settings.smtp_port,
+    username=settings.email_sender,
+    password=settings.email_password,
+    starttls=settings.smtp_starttls,
+    size=settings.smtp_pool_size,
+    timeout=settings.smtp_timeout,
+    check_after=settings.smtp_check_after,
+    max_idle=settings.smtp_max_idle,
+)
+email_service = EmailService(smtp_pool, sender=settings.email_sender)
+
+celery.register_task(SendWelcomeEmailTask(email_service))
+celery.register_task(SendWelcomeEmailsTask(email_service))
+celery.register_task(SweepOrphanTagsTask(note_repo=NoteRepository(collect_orphan_tags=False)))
+
+if settings.orphan_tag_collection == "deferred":
+    celery.conf.beat_schedule = {
+        "sweep-orphan-tags": {
+            "task": SweepOrphanTagsTask.name,
+            "schedule": settings.orphan_tag_sweep_interval,
+            "kwargs": {"batch_size": settings.orphan_tag_sweep_batch_size},
+        },
+    }
+
+# Signups write one welcome email each; the relay sends a batch's worth per task.
+outbox_batching = {
+    SendWelcomeEmailTask.name: OutboxBatching(
+        batch_task=SendWelcomeEmailsTask.name, argument="receiver_email", batch_argument="receiver_emails"
+    ),
+}
+
+
+@worker_process_shutdown.connect
+def close_smtp_pool(**kwargs):
+    smtp_pool.close()
\ No newline at end of file
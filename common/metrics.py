@@ -0,0 +1,338 @@
+import functools
+import inspect
+import itertools
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from anyio import CapacityLimiter, to_thread
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Owner:
+    """Kept in a thread's locals beside its cells; collected when the thread exits."""
+
+
+class _Cells:
+    """Per-thread arrays of floats, summed when read.
+
+    Each thread only ever writes its own array, so updates need no lock; one
+    is only taken the first time a thread touches the metric and when the
+    thread exits, which folds its array into ``_retired``. Threadpool
+    threads come and go, so the arrays would pile up otherwise.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._shards: dict[int, list[float]] = {}
+        self._retired = [0.0] * size
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+    def local(self) -> list[float]:
+        try:
+            return self._local.cells
+        except AttributeError:
+            cells = self._local.cells = [0.0] * self.size
+            owner = self._local.owner = _Owner()
+            key = next(self._keys)
+            with self._lock:
+                self._shards[key] = cells
+            weakref.finalize(owner, self._retire, key)
+            return cells
+
+    def _retire(self, key: int):
+        with self._lock:
+            cells = self._shards.pop(key)
+            self._retired = [retired + value for retired, value in zip(self._retired, cells)]
+
+    def sum(self) -> list[float]:
+        with self._lock:
+            shards = [self._retired, *self._shards.values()]
+        return [sum(column) for column in zip(*shards)]
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), registry: "Registry | None" = None):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._function: Callable[[], float] | None = None
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def set_function(self, function: Callable[[], float]):
+        """Reads the value from ``function`` at collection time instead."""
+        self._function = function
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        if self._function is not None:
+            yield f"{self.name} {_format_value(self._function())}"
+            return
+        for values, child in list(self._children.items()):
+            yield from child.samples(self.name, _format_labels(self.labelnames, values))  # type: ignore
+
+
+class _Value:
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1):
+        self._cells.local()[0] += amount
+
+    def dec(self, amount: float = 1):
+        self._cells.local()[0] -= amount
+
+    def get(self) -> float:
+        return self._cells.sum()[0]
+
+    def samples(self, name: str, labels: str) -> Iterator[str]:
+        yield f"{name}{labels} {_format_value(self.get())}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; use ``set_function`` for values owned elsewhere."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    @contextmanager
+    def track_inprogress(self, *labels: str):
+        child = self.labels(*labels)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # One count per bucket, one for +Inf, then the sum.
+        self._cells = _Cells(len(buckets) + 2)
+
+    def observe(self, value: float):
+        cells = self._cells.local()
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self, name: str, labels: str) -> Iterator[str]:
+        cells = self._cells.sum()
+        prefix = labels[:-1] + "," if labels else "{"
+        count = 0.0
+        for bound, bucket in zip(self.buckets + (math.inf,), cells):
+            count += bucket
+            yield f'{name}_bucket{prefix}le="{_format_value(bound)}"}} {_format_value(count)}'
+        yield f"{name}_sum{labels} {_format_value(cells[-1])}"
+        yield f"{name}_count{labels} {_format_value(count)}"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        registry: "Registry | None" = None,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+
+class Registry:
+    """In-memory collection of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def expose(self) -> str:
+        return "".join(line + "\n" for metric in list(self._metrics.values()) for line in metric.collect())
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def timed_methods(histogram: Histogram, label: str):
+    """Class decorator observing every public method's duration as ``histogram{label, method}``.
+
+    Generator methods are left alone: their time is spent by the consumer.
+    """
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(method) or inspect.isgeneratorfunction(method):
+                continue
+            setattr(cls, name, _timed(method, histogram.labels(label, name)))
+        return cls
+
+    return decorate
+
+
+def _timed(method, child: _HistogramValue):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+registry = Registry()
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to respond to a request, by route template.",
+    ("method", "route", "status"),
+    registry,
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests being handled.", registry=registry)
+threadpool_threads_busy = Gauge("threadpool_threads_busy", "Threadpool threads running a call.", registry=registry)
+threadpool_tasks_waiting = Gauge(
+    "threadpool_tasks_waiting", "Calls waiting for a free threadpool thread.", registry=registry
+)
+threadpool_size = Gauge("threadpool_size", "Threadpool capacity.", registry=registry)
+
+
+def _thread_limiter_stat(read: Callable[[CapacityLimiter], float]) -> Callable[[], float]:
+    # The default limiter belongs to the running event loop; NaN when exposed outside one.
+    def stat():
+        try:
+            return read(to_thread.current_default_thread_limiter())
+        except RuntimeError:
+            return math.nan
+
+    return stat
+
+
+threadpool_threads_busy.set_function(_thread_limiter_stat(lambda limiter: limiter.borrowed_tokens))
+threadpool_tasks_waiting.set_function(_thread_limiter_stat(lambda limiter: limiter.statistics().tasks_waiting))
+threadpool_size.set_function(_thread_limiter_stat(lambda limiter: limiter.total_tokens))
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "Time to execute a SQL statement.", ("operation",), registry
+)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds", "Time waiting for a pooled database connection.", ("pool",), registry
+)
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Connections handed out by the pool.", ("pool",), registry)
+db_pool_checkins = Counter("db_pool_checkins_total", "Connections returned to the pool.", ("pool",), registry)
+db_pool_timeouts = Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after database_pool_timeout.", ("pool",), registry
+)
+repository_call_duration = Histogram(
+    "repository_call_duration_seconds", "Time spent in a repository method.", ("repository", "method"), registry
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Time to hash or verify a password, including time queued for a worker.",
+    ("operation",),
+    registry,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+password_hash_pending = Gauge("password_hash_pending", "Password hashes queued or running.", registry=registry)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total", "Password hashes refused because too many were pending.", registry=registry
+)
+outbox_relay_batch_duration = Histogram(
+    "outbox_relay_batch_duration_seconds",
+    "Time to publish a batch of outbox messages to the Celery broker and delete them.",
+    registry=registry,
+)
+outbox_relayed_messages = Counter(
+    "outbox_relayed_messages_total", "Outbox messages published to the Celery broker.", ("task",), registry
+)
+cache_requests = Counter(
+    "cache_requests_total", "Cache lookups, by cache, tier and result.", ("cache", "tier", "result"), registry
+)
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from common.metrics import Counter, Gauge, Histogram, Registry, timed_methods
+
+
+def test_expose_in_prometheus_text_format():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests.", ("method",), registry)
+    in_flight = Gauge("in_flight", "In flight.", registry=registry)
+    latency = Histogram("latency_seconds", "Latency.", ("route",), registry, buckets=(0.1, 1))
+    Gauge("pool_size", "Pool size.", registry=registry).set_function(lambda: 5)
+
+    requests.labels("GET").inc()
+    requests.labels("GET").inc(2)
+    in_flight.inc()
+    latency.labels("/notes").observe(0.1)
+    latency.labels("/notes").observe(0.5)
+    latency.labels("/notes").observe(3)
+
+    assert registry.expose() == (
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{method="GET"} 3\n'
+        "# HELP in_flight In flight.\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 1\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/notes",le="0.1"} 1\n'
+        'latency_seconds_bucket{route="/notes",le="1"} 2\n'
+        'latency_seconds_bucket{route="/notes",le="+Inf"} 3\n'
+        'latency_seconds_sum{route="/notes"} 3.6\n'
+        'latency_seconds_count{route="/notes"} 3\n'
+        "# HELP pool_size Pool size.\n"
+        "# TYPE pool_size gauge\n"
+        "pool_size 5\n"
+    )
+
+
+def test_counts_from_many_threads_are_summed():
+    counter = Counter("hits_total", "Hits.", registry=Registry())
+
+    def hit():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=hit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.labels().get() == 40000
+
+
+def test_exited_threads_are_folded_into_one_shard():
+    latency = Histogram("latency_seconds", "Latency.", registry=Registry(), buckets=(1,))
+
+    for _ in range(2000):
+        thread = threading.Thread(target=latency.observe, args=(0.5,))
+        thread.start()
+        thread.join()
+
+    child = latency.labels()
+    assert len(child._cells._shards) <= 1
+    assert child._cells.sum() == [2000, 0, 1000]
+
+
+def test_labels_must_match_label_names():
+    counter = Counter("hits_total", "Hits.", ("route",), Registry())
+
+    with pytest.raises(ValueError):
+        counter.labels()
+
+
+def test_timed_methods():
+    registry = Registry()
+    calls = Histogram("calls_seconds", "Calls.", ("repository", "method"), registry)
+
+    @timed_methods(calls, "Repo")
+    class Repo:
+        def find(self, id):
+            return id
+
+        def _helper(self):
+            pass
+
+        def rows(self):
+            yield 1
+
+    assert Repo().find("ID") == "ID"
+    assert list(Repo().rows()) == [1]
+
+    assert 'calls_seconds_count{repository="Repo",method="find"} 1' in registry.expose()
+    assert "_helper" not in registry.expose()
+    assert "rows" not in registry.expose()
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, String, insert
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from database import Base
+
+
+@dataclass
+class OutboxMessage:
+    """A Celery task call recorded in the transaction whose commit should trigger it.
+
+    The id is a ULID, so relaying in id order keeps the order of writes; it
+    is also used as the Celery task id.
+    """
+
+    id: str
+    task: str
+    kwargs: dict
+    created_at: datetime
+
+
+class Outbox(Base):
+    __tablename__ = "Outbox"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    task: Mapped[str] = mapped_column(String(128), nullable=False)
+    kwargs: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+def add_to_outbox(session: Session, messages: list[OutboxMessage]):
+    """Inserts ``messages`` in ``session``'s transaction, so they are relayed only if it commits."""
+    if messages:
+        session.execute(
+            insert(Outbox),
+            [
+                {"id": message.id, "task": message.task, "kwargs": message.kwargs, "created_at": message.created_at}
+                for message in messages
+            ],
+        )
@@ -0,0 +1,115 @@
+"""Publishes committed outbox messages to the Celery broker.
+
+    python -m common.outbox_relay
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from celery import Celery
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from common.logger import logger
+from common.metrics import outbox_relay_batch_duration, outbox_relayed_messages
+from common.outbox import Outbox
+
+
+@dataclass(frozen=True)
+class OutboxBatching:
+    """Publishes a batch's calls of one task as a single call of ``batch_task``.
+
+    Each row's ``argument`` goes into the list ``batch_task`` takes as
+    ``batch_argument``.
+    """
+
+    batch_task: str
+    argument: str
+    batch_argument: str
+
+
+class OutboxRelay:
+    """Moves outbox rows to the broker, oldest first, ``batch_size`` at a time.
+
+    A batch is locked with SKIP LOCKED, so several relays can run side by
+    side, published over one broker connection and deleted in the same
+    transaction. A crash between publishing and committing publishes the
+    batch again: delivery is at least once, and each message keeps its
+    outbox id as the Celery task id. Tasks in ``batching`` are merged into
+    one call per batch, whose task id is its first message's.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        celery_app: Celery,
+        batch_size: int = 500,
+        batching: dict[str, OutboxBatching] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.celery_app = celery_app
+        self.batch_size = batch_size
+        self.batching = batching or {}
+
+    def _calls(self, rows: list[Outbox]) -> list[tuple[str, dict, str]]:
+        """The (task, kwargs, task id) calls publishing ``rows``, in the order of their first row."""
+        calls: list[tuple[str, dict, str]] = []
+        merged: dict[str, list] = {}
+        for row in rows:
+            batching = self.batching.get(row.task)
+            if batching is None:
+                calls.append((row.task, row.kwargs, row.id))
+                continue
+            if row.task not in merged:
+                merged[row.task] = []
+                calls.append((batching.batch_task, {batching.batch_argument: merged[row.task]}, row.id))
+            merged[row.task].append(row.kwargs[batching.argument])
+        return calls
+
+    def relay_batch(self) -> int:
+        """Publishes and deletes one batch; returns how many messages it held."""
+        with self.session_factory() as session, session.begin():
+            rows = session.scalars(
+                select(Outbox).order_by(Outbox.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return 0
+            with outbox_relay_batch_duration.time():
+                with self.celery_app.producer_or_acquire() as producer:
+                    for task, kwargs, task_id in self._calls(rows):
+                        self.celery_app.send_task(task, kwargs=kwargs, task_id=task_id, producer=producer)
+                session.execute(delete(Outbox).where(Outbox.id.in_([row.id for row in rows])))
+        for row in rows:
+            outbox_relayed_messages.labels(row.task).inc()
+        return len(rows)
+
+    def relay_all(self) -> int:
+        """Relays until the outbox is empty; returns how many messages were published."""
+        relayed = 0
+        while True:
+            count = self.relay_batch()
+            relayed += count
+            if count < self.batch_size:
+                return relayed
+
+    def run(self, poll_interval: float = 0.5):
+        while True:
+            try:
+                self.relay_all()
+            except Exception:
+                logger.exception("Outbox relay failed; retrying in %s seconds", poll_interval)
+            time.sleep(poll_interval)
+
+
+def main():
+    from common.messaging import celery, outbox_batching
+    from config import get_settings
+    from database import SessionLocal
+
+    settings = get_settings()
+    relay = OutboxRelay(SessionLocal, celery, batch_size=settings.outbox_relay_batch_size, batching=outbox_batching)
+    relay.run(poll_interval=settings.outbox_relay_poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from celery import Celery
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from common.outbox import Outbox, OutboxMessage, add_to_outbox
+from common.outbox_relay import OutboxBatching, OutboxRelay
+from database import Base
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def celery_app():
+    app = Celery("outbox-relay-test", broker="memory://localhost/")
+    yield app
+    app.close()
+
+
+def fill_outbox(session_factory, count: int):
+    with session_factory.begin() as session:
+        add_to_outbox(
+            session,
+            [
+                OutboxMessage(
+                    id=f"MESSAGE{i:04}",
+                    task="send_welcome_email_task",
+                    kwargs={"receiver_email": f"user{i}@example.com"},
+                    created_at=datetime(2021, 1, 1),
+                )
+                for i in range(count)
+            ],
+        )
+
+
+def test_relays_every_message_in_order_and_empties_the_outbox(session_factory, celery_app, mocker):
+    fill_outbox(session_factory, 5)
+    send_task = mocker.spy(celery_app, "send_task")
+    relay = OutboxRelay(session_factory, celery_app, batch_size=2)
+
+    assert relay.relay_all() == 5
+
+    assert [call.kwargs["task_id"] for call in send_task.call_args_list] == [f"MESSAGE{i:04}" for i in range(5)]
+    assert send_task.call_args_list[0].args == ("send_welcome_email_task",)
+    assert send_task.call_args_list[0].kwargs["kwargs"] == {"receiver_email": "user0@example.com"}
+    with session_factory() as session:
+        assert session.scalar(select(func.count()).select_from(Outbox)) == 0
+    with celery_app.connection_for_read() as connection:
+        assert connection.default_channel.queue_declare("celery", passive=True).message_count == 5
+
+
+def test_keeps_the_batch_when_publishing_fails(session_factory, celery_app, mocker):
+    fill_outbox(session_factory, 3)
+    mocker.patch.object(celery_app, "send_task", side_effect=[None, ConnectionError("broker down")])
+    relay = OutboxRelay(session_factory, celery_app, batch_size=10)
+
+    with pytest.raises(ConnectionError):
+        relay.relay_batch()
+
+    with session_factory() as session:
+        assert session.scalar(select(func.count()).select_from(Outbox)) == 3
+
+
+def test_merges_batched_tasks_into_one_call_per_batch(session_factory, celery_app, mocker):
+    fill_outbox(session_factory, 5)
+    with session_factory.begin() as session:
+        add_to_outbox(
+            session,
+            [OutboxMessage(id="MESSAGE0002A", task="other_task", kwargs={"n": 1}, created_at=datetime(2021, 1, 1))],
+        )
+    send_task = mocker.spy(celery_app, "send_task")
+    batching = OutboxBatching("send_welcome_emails_task", "receiver_email", "receiver_emails")
+    relay = OutboxRelay(session_factory, celery_app, batch_size=4, batching={"send_welcome_email_task": batching})
+
+    assert relay.relay_all() == 6
+
+    assert [(call.args[0], call.kwargs["kwargs"], call.kwargs["task_id"]) for call in send_task.call_args_list] == [
+        ("send_welcome_emails_task", {"receiver_emails": [f"user{i}@example.com" for i in range(3)]}, "MESSAGE0000"),
+        ("other_task", {"n": 1}, "MESSAGE0002A"),
+        ("send_welcome_emails_task", {"receiver_emails": ["user3@example.com", "user4@example.com"]}, "MESSAGE0003"),
+    ]
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import CodeType, FrameType
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from context_vars import profile_context
+
+PROFILE_FORMATS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+PROFILE_NAME = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}-[A-Z]+-[A-Za-z0-9_.-]*$")
+
+Frame = tuple[str, str, int]
+
+
+@dataclass
+class Sample:
+    time: float
+    stack: tuple[Frame, ...]
+
+
+@dataclass
+class RequestProfile:
+    """Stack samples of one request's task, with the SQL statements it issued."""
+
+    method: str
+    path: str
+    started: float = field(default_factory=time.perf_counter)
+    created_at: datetime = field(default_factory=datetime.now)
+    finished: float | None = None
+    samples: list[Sample] = field(default_factory=list)
+    # (start, end, statement), in seconds on the perf_counter clock.
+    statements: list[tuple[float, float, str]] = field(default_factory=list)
+    # Statements currently executing, by connection.
+    running_statements: dict[int, tuple[float, str]] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        path = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.path.strip("/"))[:64]
+        return f"{self.created_at:%Y%m%dT%H%M%S}-{id(self) & 0xFFFFFFFF:08x}-{self.method}-{path}"
+
+
+def _frame(code: CodeType) -> Frame:
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+
+def _statement_frame(statement: str) -> Frame:
+    return ("SQL " + " ".join(statement.split())[:120], "<sql>", 0)
+
+
+WAITING: Frame = ("(waiting)", "<asyncio>", 0)
+
+
+class TaskSampler:
+    """Samples the stack of one asyncio task from a background thread.
+
+    While the task runs, the event loop thread's frames are recorded; while it
+    is suspended, its chain of awaiting coroutines is, under a ``(waiting)``
+    leaf. Stacks are cut at ``root``, the frame of the code that started the
+    sampler, and the statement running at sample time is added as a leaf.
+    """
+
+    def __init__(self, profile: RequestProfile, root: CodeType, interval: float = 0.001):
+        self.profile = profile
+        self.root = root
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.profile.finished = time.perf_counter()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            stack = self._sample()
+            if stack:
+                self.profile.samples.append(Sample(time.perf_counter(), stack))
+
+    def _sample(self) -> tuple[Frame, ...]:
+        if asyncio.current_task(self.loop) is self.task:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = self._running_stack(frame) if frame is not None else []
+        else:
+            stack = self._awaiting_stack()
+            if stack:
+                stack.append(WAITING)
+        for _, statement in list(self.profile.running_statements.values()):
+            stack.append(_statement_frame(statement))
+        return tuple(stack)
+
+    def _running_stack(self, frame: FrameType | None) -> list[Frame]:
+        stack = []
+        while frame is not None:
+            stack.append(_frame(frame.f_code))
+            if frame.f_code is self.root:
+                break
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _awaiting_stack(self) -> list[Frame]:
+        stack: list[Frame] = []
+        coroutine = self.task.get_coro() if self.task is not None else None
+        while coroutine is not None:
+            frame = getattr(coroutine, "cr_frame", None) or getattr(coroutine, "gi_frame", None)
+            if frame is None:
+                break
+            if frame.f_code is self.root:
+                stack = []
+            stack.append(_frame(frame.f_code))
+            coroutine = getattr(coroutine, "cr_await", None) or getattr(coroutine, "gi_yieldfrom", None)
+        return stack
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    profile = profile_context.get()
+    if profile is not None:
+        profile.running_statements[id(conn)] = (time.perf_counter(), statement)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    profile = profile_context.get()
+    if profile is not None:
+        started, _ = profile.running_statements.pop(id(conn), (time.perf_counter(), statement))
+        profile.statements.append((started, time.perf_counter(), statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _statement_failed(context):
+    profile = profile_context.get()
+    if profile is not None and context.connection is not None:
+        profile.running_statements.pop(id(context.connection), None)
+
+
+def to_speedscope(profile: RequestProfile) -> dict:
+    """A speedscope file with the sampled stacks and an evented SQL timeline."""
+    frames: list[dict] = []
+    indexes: dict[Frame, int] = {}
+
+    def index(frame: Frame) -> int:
+        if frame not in indexes:
+            indexes[frame] = len(frames)
+            name, file, line = frame
+            frames.append({"name": name, "file": file, "line": line} if line else {"name": name})
+        return indexes[frame]
+
+    end = (profile.finished or time.perf_counter()) - profile.started
+    samples, weights = [], []
+    previous = 0.0
+    for sample in profile.samples:
+        at = sample.time - profile.started
+        samples.append([index(frame) for frame in sample.stack])
+        weights.append(round((at - previous) * 1000, 3))
+        previous = at
+
+    events = []
+    for started, finished, statement in sorted(profile.statements):
+        frame = index(_statement_frame(statement))
+        events.append({"type": "O", "frame": frame, "at": round((started - profile.started) * 1000, 3)})
+        events.append({"type": "C", "frame": frame, "at": round((finished - profile.started) * 1000, 3)})
+
+    title = f"{profile.method} {profile.path}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": title,
+        "exporter": "fastapi-clean-architecture",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": title,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(end * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            },
+            {
+                "type": "evented",
+                "name": f"{title} (SQL)",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(end * 1000, 3),
+                "events": events,
+            },
+        ],
+    }
+
+
+def to_collapsed(profile: RequestProfile) -> str:
+    """Brendan Gregg's collapsed stacks, one ``frame;frame;frame count`` line per stack."""
+    counts: dict[tuple[Frame, ...], int] = {}
+    for sample in profile.samples:
+        counts[sample.stack] = counts.get(sample.stack, 0) + 1
+    lines = []
+    for stack, count in counts.items():
+        names = (f"{name} ({os.path.basename(file)}:{line})" if line else name for name, file, line in stack)
+        lines.append(f"{';'.join(name.replace(';', ',') for name in names)} {count}\n")
+    return "".join(lines)
+
+
+class ProfileStore:
+    """Profiles written to ``directory``, keeping the ``max_profiles`` most recent."""
+
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile: RequestProfile) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = profile.name
+        with open(self.path(name, "speedscope"), "w") as f:
+            json.dump(to_speedscope(profile), f)
+        with open(self.path(name, "collapsed"), "w") as f:
+            f.write(to_collapsed(profile))
+        for old in self.names()[self.max_profiles :]:
+            for format in PROFILE_FORMATS:
+                try:
+                    os.remove(self.path(old, format))
+                except FileNotFoundError:
+                    pass
+        return name
+
+    def names(self) -> list[str]:
+        """Stored profile names, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        suffix = PROFILE_FORMATS["speedscope"]
+        names = [entry[: -len(suffix)] for entry in os.listdir(self.directory) if entry.endswith(suffix)]
+        return sorted(names, reverse=True)
+
+    def path(self, name: str, format: str) -> str:
+        if not PROFILE_NAME.match(name) or format not in PROFILE_FORMATS:
+            raise ValueError(f"Invalid profile {name!r} ({format})")
+        return os.path.join(self.directory, name + PROFILE_FORMATS[format])
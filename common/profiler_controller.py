@@ -0,0 +1,62 @@
+import os
+from datetime import datetime
+from typing import Annotated, Literal
+
+from dependency_injector.wiring import inject, Provide
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from common.auth import CurrentUser, get_admin_user
+from common.profiler import PROFILE_FORMATS, ProfileStore
+from containers import Container
+
+router = APIRouter(prefix="/admin/profiles")
+
+
+class ProfileResponse(BaseModel):
+    name: str
+    created_at: datetime
+    formats: list[str]
+
+
+def list_profiles(store: ProfileStore, limit: int) -> list[ProfileResponse]:
+    profiles = []
+    for name in store.names()[:limit]:
+        path = store.path(name, "speedscope")
+        try:
+            created_at = datetime.fromtimestamp(os.path.getmtime(path))
+        except FileNotFoundError:
+            continue
+        formats = [format for format in PROFILE_FORMATS if os.path.exists(store.path(name, format))]
+        profiles.append(ProfileResponse(name=name, created_at=created_at, formats=formats))
+    return profiles
+
+
+@router.get("", response_model=list[ProfileResponse])
+@inject
+async def get_profiles(
+    current_user: Annotated[CurrentUser, Depends(get_admin_user)],
+    limit: int = 20,
+    profile_store: ProfileStore = Depends(Provide[Container.profile_store]),
+):
+    return await run_in_threadpool(list_profiles, profile_store, limit)
+
+
+@router.get("/{name}/{format}")
+@inject
+async def download_profile(
+    name: str,
+    format: Literal["speedscope", "collapsed"],
+    current_user: Annotated[CurrentUser, Depends(get_admin_user)],
+    profile_store: ProfileStore = Depends(Provide[Container.profile_store]),
+):
+    try:
+        path = profile_store.path(name, format)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if format == "speedscope" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
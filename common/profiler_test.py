@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from common.profiler import ProfileStore, RequestProfile, Sample, TaskSampler, to_collapsed, to_speedscope
+from context_vars import profile_context
+
+
+def busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def handle_request(profile: RequestProfile, engine):
+    sampler = TaskSampler(profile, root=handle_request.__code__, interval=0.001)
+    context_token = profile_context.set(profile)
+    sampler.start()
+    try:
+        busy(0.03)
+        await asyncio.sleep(0.03)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        sampler.stop()
+        profile_context.reset(context_token)
+
+
+def test_task_sampler_records_running_and_waiting_stacks_and_statements():
+    engine = create_engine("sqlite://")
+    profile = RequestProfile(method="GET", path="/notes")
+
+    asyncio.run(handle_request(profile, engine))
+
+    stacks = [[name for name, _, _ in sample.stack] for sample in profile.samples]
+    assert all(stack[0] == "handle_request" for stack in stacks)
+    assert any(stack[-2:] == ["handle_request", "busy"] for stack in stacks)
+    assert any(stack[-1] == "(waiting)" for stack in stacks)
+    assert [statement for _, _, statement in profile.statements] == ["SELECT 1"]
+    assert profile.running_statements == {}
+
+
+def make_profile() -> RequestProfile:
+    profile = RequestProfile(method="GET", path="/notes/{id}", started=0.0, finished=0.004)
+    handler = ("get_note", "/app/note_controller.py", 10)
+    profile.samples = [
+        Sample(0.001, (handler,)),
+        Sample(0.002, (handler, ("find_by_id", "/app/note_repo.py", 20))),
+        Sample(0.003, (handler,)),
+    ]
+    profile.statements = [(0.0015, 0.0025, "SELECT  notes.id\n FROM notes")]
+    return profile
+
+
+def test_to_collapsed():
+    assert to_collapsed(make_profile()) == (
+        "get_note (note_controller.py:10) 2\n"
+        "get_note (note_controller.py:10);find_by_id (note_repo.py:20) 1\n"
+    )
+
+
+def test_to_speedscope():
+    speedscope = to_speedscope(make_profile())
+
+    sampled, evented = speedscope["profiles"]
+    assert [frame["name"] for frame in speedscope["shared"]["frames"]] == [
+        "get_note",
+        "find_by_id",
+        "SQL SELECT notes.id FROM notes",
+    ]
+    assert sampled["samples"] == [[0], [0, 1], [0]]
+    assert sampled["weights"] == [1.0, 1.0, 1.0]
+    assert sampled["endValue"] == 4.0
+    assert evented["events"] == [
+        {"type": "O", "frame": 2, "at": 1.5},
+        {"type": "C", "frame": 2, "at": 2.5},
+    ]
+
+
+def test_profile_store_keeps_most_recent(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    names = []
+    for second in range(3):
+        profile = make_profile()
+        profile.created_at = profile.created_at.replace(second=second)
+        names.append(store.save(profile))
+
+    assert store.names() == [names[2], names[1]]
+    with open(store.path(names[2], "speedscope")) as f:
+        assert json.load(f)["name"] == "GET /notes/{id}"
+    with pytest.raises(ValueError):
+        store.path("../secrets", "collapsed")
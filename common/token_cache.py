@@ -0,0 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from common.metrics import cache_requests
+
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of verified token claims.
+
+    Entries are keyed by a SHA-256 digest of the token, so raw bearer tokens
+    are never held, and each one expires at its token's ``exp``. Tokens
+    without ``exp`` are not cached. Lookups are counted in ``cache_requests``.
+    """
+
+    def __init__(self, maxsize: int = 10000, clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        # Sync dependencies run in the threadpool, so lookups come from many threads.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self.key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None or claims["exp"] <= self.clock():
+                if claims is not None:
+                    del self._entries[key]
+                cache_requests.labels("token", "local", "miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            cache_requests.labels("token", "local", "hit").inc()
+            return dict(claims)
+
+    def put(self, token: str, claims: dict):
+        if not isinstance(claims.get("exp"), (int, float)) or self.maxsize <= 0:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = dict(claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,57 @@
+from common.metrics import cache_requests
+from common.token_cache import VerifiedTokenCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def lookups() -> tuple[float, float]:
+    return cache_requests.labels("token", "local", "hit").get(), cache_requests.labels("token", "local", "miss").get()
+
+
+def test_get_counts_hits_and_misses():
+    cache = VerifiedTokenCache(clock=FakeClock())
+    hits, misses = lookups()
+    assert cache.get("token") is None
+    cache.put("token", {"user_id": "USER_ID", "exp": 2000})
+
+    assert cache.get("token") == {"user_id": "USER_ID", "exp": 2000}
+    assert lookups() == (hits + 1, misses + 1)
+    assert len(cache) == 1
+
+
+def test_entries_expire_with_the_token():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(clock=clock)
+    cache.put("token", {"exp": 1010})
+    cache.put("no-exp", {"user_id": "USER_ID"})
+
+    clock.now = 1010
+    assert cache.get("token") is None
+    assert cache.get("no-exp") is None
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used_and_keys_by_digest():
+    cache = VerifiedTokenCache(maxsize=2, clock=FakeClock())
+    for token in ("a", "b"):
+        cache.put(token, {"exp": 2000})
+    cache.get("a")
+    cache.put("c", {"exp": 2000})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert all(len(key) == 32 for key in cache._entries)
+
+
+def test_returned_claims_are_copies():
+    cache = VerifiedTokenCache(clock=FakeClock())
+    cache.put("token", {"exp": 2000})
+    cache.get("token")["role"] = "ADMIN"  # type: ignore
+
+    assert cache.get("token") == {"exp": 2000}
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,6 +15,115 @@ class Settings(BaseSettings):
     email_password: str
     celery_broker_url: str
     celery_backend_url: str
+    database_host: str = "127.0.0.1"
+    database_port: int = 3306
+    database_name: str = "fastapi-ca"
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_recycle: int = 3600
+    database_pool_pre_ping: bool = True
+    database_pool_timeout: float = 30
+    # "native" runs repositories on the async engine, "threadpool" runs the
+    # blocking repositories in Starlette's threadpool.
+    database_io: Literal["native", "threadpool"] = "native"
+    # "inline" deletes orphaned tags while editing a note, "deferred" leaves
+    # them to the periodic sweep_orphan_tags_task.
+    orphan_tag_collection: Literal["inline", "deferred"] = "inline"
+    orphan_tag_sweep_interval: float = 300
+    orphan_tag_sweep_batch_size: int = 1000
+    # "database" searches with the database's full-text index, "inverted_index"
+    # with an in-process index snapshotted to note_search_snapshot_path.
+    note_search: Literal["database", "inverted_index"] = "database"
+    note_search_snapshot_path: str = "note_search.idx"
+    # bcrypt cost; passwords hashed with another cost are rehashed on login.
+    bcrypt_rounds: int = 12
+    # Hashing processes (one per core by default), and how many hash or verify
+    # calls may be queued or running before new ones are refused with a 503
+    # (four per process by default). Waiting logins hold a database
+    # connection, so keep this well below the connection pool size.
+    password_hash_workers: int | None = None
+    password_hash_max_pending: int | None = None
+    password_hash_retry_after: int = 1
+    # Verified access tokens kept in memory (0 disables the cache).
+    jwt_cache_size: int = 10000
+    # Log records are written by a background thread; when log_queue_size
+    # records are waiting, new ones are dropped.
+    log_level: str = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = 10000
+    # Fraction of requests written to the access log, and an optional cap in
+    # records per second.
+    access_log_sample_rate: float = 1.0
+    access_log_rate_limit: float | None = None
+    # Fraction of requests profiled; admins can also ask for a profile with
+    # an X-Profile header. Profiles are sampled every profiler_interval
+    # seconds and the profiler_max_profiles most recent are kept.
+    profiler_sample_rate: float = 0.0
+    profiler_interval: float = 0.001
+    profiler_directory: str = "profiles"
+    profiler_max_profiles: int = 100
+    # Requests with a user token check that the user still exists and is
+    # active; each process then skips the check for active_user_cache_ttl
+    # seconds. A deactivation or deletion takes effect at once in the
+    # process that made it and within that many seconds in the others; 0
+    # checks every request, at one query each.
+    active_user_cache_size: int = 10000
+    active_user_cache_ttl: float = 5
+    # "local" caches user lookups in each process for user_cache_ttl seconds,
+    # "redis" adds a shared tier at user_cache_redis_url, and "none" disables
+    # the cache. Unknown emails are cached for user_cache_negative_ttl.
+    # With "local" and several processes, a change made through one process
+    # (a rename, a deactivation) can take user_cache_ttl seconds to reach the
+    # others.
+    user_cache: Literal["none", "local", "redis"] = "none"
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 5
+    user_cache_negative_ttl: float = 5
+    user_cache_redis_url: str = "redis://localhost:6379/0"
+    user_cache_redis_ttl: float = 300
+    # Note reads cached per user and version. "local" keeps versions in each
+    # process, rolling over every note_cache_ttl seconds, so with several
+    # processes a write can take that long to show in the others' reads;
+    # "redis" shares them through note_cache_redis_url so writes are seen by
+    # every process.
+    note_cache: Literal["none", "local", "redis"] = "none"
+    note_cache_max_bytes: int = 64 * 1024 * 1024
+    note_cache_max_entries: int = 100000
+    note_cache_ttl: float = 5
+    note_cache_redis_url: str = "redis://localhost:6379/0"
+    # Responses of at least compression_minimum_size bytes are compressed with
+    # brotli (when the brotli package is installed) or gzip, as the client
+    # accepts; None turns compression off.
+    compression_minimum_size: int | None = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    # Emails are sent from email_sender through connections each worker
+    # process keeps open; idle ones are checked with NOOP after
+    # smtp_check_after seconds and closed after smtp_max_idle.
+    email_sender: str = "syw5141@gmail.com"
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_starttls: bool = True
+    smtp_pool_size: int = 2
+    smtp_timeout: float = 10
+    smtp_check_after: float = 30
+    smtp_max_idle: float = 300
+    # Task calls are committed to the Outbox table with the rows that trigger
+    # them; `python -m common.outbox_relay` publishes them to the broker in
+    # batches of outbox_relay_batch_size, polling every
+    # outbox_relay_poll_interval seconds once the outbox is empty.
+    outbox_relay_batch_size: int = 500
+    outbox_relay_poll_interval: float = 0.5
+    # "in_process" sends welcome emails from the API process instead, with
+    # up to smtp_pool_size concurrent sessions and no broker or worker.
+    # Deferred emails are retried welcome_email_max_attempts times, waiting
+    # welcome_email_retry_delay seconds, doubled each time; emails still
+    # queued at shutdown are lost.
+    welcome_email_delivery: Literal["outbox", "in_process"] = "outbox"
+    welcome_email_max_attempts: int = 5
+    welcome_email_retry_delay: float = 30
+    # Admin bulk operations change and commit at most this many users at a time.
+    user_admin_batch_size: int = 1000
 
 
 @lru_cache
@@ -1,13 +1,34 @@
+import os
 from dependency_injector import containers, providers
-from user.application.email_service import EmailService
-from user.application.send_welcome_email_task import SendWelcomeEmailTask
+from config import get_settings
+from context_vars import db_session_context
+from database import session_scope, sync_session_scope
+from user.application.email_service import AsyncEmailService
+from user.application.user_admin_service import UserAdminService
 from user.application.user_service import UserService
+from user.infra.repository.async_user_repo import AsyncUserRepository, ThreadedUserRepository
+from user.infra.repository.cached_user_repo import CachedUserRepository, UserCache
 from user.infra.repository.user_repo import UserRepository
 from note.application.note_service import NoteService
+from note.infra.repository.async_note_repo import AsyncNoteRepository, ThreadedNoteRepository
+from note.infra.repository.cached_note_repo import (
+    CachedNoteRepository,
+    LocalNoteVersions,
+    NoteCache,
+    RedisNoteVersions,
+    note_size,
+)
+from note.infra.repository.indexed_note_repo import IndexedNoteRepository
 from note.infra.repository.note_repo import NoteRepository
+from note.infra.search.inverted_index import InvertedIndex
 from ulid import ULID # type: ignore
 
-from utils.crypto import Crypto
+from common.profiler import ProfileStore
+from utils.cache import LocalCache, RedisCache, redis_client
+from utils.crypto import Crypto, hash_executor
+from utils.async_smtp_pool import AsyncSMTPPool
+
+settings = get_settings()
 
 
 class Container(containers.DeclarativeContainer):
@@ -16,14 +37,156 @@ class Container(containers.DeclarativeContainer):
             "user",
             "note",
         ],
+        modules=["common.auth", "common.profiler_controller"],
     )
 
+    database_io = providers.Object(settings.database_io)
+
+    # The request-scoped session opened by ``database.unit_of_work``: an
+    # AsyncSession, or a blocking Session when ``database_io`` is "threadpool".
+    db_session = providers.Callable(db_session_context.get)
+
     ulid = providers.Factory(ULID)
-    crypto = providers.Factory(Crypto)
-    send_welcome_email_task = providers.Factory(SendWelcomeEmailTask)
-
-    user_repo = providers.Factory(UserRepository)
-    email_service = providers.Factory(EmailService)
-    user_service = providers.Factory(UserService, user_repo=user_repo, email_service=email_service, ulid=ulid, crypto=crypto, send_welcome_email_task=send_welcome_email_task)
-    note_repo = providers.Factory(NoteRepository)
-    note_service = providers.Factory(NoteService, note_repo=note_repo)
+    profile_store = providers.Singleton(
+        ProfileStore, directory=settings.profiler_directory, max_profiles=settings.profiler_max_profiles
+    )
+    password_hash_executor = providers.Resource(hash_executor, workers=settings.password_hash_workers)
+    # One instance, so admission control counts every request's hashing.
+    crypto = providers.Singleton(
+        Crypto,
+        executor=password_hash_executor,
+        rounds=settings.bcrypt_rounds,
+        max_pending=settings.password_hash_max_pending or 4 * (settings.password_hash_workers or os.cpu_count() or 1),
+        retry_after=settings.password_hash_retry_after,
+    )
+
+    sync_user_repo = providers.Factory(UserRepository)
+    async_user_repo = providers.Factory(AsyncUserRepository, session=db_session)
+    user_repo = providers.Selector(
+        database_io,
+        native=async_user_repo,
+        threadpool=providers.Factory(ThreadedUserRepository, user_repo=sync_user_repo, session=db_session),
+    )
+    user_cache_backend = providers.Object(settings.user_cache)
+    user_cache = providers.Singleton(
+        UserCache,
+        local=providers.Singleton(LocalCache, maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl),
+        remote=providers.Selector(
+            user_cache_backend,
+            none=providers.Object(None),
+            local=providers.Object(None),
+            redis=providers.Singleton(
+                RedisCache,
+                client=providers.Singleton(redis_client, settings.user_cache_redis_url),
+                ttl=settings.user_cache_redis_ttl,
+                prefix="user:",
+            ),
+        ),
+        negative_ttl=settings.user_cache_negative_ttl,
+    )
+    cached_user_repo = providers.Selector(
+        user_cache_backend,
+        none=user_repo,
+        local=providers.Factory(CachedUserRepository, user_repo=user_repo, cache=user_cache, session=db_session),
+        redis=providers.Factory(CachedUserRepository, user_repo=user_repo, cache=user_cache, session=db_session),
+    )
+    welcome_email_delivery = providers.Object(settings.welcome_email_delivery)
+    async_smtp_pool = providers.Singleton(
+        AsyncSMTPPool,
+        host=settings.smtp_host,
+        port=settings.smtp_port,
+        username=settings.email_sender,
+        password=settings.email_password,
+        starttls=settings.smtp_starttls,
+        size=settings.smtp_pool_size,
+        timeout=settings.smtp_timeout,
+        check_after=settings.smtp_check_after,
+        max_idle=settings.smtp_max_idle,
+    )
+    # A singleton: its queue and workers serve every request.
+    async_email_service = providers.Singleton(
+        AsyncEmailService,
+        smtp_pool=async_smtp_pool,
+        sender=settings.email_sender,
+        concurrency=settings.smtp_pool_size,
+        max_attempts=settings.welcome_email_max_attempts,
+        retry_delay=settings.welcome_email_retry_delay,
+    )
+    # With the outbox, the Celery worker sends the email instead.
+    email_service = providers.Selector(
+        welcome_email_delivery,
+        outbox=providers.Object(None),
+        in_process=async_email_service,
+    )
+    collect_orphan_tags = providers.Object(settings.orphan_tag_collection == "inline")
+    sync_note_repo = providers.Factory(NoteRepository, collect_orphan_tags=collect_orphan_tags)
+    async_note_repo = providers.Factory(AsyncNoteRepository, session=db_session, collect_orphan_tags=collect_orphan_tags)
+    note_repo = providers.Selector(
+        database_io,
+        native=async_note_repo,
+        threadpool=providers.Factory(
+            ThreadedNoteRepository,
+            note_repo=sync_note_repo,
+            session=db_session,
+            collect_orphan_tags=collect_orphan_tags,
+        ),
+    )
+    note_search = providers.Object(settings.note_search)
+    inverted_index = providers.Singleton(InvertedIndex)
+    note_index = providers.Selector(note_search, database=providers.Object(None), inverted_index=inverted_index)
+    searchable_note_repo = providers.Selector(
+        note_search,
+        database=note_repo,
+        inverted_index=providers.Factory(IndexedNoteRepository, note_repo=note_repo, note_index=inverted_index),
+    )
+    note_cache_backend = providers.Object(settings.note_cache)
+    note_versions = providers.Selector(
+        note_cache_backend,
+        none=providers.Object(None),
+        local=providers.Singleton(
+            LocalNoteVersions, period=settings.note_cache_ttl, maxsize=settings.note_cache_max_entries
+        ),
+        redis=providers.Singleton(
+            RedisNoteVersions, client=providers.Singleton(redis_client, settings.note_cache_redis_url)
+        ),
+    )
+    note_cache = providers.Singleton(
+        NoteCache,
+        local=providers.Singleton(
+            LocalCache,
+            maxsize=settings.note_cache_max_entries,
+            ttl=settings.note_cache_ttl,
+            maxbytes=settings.note_cache_max_bytes,
+            sizeof=providers.Object(note_size),
+        ),
+        versions=note_versions,
+    )
+    cached_note_repo = providers.Selector(
+        note_cache_backend,
+        none=searchable_note_repo,
+        local=providers.Factory(CachedNoteRepository, note_repo=searchable_note_repo, cache=note_cache, session=db_session),
+        redis=providers.Factory(CachedNoteRepository, note_repo=searchable_note_repo, cache=note_cache, session=db_session),
+    )
+    note_service = providers.Factory(NoteService, note_repo=cached_note_repo, note_index=note_index)
+    user_service = providers.Factory(
+        UserService,
+        user_repo=cached_user_repo,
+        note_service=note_service,
+        email_service=email_service,
+        ulid=ulid,
+        crypto=crypto,
+        session=db_session,
+    )
+    # A transaction of its own, like ``database.unit_of_work``'s.
+    transaction = providers.Selector(
+        database_io,
+        native=providers.Object(session_scope),
+        threadpool=providers.Object(sync_session_scope),
+    )
+    user_admin_service = providers.Factory(
+        UserAdminService,
+        user_repo=cached_user_repo.provider,
+        note_service=note_service.provider,
+        transaction=transaction,
+        batch_size=settings.user_admin_batch_size,
+    )
@@ -1,3 +1,5 @@
 from contextvars import ContextVar
 
-user_context = ContextVar("current_user", default=None)
\ No newline at end of file
+user_context = ContextVar("current_user", default=None)
+db_session_context = ContextVar("db_session", default=None)
+profile_context = ContextVar("request_profile", default=None)
@@ -1,2 +1,3 @@
 import user.infra.db_models.user
 import note.infra.db_models.note
+import common.outbox
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from common.metrics import db_pool_checkins, db_pool_checkouts, db_pool_timeouts, db_pool_wait
+from database import InstrumentedQueuePool
+
+
+def pool_counts() -> tuple[float, float, float, float]:
+    # A histogram's cells are one count per bucket, then the total time.
+    waits = sum(db_pool_wait.labels("sync")._cells.sum()[:-1])
+    checkouts, checkins, timeouts = (
+        counter.labels("sync").get() for counter in (db_pool_checkouts, db_pool_checkins, db_pool_timeouts)
+    )
+    return checkouts, checkins, timeouts, waits
+
+
+def test_pool_checkouts_are_exported(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    checkouts, checkins, timeouts, waits = pool_counts()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert pool_counts() == (checkouts + 1, checkins + 1, timeouts + 1, waits + 2)
+    engine.dispose()
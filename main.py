@@ -1,17 +1,59 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from user.interface.controllers.user_controller import router as user_routers
 from note.interface.controllers.note_controller import router as note_routers
+from common.profiler_controller import router as profiler_routers
+from starlette.concurrency import run_in_threadpool
+from common import metrics
+from config import get_settings
 from containers import Container
+from database import unit_of_work
 from middlewares import create_middlewares
+from note.infra.search.inverted_index import warm_start
 
-app = FastAPI()
-app.container = Container()  # type: ignore
+settings = get_settings()
+container = Container()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    note_index = container.note_index()
+    if note_index is not None:
+        await run_in_threadpool(warm_start, note_index, container.sync_note_repo(), settings.note_search_snapshot_path)
+    yield
+    if note_index is not None:
+        await run_in_threadpool(note_index.snapshot, settings.note_search_snapshot_path)
+    email_service = container.email_service()
+    if email_service is not None:
+        await email_service.close()
+    container.shutdown_resources()
+
+
+app = FastAPI(dependencies=[Depends(unit_of_work)], lifespan=lifespan)
+app.container = container  # type: ignore
 app.include_router(user_routers)
 app.include_router(note_routers)
+app.include_router(profiler_routers)
+
+create_middlewares(
+    app,
+    profile_store=container.profile_store(),
+    profiler_sample_rate=settings.profiler_sample_rate,
+    profiler_interval=settings.profiler_interval,
+    compression_minimum_size=settings.compression_minimum_size,
+    compression_gzip_level=settings.compression_gzip_level,
+    compression_brotli_quality=settings.compression_brotli_quality,
+)
+
+
+async def expose_metrics(request: Request):
+    return Response(metrics.registry.expose(), media_type=metrics.CONTENT_TYPE)
+
 
-create_middlewares(app)
+# A plain route, so scrapes skip the app-wide unit of work.
+app.add_route("/metrics", expose_metrics, methods=["GET"], include_in_schema=False)
 
 
 @app.exception_handler(RequestValidationError)
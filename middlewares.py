@@ -1,22 +1,255 @@
-from fastapi import FastAPI, Request
-from common.logger import logger
-from common.auth import CurrentUser, decode_access_token
-from context_vars import user_context
-
-def create_middlewares(app: FastAPI):
-    @app.middleware("http")
-    def get_current_user_middleware(request: Request, call_next):
-        authorization = request.headers.get("Authorization")
-        if authorization:
-            splits = authorization.split(" ")
-            if splits[0] == "Bearer":
-                token = splits[1]
-                payload = decode_access_token(token)
-                user_id = payload.get("user_id")
-                user_role = payload.get('role')
-
-                user_context.set(CurrentUser(user_id, user_role))
-        logger.info(request.url)
-        response = call_next(request)
-        return response
+import random
+import time
+from typing import Callable
 
+from fastapi import FastAPI, HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import URL, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.logger import access_logger
+from common.auth import get_admin_user, parse_current_user
+from common.metrics import http_request_duration, http_requests_in_flight
+from common.profiler import ProfileStore, RequestProfile, TaskSampler
+from context_vars import profile_context, user_context
+from utils.compression import BrotliCompressor, GzipCompressor, is_compressible, negotiate_encoding, supported_encodings
+
+BEARER_PREFIX = b"Bearer "
+# Bodies at least this large are compressed in the threadpool rather than on the event loop.
+COMPRESS_IN_THREADPOOL_SIZE = 64 * 1024
+
+def bearer_token(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            if value.startswith(BEARER_PREFIX):
+                return value[len(BEARER_PREFIX):].decode("latin-1")
+            return None
+    return None
+
+
+class ScopeURL:
+    """The request URL, built only if an access log record is actually written."""
+
+    __slots__ = ("scope",)
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+
+    def __str__(self) -> str:
+        return str(URL(scope=self.scope))
+
+
+class AuthContextMiddleware:
+    """Puts the user of the request's bearer token in ``user_context``.
+
+    A raw ASGI middleware: the header is read straight from the scope and the
+    downstream app runs in the same task, so per request it only allocates
+    the parsed user and the access log record. The auth dependencies reuse
+    the user instead of decoding the token again, and reject missing or
+    invalid tokens themselves.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current_user = None
+        token = bearer_token(scope)
+        if token is not None:
+            try:
+                current_user = parse_current_user(token)
+            except HTTPException:
+                pass
+
+        context_token = user_context.set(current_user)
+        try:
+            access_logger.info("%s %s", scope["method"], ScopeURL(scope))
+            await self.app(scope, receive, send)
+        finally:
+            user_context.reset(context_token)
+
+
+class MetricsMiddleware:
+    """Counts in-flight requests and observes each one's latency by route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            # Unmatched paths share one label so scanners can't blow up the series count.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+
+
+class ProfilerMiddleware:
+    """Profiles a ``sample_rate`` fraction of requests, and admin requests sent with ``X-Profile``.
+
+    Must run inside ``AuthContextMiddleware``, whose user decides whether the
+    header is honoured. Profiles are written after the response is sent.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        random: Callable[[], float] = random.random,
+    ):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.random = random
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and self.random() < self.sample_rate:
+            return True
+        if not any(name == b"x-profile" for name, _ in scope["headers"]):
+            return False
+        try:
+            get_admin_user(bearer_token(scope) or "")
+        except HTTPException:
+            return False
+        return True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(method=scope["method"], path=scope["path"])
+        sampler = TaskSampler(profile, root=self.__call__.__code__, interval=self.interval)
+        context_token = profile_context.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            profile_context.reset(context_token)
+        await run_in_threadpool(self.store.save, profile)
+
+
+class CompressionMiddleware:
+    """Compresses responses of ``minimum_size`` bytes or more with brotli or gzip, as the client prefers.
+
+    Brotli is only offered when the ``brotli`` package is installed. Streamed
+    bodies are compressed chunk by chunk. Compressed responses get a weak
+    ETag, as nginx does: their bytes differ from the identity response the
+    strong one was computed for, and If-None-Match compares weakly anyway,
+    so conditional requests still get their 304.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = {"gzip": lambda: GzipCompressor(gzip_level), "br": lambda: BrotliCompressor(brotli_quality)}
+        self.encodings = supported_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = None
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"accept-encoding":
+                    encoding = negotiate_encoding(value.decode("latin-1"), self.encodings)
+                    break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is not None:
+                if message["type"] == "http.response.body":
+                    compressor = self._start_compressing(start, message, encoding)
+                await send(start)
+                start = None
+            if compressor is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) >= COMPRESS_IN_THREADPOOL_SIZE:
+                body = await run_in_threadpool(compressor.compress, body, not more_body)
+            else:
+                body = compressor.compress(body, not more_body)
+            # The compressor may buffer a small chunk entirely; only the last message must be sent regardless.
+            if body or not more_body:
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _start_compressing(self, start: Message, first_body: Message, encoding: str):
+        """A compressor for the response, with its headers updated; None to send it as is."""
+        headers = MutableHeaders(raw=start["headers"])
+        if (
+            "content-encoding" in headers
+            or "content-range" in headers
+            or not is_compressible(headers.get("content-type", ""))
+        ):
+            return None
+        if not first_body.get("more_body", False) and len(first_body.get("body", b"")) < self.minimum_size:
+            return None
+        del headers["content-length"]
+        headers["content-encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+        start["headers"] = headers.raw
+        return self.compressors[encoding]()
+
+
+def create_middlewares(
+    app: FastAPI,
+    profile_store: ProfileStore,
+    profiler_sample_rate: float,
+    profiler_interval: float,
+    compression_minimum_size: int | None = 1024,
+    compression_gzip_level: int = 6,
+    compression_brotli_quality: int = 4,
+):
+    if compression_minimum_size is not None:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=compression_minimum_size,
+            gzip_level=compression_gzip_level,
+            brotli_quality=compression_brotli_quality,
+        )
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        sample_rate=profiler_sample_rate,
+        interval=profiler_interval,
+    )
+    app.add_middleware(AuthContextMiddleware)
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from common.auth import CurrentUser, Role, create_access_token
+from context_vars import user_context
+from middlewares import AuthContextMiddleware
+
+
+SCOPE = {
+    "type": "http",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/notes",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [],
+    "server": ("test", 80),
+}
+
+
+def call(headers: list[tuple[bytes, bytes]]):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(user_context.get())
+
+    asyncio.run(AuthContextMiddleware(app)({**SCOPE, "headers": headers}, None, None))
+    return seen
+
+
+def test_sets_the_bearer_user_for_the_request_only():
+    token = create_access_token({"user_id": "USER_ID"}, role=Role.ADMIN)
+
+    seen = call([(b"host", b"test"), (b"authorization", f"Bearer {token}".encode())])
+
+    assert seen == [CurrentUser(id="USER_ID", role=Role.ADMIN)]
+    assert user_context.get() is None
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        [],
+        [(b"authorization", b"Basic dXNlcjpwYXNz")],
+        [(b"authorization", b"Bearer not-a-jwt")],
+    ],
+)
+def test_leaves_user_unset_without_a_valid_bearer_token(headers):
+    assert call(headers) == [None]
+
+
+def test_metrics_middleware_observes_route_templates():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from common.metrics import http_requests_in_flight, registry
+    from middlewares import MetricsMiddleware
+
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    async def get_thing(thing_id: str):
+        return {"in_flight": http_requests_in_flight.labels().get()}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+
+    assert client.get("/things/1").json() == {"in_flight": 1}
+    client.get("/things/2")
+    client.get("/missing")
+
+    exposed = registry.expose()
+    assert 'http_request_duration_seconds_count{method="GET",route="/things/{thing_id}",status="200"} 2' in exposed
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in exposed
+    assert http_requests_in_flight.labels().get() == 0
+
+
+@pytest.mark.parametrize(("role", "profiled"), [(Role.ADMIN, True), (Role.USER, False)])
+def test_profiler_middleware_honours_the_header_for_admins_only(mocker, role, profiled):
+    from middlewares import ProfilerMiddleware
+
+    store = mocker.Mock()
+    token = create_access_token({"user_id": "USER_ID"}, role=role)
+    headers = [(b"authorization", f"Bearer {token}".encode()), (b"x-profile", b"1")]
+
+    async def app(scope, receive, send):
+        pass
+
+    async def call():
+        await AuthContextMiddleware(ProfilerMiddleware(app, store))({**SCOPE, "headers": headers}, None, None)
+
+    asyncio.run(call())
+
+    assert store.save.called is profiled
+
+
+@pytest.mark.parametrize("size, compressed", [(10, False), (2000, True)])
+def test_compression_middleware_applies_the_size_threshold(size, compressed):
+    import gzip
+
+    from middlewares import CompressionMiddleware
+
+    body = b"x" * size
+
+    async def app(scope, receive, send):
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(size).encode()), (b"etag", b'"abc"')]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = CompressionMiddleware(app, minimum_size=1000)
+    asyncio.run(middleware({**SCOPE, "headers": [(b"accept-encoding", b"gzip")]}, None, send))
+
+    headers = dict(messages[0]["headers"])
+    if compressed:
+        assert headers[b"content-encoding"] == b"gzip"
+        assert headers[b"etag"] == b'W/"abc"'
+        assert b"content-length" not in headers
+        assert gzip.decompress(messages[1]["body"]) == body
+    else:
+        assert b"content-encoding" not in headers
+        assert headers[b"etag"] == b'"abc"'
+        assert messages[1]["body"] == body
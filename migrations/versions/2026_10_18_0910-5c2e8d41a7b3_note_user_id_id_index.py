@@ -0,0 +1,30 @@
+"""Note - composite (user_id, id) index for keyset pagination
+
+Revision ID: 5c2e8d41a7b3
+Revises: 0f729054b756
+Create Date: 2026-10-18 09:10:42.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8d41a7b3'
+down_revision: Union[str, None] = '0f729054b756'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_Note_user_id_id', 'Note', ['user_id', 'id'], unique=False)
+    op.drop_index(op.f('ix_Note_user_id'), table_name='Note')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_Note_user_id'), 'Note', ['user_id'], unique=False)
+    op.drop_index('ix_Note_user_id_id', table_name='Note')
@@ -0,0 +1,58 @@
+"""Note_Tag - composite primary key and reverse index, add User_Tag
+
+Revision ID: 9e4b7a2c61d8
+Revises: 5c2e8d41a7b3
+Create Date: 2026-10-18 10:15:07.542918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7a2c61d8'
+down_revision: Union[str, None] = '5c2e8d41a7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Links missing a side or repeated cannot go under the primary key; keep one of each.
+    op.execute('DELETE FROM Note_Tag WHERE note_id IS NULL OR tag_id IS NULL')
+    op.create_table('Note_Tag_dedup',
+    sa.Column('note_id', sa.String(length=36), nullable=False),
+    sa.Column('tag_id', sa.String(length=36), nullable=False)
+    )
+    op.execute('INSERT INTO Note_Tag_dedup (note_id, tag_id) SELECT DISTINCT note_id, tag_id FROM Note_Tag')
+    op.execute('DELETE FROM Note_Tag')
+    op.execute('INSERT INTO Note_Tag (note_id, tag_id) SELECT note_id, tag_id FROM Note_Tag_dedup')
+    op.drop_table('Note_Tag_dedup')
+    op.alter_column('Note_Tag', 'note_id', existing_type=sa.String(length=36), nullable=False)
+    op.alter_column('Note_Tag', 'tag_id', existing_type=sa.String(length=36), nullable=False)
+    op.create_primary_key('pk_Note_Tag', 'Note_Tag', ['note_id', 'tag_id'])
+    op.create_index('ix_Note_Tag_tag_id_note_id', 'Note_Tag', ['tag_id', 'note_id'], unique=False)
+    op.create_table('User_Tag',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('tag_id', sa.String(length=36), nullable=False),
+    sa.Column('note_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['Tag.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'tag_id')
+    )
+    op.execute(
+        'INSERT INTO User_Tag (user_id, tag_id, note_count) '
+        'SELECT Note.user_id, Note_Tag.tag_id, COUNT(*) '
+        'FROM Note_Tag JOIN Note ON Note.id = Note_Tag.note_id '
+        'GROUP BY Note.user_id, Note_Tag.tag_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('User_Tag')
+    op.drop_index('ix_Note_Tag_tag_id_note_id', table_name='Note_Tag')
+    op.drop_constraint('pk_Note_Tag', 'Note_Tag', type_='primary')
+    op.alter_column('Note_Tag', 'tag_id', existing_type=sa.String(length=36), nullable=True)
+    op.alter_column('Note_Tag', 'note_id', existing_type=sa.String(length=36), nullable=True)
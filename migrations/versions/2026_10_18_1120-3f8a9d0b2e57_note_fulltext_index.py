@@ -0,0 +1,28 @@
+"""Note - FULLTEXT index on title, content
+
+Revision ID: 3f8a9d0b2e57
+Revises: 9e4b7a2c61d8
+Create Date: 2026-10-18 11:20:31.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a9d0b2e57'
+down_revision: Union[str, None] = '9e4b7a2c61d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_Note_title_content_fulltext', 'Note', ['title', 'content'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_Note_title_content_fulltext', table_name='Note')
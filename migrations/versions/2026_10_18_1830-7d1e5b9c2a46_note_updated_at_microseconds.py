@@ -0,0 +1,28 @@
+"""Note - microsecond precision for updated_at
+
+Revision ID: 7d1e5b9c2a46
+Revises: 3f8a9d0b2e57
+Create Date: 2026-10-18 18:30:12.516834
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1e5b9c2a46'
+down_revision: Union[str, None] = '3f8a9d0b2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('Note', 'updated_at', existing_type=mysql.DATETIME(), type_=mysql.DATETIME(fsp=6), existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('Note', 'updated_at', existing_type=mysql.DATETIME(fsp=6), type_=mysql.DATETIME(), existing_nullable=False)
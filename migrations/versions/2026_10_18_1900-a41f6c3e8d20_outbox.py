@@ -0,0 +1,34 @@
+"""Outbox - Celery task calls committed with the rows that trigger them
+
+Revision ID: a41f6c3e8d20
+Revises: 7d1e5b9c2a46
+Create Date: 2026-10-18 19:00:41.208377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c3e8d20'
+down_revision: Union[str, None] = '7d1e5b9c2a46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('Outbox',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('task', sa.String(length=128), nullable=False),
+    sa.Column('kwargs', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('Outbox')
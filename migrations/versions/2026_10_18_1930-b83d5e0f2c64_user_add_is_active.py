@@ -0,0 +1,28 @@
+"""User - add is_active
+
+Revision ID: b83d5e0f2c64
+Revises: a41f6c3e8d20
+Create Date: 2026-10-18 19:30:27.640915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d5e0f2c64'
+down_revision: Union[str, None] = 'a41f6c3e8d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('User', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('User', 'is_active')
@@ -0,0 +1,29 @@
+"""User - indexes for admin listings sorted by created_at or name
+
+Revision ID: c6a0f3d91e57
+Revises: b83d5e0f2c64
+Create Date: 2026-10-18 20:00:09.335172
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a0f3d91e57'
+down_revision: Union[str, None] = 'b83d5e0f2c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_User_created_at_id', 'User', ['created_at', 'id'], unique=False)
+    op.create_index('ix_User_name', 'User', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_User_name', table_name='User')
+    op.drop_index('ix_User_created_at_id', table_name='User')
@@ -1,34 +1,35 @@
 from datetime import datetime
+from typing import AsyncIterator
 from ulid import ULID # type: ignore
-from note.domain.note import Note, Tag
-from note.domain.repository.note_repo import INoteRepository
+from note.domain.note import Note, SearchHit, Tag, UserTag
+from note.domain.repository.note_repo import IAsyncNoteRepository
+from note.domain.repository.note_search_index import INoteSearchIndex
 
 
 class NoteService:
-    def __init__(self, note_repo: INoteRepository):
+    def __init__(self, note_repo: IAsyncNoteRepository, note_index: INoteSearchIndex | None = None):
         self.note_repo = note_repo
+        self.note_index = note_index
         self.ulid = ULID()
 
-    def get_notes(self, user_id: str, page: int, items_per_page: int) -> tuple[int, list[Note]]:
-        return self.note_repo.get_notes(user_id, page, items_per_page=items_per_page)
+    async def get_notes(self, user_id: str, page: int, items_per_page: int, after_id: str | None = None, fields: tuple[str, ...] | None = None) -> tuple[int | None, list[Note]]:
+        return await self.note_repo.get_notes(user_id, page, items_per_page=items_per_page, after_id=after_id, fields=fields)
 
-    def get_note(self, user_id: str, id: str) -> Note:
-        return self.note_repo.find_by_id(user_id, id)
+    async def get_note(self, user_id: str, id: str) -> Note:
+        return await self.note_repo.find_by_id(user_id, id)
     
-    def create_note(self, user_id: str, title: str, content: str, memo_date: str, tag_names: list[str] = []) -> Note:
-        now = datetime.now()
-
+    def _new_note(self, user_id: str, title: str, content: str, memo_date: str, tag_names: list[str], now: datetime) -> Note:
         tags = [
             Tag(
                 id=self.ulid.generate(),
-                name=title,
+                name=name,
                 created_at=now,
                 updated_at=now,
             )
-            for title in tag_names
+            for name in tag_names
         ]
-        
-        note = Note(
+
+        return Note(
             id=self.ulid.generate(),
             user_id=user_id,
             title=title,
@@ -38,12 +39,31 @@ class NoteService:
             created_at=now,
             updated_at=now,
         )
-        self.note_repo.save(user_id, note)
+
+    async def create_note(self, user_id: str, title: str, content: str, memo_date: str, tag_names: list[str] = []) -> Note:
+        note = self._new_note(user_id, title, content, memo_date, tag_names, datetime.now())
+        await self.note_repo.save(user_id, note)
+        if self.note_index:
+            self.note_index.add(note)
 
         return note
-    
-    def update_note(self, user_id: str, id: str, title: str | None = None, content: str | None = None, memo_date: str | None = None, tag_names: list[str] = []) -> Note:
-        note = self.note_repo.find_by_id(user_id, id)
+
+    async def import_notes(self, user_id: str, notes: list[dict]) -> list[Note]:
+        """Creates a batch of notes, each given as the keyword arguments of ``create_note``."""
+        now = datetime.now()
+        new_notes = [self._new_note(user_id, now=now, **fields) for fields in notes]
+        await self.note_repo.save_many(user_id, new_notes)
+        if self.note_index:
+            for note in new_notes:
+                self.note_index.add(note)
+
+        return new_notes
+
+    def export_notes(self, user_id: str) -> AsyncIterator[Note]:
+        return self.note_repo.stream_notes(user_id)
+
+    async def update_note(self, user_id: str, id: str, title: str | None = None, content: str | None = None, memo_date: str | None = None, tag_names: list[str] = []) -> Note:
+        note = await self.note_repo.find_by_id(user_id, id)
         now = datetime.now()
 
         if title:
@@ -64,12 +84,29 @@ class NoteService:
             ]
         
         note.updated_at = now
-        self.note_repo.update(user_id, note)
+        await self.note_repo.update(user_id, note)
+        if self.note_index:
+            self.note_index.add(note)
 
         return note
     
-    def delete_note(self, user_id: str, id: str):
-        return self.note_repo.delete(user_id, id)
+    async def delete_note(self, user_id: str, id: str):
+        await self.note_repo.delete(user_id, id)
+        if self.note_index:
+            self.note_index.remove(user_id, id)
+
+    async def delete_user_notes(self, user_ids: list[str]) -> int:
+        count = await self.note_repo.delete_user_notes(user_ids)
+        if self.note_index:
+            for user_id in user_ids:
+                self.note_index.remove_user(user_id)
+        return count
     
-    def get_notes_by_tag(self, user_id: str, tag_name: str, page: int, items_per_page: int) -> tuple[int, list[Note]]:
-        return self.note_repo.get_notes_by_tag_name(user_id=user_id, tag_name=tag_name, page=page, items_per_page=items_per_page)
+    async def get_notes_by_tag(self, user_id: str, tag_name: str, page: int, items_per_page: int, after_id: str | None = None, fields: tuple[str, ...] | None = None) -> tuple[int | None, list[Note]]:
+        return await self.note_repo.get_notes_by_tag_name(user_id=user_id, tag_name=tag_name, page=page, items_per_page=items_per_page, after_id=after_id, fields=fields)
+
+    async def get_tags(self, user_id: str) -> list[UserTag]:
+        return await self.note_repo.get_tags(user_id)
+
+    async def search_notes(self, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None = None) -> list[SearchHit]:
+        return await self.note_repo.search(user_id, query, items_per_page, after)
@@ -0,0 +1,18 @@
+from celery import Task
+from note.domain.repository.note_repo import INoteRepository
+
+
+class SweepOrphanTagsTask(Task):
+    name = "sweep_orphan_tags_task"
+
+    def __init__(self, note_repo: INoteRepository):
+        self.note_repo = note_repo
+
+    def run(self, batch_size: int = 1000):
+        # One short transaction per batch keeps locks on Tag brief.
+        deleted = 0
+        while True:
+            count = self.note_repo.delete_orphan_tags(batch_size)
+            deleted += count
+            if count < batch_size:
+                return deleted
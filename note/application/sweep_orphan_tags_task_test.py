@@ -0,0 +1,12 @@
+from note.application.sweep_orphan_tags_task import SweepOrphanTagsTask
+from note.domain.repository.note_repo import INoteRepository
+
+
+def test_sweep_runs_batches_until_a_short_one(mocker):
+    note_repo_mock = mocker.Mock(spec=INoteRepository)
+    note_repo_mock.delete_orphan_tags.side_effect = [100, 100, 7]
+
+    deleted = SweepOrphanTagsTask(note_repo=note_repo_mock).run(batch_size=100)
+
+    assert deleted == 207
+    assert note_repo_mock.delete_orphan_tags.call_count == 3
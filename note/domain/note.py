@@ -10,6 +10,12 @@ class Tag:
     updated_at: datetime
 
 
+@dataclass
+class UserTag:
+    name: str
+    note_count: int
+
+
 @dataclass
 class Note:
     id: str
@@ -20,3 +26,10 @@ class Note:
     tags: list[Tag]
     created_at: datetime
     updated_at: datetime
+
+
+@dataclass
+class SearchHit:
+    note: Note
+    score: float
+    snippet: str
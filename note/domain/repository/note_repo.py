@@ -1,23 +1,50 @@
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Iterator
 
-from note.domain.note import Note
+from note.domain.note import Note, SearchHit, UserTag
 
 
 class INoteRepository(metaclass=ABCMeta):
     @abstractmethod
     def get_notes(
-        self, user_id: str, page: int, items_per_page: int
-    ) -> tuple[int, list[Note]]:
+        self,
+        user_id: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[Note]]:
         raise NotImplementedError
 
     @abstractmethod
     def find_by_id(self, user_id: str, id: str) -> Note:
         raise NotImplementedError
 
+    @abstractmethod
+    def find_by_ids(self, user_id: str, ids: list[str]) -> list[Note]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_notes(self, updated_after: datetime | None = None, batch_size: int = 1000) -> Iterator[Note]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_note_keys(self, batch_size: int = 10000) -> Iterator[tuple[str, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> Iterator[Note]:
+        raise NotImplementedError
+
     @abstractmethod
     def save(self, user_id: str, note: Note) -> Note:
         raise NotImplementedError
 
+    @abstractmethod
+    def save_many(self, user_id: str, notes: list[Note]):
+        raise NotImplementedError
+
     @abstractmethod
     def update(self, user_id: str, note: Note) -> Note:
         raise NotImplementedError
@@ -30,8 +57,104 @@ class INoteRepository(metaclass=ABCMeta):
     def delete_tags(self, user_id: str, id: str):
         raise NotImplementedError
 
+    @abstractmethod
+    def delete_user_notes(self, user_ids: list[str]) -> int:
+        """Deletes every note of ``user_ids`` with its tag links; returns how many notes went."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_orphan_tags(self, batch_size: int) -> int:
+        raise NotImplementedError
+
     @abstractmethod
     def get_notes_by_tag_name(
-        self, user_id: str, tag_name: str, page: int, items_per_page: int
-    ) -> tuple[int, list[Note]]:
+        self,
+        user_id: str,
+        tag_name: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[Note]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_tags(self, user_id: str) -> list[UserTag]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def search(
+        self, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None = None
+    ) -> list[SearchHit]:
+        raise NotImplementedError
+
+
+class IAsyncNoteRepository(metaclass=ABCMeta):
+    @abstractmethod
+    async def get_notes(
+        self,
+        user_id: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[Note]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_id(self, user_id: str, id: str) -> Note:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_ids(self, user_id: str, ids: list[str]) -> list[Note]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> AsyncIterator[Note]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, user_id: str, note: Note) -> Note:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save_many(self, user_id: str, notes: list[Note]):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user_id: str, note: Note) -> Note:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, user_id: str, id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_tags(self, user_id: str, id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_user_notes(self, user_ids: list[str]) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_notes_by_tag_name(
+        self,
+        user_id: str,
+        tag_name: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[Note]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_tags(self, user_id: str) -> list[UserTag]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search(
+        self, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None = None
+    ) -> list[SearchHit]:
         raise NotImplementedError
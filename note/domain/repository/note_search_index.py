@@ -0,0 +1,27 @@
+from abc import ABCMeta, abstractmethod
+
+from note.domain.note import Note
+
+
+class INoteSearchIndex(metaclass=ABCMeta):
+    """A search index kept up to date by NoteService as notes change."""
+
+    @abstractmethod
+    def add(self, note: Note):
+        """Indexes ``note``, replacing any earlier version of it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove(self, user_id: str, id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove_user(self, user_id: str):
+        """Drops every note of ``user_id``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def search(
+        self, user_id: str, query: str, limit: int, after: tuple[float, str] | None = None
+    ) -> list[tuple[float, str]]:
+        raise NotImplementedError
@@ -0,0 +1,14 @@
+from abc import ABCMeta, abstractmethod
+
+
+class INoteVersions(metaclass=ABCMeta):
+    """A per-user version that changes whenever any of the user's notes or tags change."""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> str | None:
+        """The user's version, or None when it can't be read and the cache must be bypassed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bump(self, user_id: str):
+        raise NotImplementedError
@@ -1,5 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, String, Table, Text
+from sqlalchemy import DDL, Column, DateTime, ForeignKey, Index, Integer, String, Table, Text, event
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -8,21 +9,51 @@ from database import Base
 note_tag_association = Table(
     "Note_Tag",
     Base.metadata,
-    Column("note_id", String(36), ForeignKey("Note.id")),
-    Column("tag_id", String(36), ForeignKey("Tag.id")),
+    Column("note_id", String(36), ForeignKey("Note.id"), primary_key=True),
+    Column("tag_id", String(36), ForeignKey("Tag.id"), primary_key=True),
+    # Reverse lookup for notes by tag, ordered by note id.
+    Index("ix_Note_Tag_tag_id_note_id", "tag_id", "note_id"),
     )
 
 class Note(Base):
     __tablename__ = "Note"
+    __table_args__ = (
+        # Serves both the user filter and the id ordering used by keyset pagination.
+        Index("ix_Note_user_id_id", "user_id", "id"),
+        Index("ix_Note_title_content_fulltext", "title", "content", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id = Column(String(36), primary_key=True)
-    user_id = Column(String(36), nullable=False, index=True)
+    user_id = Column(String(36), nullable=False)
     title = Column(String(64), nullable=False)
     content = Column(Text, nullable=False)
     memo_date = Column(String(8), nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.now)
-    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
-    tags = relationship("Tag", secondary=note_tag_association, back_populates="notes", lazy="joined")
+    # Microseconds on MySQL too: ETags are built from (id, updated_at), so two
+    # edits within a second must not share a timestamp.
+    updated_at = Column(
+        DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
+        nullable=False,
+        default=datetime.now,
+        onupdate=datetime.now,
+    )
+    tags = relationship("Tag", secondary=note_tag_association, back_populates="notes", lazy="selectin")
+
+# SQLite has no FULLTEXT index; an external-content FTS5 table kept in sync by
+# triggers stands in for it so search works against local databases.
+NOTE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE Note_fts USING fts5(title, content, content='Note', content_rowid='rowid')",
+    "CREATE TRIGGER Note_fts_insert AFTER INSERT ON Note BEGIN "
+    "INSERT INTO Note_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+    "CREATE TRIGGER Note_fts_delete AFTER DELETE ON Note BEGIN "
+    "INSERT INTO Note_fts(Note_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); END",
+    "CREATE TRIGGER Note_fts_update AFTER UPDATE ON Note BEGIN "
+    "INSERT INTO Note_fts(Note_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content); "
+    "INSERT INTO Note_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content); END",
+)
+for statement in NOTE_FTS_DDL:
+    event.listen(Note.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Note.__table__, "before_drop", DDL("DROP TABLE IF EXISTS Note_fts").execute_if(dialect="sqlite"))
 
 class Tag(Base):
     __tablename__ = "Tag"
@@ -31,4 +62,14 @@ class Tag(Base):
     name = Column(String(64), nullable=False, unique=True)
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
-    notes = relationship("Note", secondary=note_tag_association, back_populates="tags", lazy="joined")
+    notes = relationship("Note", secondary=note_tag_association, back_populates="tags")
+
+
+class UserTag(Base):
+    """How many of a user's notes carry a tag; maintained whenever notes are linked or unlinked."""
+
+    __tablename__ = "User_Tag"
+
+    user_id = Column(String(36), primary_key=True)
+    tag_id = Column(String(36), ForeignKey("Tag.id"), primary_key=True)
+    note_count = Column(Integer, nullable=False, default=0)
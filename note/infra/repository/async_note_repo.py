@@ -0,0 +1,135 @@
+from abc import abstractmethod
+from typing import AsyncIterator
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from database import AsyncSessionLocal
+from note.domain.note import Note as NoteVO, SearchHit, UserTag as UserTagVO
+from note.domain.repository.note_repo import IAsyncNoteRepository, INoteRepository
+from note.infra.repository.note_repo import NoteRepository, NoteRowGrouper, stream_notes_query
+from utils.db_utils import bind_session
+
+
+class NoteRepositoryAdapter(IAsyncNoteRepository):
+    """Exposes the ``NoteRepository`` queries through the async interface."""
+
+    @abstractmethod
+    async def _call(self, method: str, *args, **kwargs):
+        """Runs ``NoteRepository.<method>`` and returns its result."""
+        raise NotImplementedError
+
+    async def get_notes(
+        self,
+        user_id: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[NoteVO]]:
+        return await self._call("get_notes", user_id, page, items_per_page, after_id, fields)
+
+    async def find_by_id(self, user_id: str, id: str) -> NoteVO:
+        return await self._call("find_by_id", user_id, id)
+
+    async def find_by_ids(self, user_id: str, ids: list[str]) -> list[NoteVO]:
+        return await self._call("find_by_ids", user_id, ids)
+
+    async def save(self, user_id: str, note_vo: NoteVO):
+        return await self._call("save", user_id, note_vo)
+
+    async def save_many(self, user_id: str, note_vos: list[NoteVO]):
+        return await self._call("save_many", user_id, note_vos)
+
+    async def update(self, user_id: str, note_vo: NoteVO) -> NoteVO:
+        return await self._call("update", user_id, note_vo)
+
+    async def delete(self, user_id: str, id: str):
+        return await self._call("delete", user_id, id)
+
+    async def delete_tags(self, user_id: str, id: str):
+        return await self._call("delete_tags", user_id, id)
+
+    async def delete_user_notes(self, user_ids: list[str]) -> int:
+        return await self._call("delete_user_notes", user_ids)
+
+    async def get_notes_by_tag_name(
+        self,
+        user_id: str,
+        tag_name: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[NoteVO]]:
+        return await self._call("get_notes_by_tag_name", user_id, tag_name, page, items_per_page, after_id, fields)
+
+    async def get_tags(self, user_id: str) -> list[UserTagVO]:
+        return await self._call("get_tags", user_id)
+
+    async def search(
+        self, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None = None
+    ) -> list[SearchHit]:
+        return await self._call("search", user_id, query, items_per_page, after)
+
+
+class AsyncNoteRepository(NoteRepositoryAdapter):
+    """Runs the repository on the async engine.
+
+    The ORM code is shared with ``NoteRepository`` through ``run_sync``, which
+    drives the blocking session API over the async driver without a thread.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        session: AsyncSession | None = None,
+        collect_orphan_tags: bool = True,
+    ):
+        self.session_factory = session_factory
+        # The request's unit of work, if any; otherwise each call gets its own transaction.
+        self.session = session
+        self.collect_orphan_tags = collect_orphan_tags
+
+    async def _call(self, method: str, *args, **kwargs):
+        if self.session is not None:
+            return await self.session.run_sync(self._run, method, *args, **kwargs)
+        async with self.session_factory.begin() as session:
+            return await session.run_sync(self._run, method, *args, **kwargs)
+
+    def _run(self, sync_session: Session, method: str, *args, **kwargs):
+        note_repo = NoteRepository(bind_session(sync_session), collect_orphan_tags=self.collect_orphan_tags)
+        return getattr(note_repo, method)(*args, **kwargs)
+
+    async def stream_notes(self, user_id: str, batch_size: int = 1000) -> AsyncIterator[NoteVO]:
+        # Always a session of its own: the response is still streaming after
+        # the request's unit of work has ended.
+        async with self.session_factory() as session:
+            result = await session.stream(stream_notes_query(user_id).execution_options(yield_per=batch_size))
+            rows = NoteRowGrouper()
+            async for partition in result.partitions():
+                for note_vo in rows.feed(partition):
+                    yield note_vo
+            for note_vo in rows.finish():
+                yield note_vo
+
+
+class ThreadedNoteRepository(NoteRepositoryAdapter):
+    """Runs a blocking repository in Starlette's threadpool."""
+
+    def __init__(self, note_repo: INoteRepository, session: Session | None = None, collect_orphan_tags: bool = True):
+        self.note_repo = note_repo
+        # The request's unit of work (``database.sync_session_scope``), if any;
+        # otherwise each call gets ``note_repo``'s own transaction.
+        self.session = session
+        self.collect_orphan_tags = collect_orphan_tags
+
+    async def _call(self, method: str, *args, **kwargs):
+        note_repo = self.note_repo
+        if self.session is not None:
+            note_repo = NoteRepository(bind_session(self.session), collect_orphan_tags=self.collect_orphan_tags)
+        return await run_in_threadpool(getattr(note_repo, method), *args, **kwargs)
+
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> AsyncIterator[NoteVO]:
+        # ``note_repo``'s own session, as in ``AsyncNoteRepository.stream_notes``.
+        return iterate_in_threadpool(self.note_repo.stream_notes(user_id, batch_size))
@@ -0,0 +1,244 @@
+import asyncio
+import dataclasses
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from common.logger import logger
+from common.metrics import cache_requests
+from note.domain.note import Note as NoteVO, UserTag as UserTagVO
+from note.domain.repository.note_repo import IAsyncNoteRepository
+from note.domain.repository.note_versions import INoteVersions
+from note.infra.repository.async_note_repo import NoteRepositoryAdapter
+from utils.cache import LocalCache
+from utils.db_utils import after_transaction_on_loop
+
+# Rough per-object overheads, in bytes, for the memory limit.
+NOTE_OVERHEAD = 600
+TAG_OVERHEAD = 300
+
+
+class LocalNoteVersions(INoteVersions):
+    """Versions kept in this process.
+
+    They start with a random epoch, so versions (and the ETags built from
+    them) from another process or an earlier run never match this one's.
+    Writes made through other processes aren't seen, so versions also roll
+    over every ``period`` seconds, which bounds how stale they can be.
+
+    Counters are only needed until their period ends, so they live in an
+    LRU of ``maxsize`` users that expires them after ``period`` seconds. A
+    counter evicted early goes back to 0, which is stale by the same bound.
+    """
+
+    def __init__(self, period: float = 5, maxsize: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.epoch = os.urandom(4).hex()
+        self.period = period
+        self.clock = clock
+        self._versions: LocalCache[int] = LocalCache(maxsize=maxsize, ttl=period, clock=clock)
+
+    async def get(self, user_id: str) -> str:
+        return f"{self.epoch}.{int(self.clock() // self.period)}.{self._versions.get(user_id) or 0}"
+
+    async def bump(self, user_id: str):
+        self._versions.set(user_id, (self._versions.get(user_id) or 0) + 1)
+
+
+class RedisNoteVersions(INoteVersions):
+    """Versions shared by every process through Redis counters.
+
+    Errors are logged, as in ``RedisCache``: reads then bypass the cache,
+    and a lost bump leaves entries cached under the old version until
+    their ttl.
+    """
+
+    def __init__(self, client: Any, prefix: str = "note_version:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, user_id: str) -> str | None:
+        try:
+            version = await self.client.get(self.prefix + user_id)
+        except Exception:
+            logger.warning("Note version read failed", exc_info=True)
+            return None
+        return version.decode() if isinstance(version, bytes) else (version or "0")
+
+    async def bump(self, user_id: str):
+        try:
+            await self.client.incr(self.prefix + user_id)
+        except Exception:
+            logger.warning("Note cache invalidation failed", exc_info=True)
+
+
+def note_size(value: Any) -> int:
+    """Estimated memory held by a cached repository result."""
+    if isinstance(value, NoteVO):
+        # Fields left out by a projection are None.
+        return NOTE_OVERHEAD + len(value.title or "") + len(value.content or "") + TAG_OVERHEAD * len(value.tags or ())
+    if isinstance(value, UserTagVO):
+        return TAG_OVERHEAD
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(note_size(item) for item in value)
+    return 64
+
+
+def copy_result(value: Any) -> Any:
+    # Services modify the notes they load, so never hand out cached instances.
+    if isinstance(value, NoteVO):
+        return dataclasses.replace(value, tags=list(value.tags) if value.tags is not None else None)
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(copy_result(item) for item in value)
+    return value
+
+
+class NoteCache:
+    """Repository results keyed by ``(user_id, version, method, args)``.
+
+    Bumping a user's version makes all of their entries unreachable at once;
+    they are evicted as the memory-limited LRU fills. Concurrent misses on
+    the same key share one load.
+    """
+
+    def __init__(self, local: LocalCache, versions: INoteVersions):
+        self.local = local
+        self.versions = versions
+        self._loading: dict[tuple, asyncio.Future] = {}
+        self._pending: set[asyncio.Task] = set()
+
+    async def get_or_load(self, user_id: str, key: tuple, load: Callable[[], Awaitable[Any]]) -> Any:
+        version = await self.versions.get(user_id)
+        if version is None:
+            cache_requests.labels("note", "local", "bypass").inc()
+            return await load()
+        key = (user_id, version, *key)
+        value = self.local.get(key)
+        if value is not None:
+            cache_requests.labels("note", "local", "hit").inc()
+            return copy_result(value)
+        cache_requests.labels("note", "local", "miss").inc()
+
+        loading = self._loading.get(key)
+        if loading is not None:
+            try:
+                return copy_result(await asyncio.shield(loading))
+            except asyncio.CancelledError:
+                # The request doing the load was cancelled, not this one.
+                if not loading.cancelled() or asyncio.current_task().cancelling():  # type: ignore
+                    raise
+                return await load()
+
+        loading = self._loading[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await load()
+        except Exception as e:
+            loading.set_exception(e)
+            # Only retrieved if another request was waiting for this load.
+            loading.exception()
+            raise
+        except BaseException:
+            loading.cancel()
+            raise
+        else:
+            loading.set_result(value)
+            self.local.set(key, value)
+        finally:
+            del self._loading[key]
+        return copy_result(value)
+
+    async def invalidate(self, user_id: str):
+        await self.versions.bump(user_id)
+
+    def invalidate_soon(self, user_id: str):
+        """``invalidate`` from synchronous code running on the event loop."""
+        task = asyncio.get_running_loop().create_task(self.versions.bump(user_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+class CachedNoteRepository(NoteRepositoryAdapter):
+    """Serves note and tag reads from a ``NoteCache``; writes bump the user's version.
+
+    The version is bumped when a write is issued and again when ``session``'s
+    transaction ends, so neither a read racing an uncommitted write nor one
+    made inside a transaction that rolls back stays cached.
+    """
+
+    def __init__(self, note_repo: IAsyncNoteRepository, cache: NoteCache, session: AsyncSession | Session | None = None):
+        self.note_repo = note_repo
+        self.cache = cache
+        self.session = session
+
+    async def _call(self, method: str, *args, **kwargs):
+        return await getattr(self.note_repo, method)(*args, **kwargs)
+
+    async def _cached(self, method: str, user_id: str, *args):
+        return await self.cache.get_or_load(user_id, (method, *args), lambda: self._call(method, user_id, *args))
+
+    async def _write(self, method: str, user_id: str, *args):
+        result = await self._call(method, user_id, *args)
+        await self._invalidate(user_id)
+        return result
+
+    async def _invalidate(self, user_id: str):
+        await self.cache.invalidate(user_id)
+        if self.session is not None:
+            after_transaction_on_loop(self.session, lambda: self.cache.invalidate_soon(user_id))
+
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> AsyncIterator[NoteVO]:
+        return self.note_repo.stream_notes(user_id, batch_size)
+
+    async def get_notes(
+        self,
+        user_id: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ):
+        return await self._cached("get_notes", user_id, page, items_per_page, after_id, fields)
+
+    async def find_by_id(self, user_id: str, id: str) -> NoteVO:
+        return await self._cached("find_by_id", user_id, id)
+
+    async def get_notes_by_tag_name(
+        self,
+        user_id: str,
+        tag_name: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ):
+        return await self._cached(
+            "get_notes_by_tag_name", user_id, tag_name, page, items_per_page, after_id, fields
+        )
+
+    async def get_tags(self, user_id: str) -> list[UserTagVO]:
+        return await self._cached("get_tags", user_id)
+
+    async def save(self, user_id: str, note_vo: NoteVO):
+        return await self._write("save", user_id, note_vo)
+
+    async def save_many(self, user_id: str, note_vos: list[NoteVO]):
+        return await self._write("save_many", user_id, note_vos)
+
+    async def update(self, user_id: str, note_vo: NoteVO) -> NoteVO:
+        return await self._write("update", user_id, note_vo)
+
+    async def delete(self, user_id: str, id: str):
+        return await self._write("delete", user_id, id)
+
+    async def delete_tags(self, user_id: str, id: str):
+        return await self._write("delete_tags", user_id, id)
+
+    async def delete_user_notes(self, user_ids: list[str]) -> int:
+        result = await self._call("delete_user_notes", user_ids)
+        for user_id in user_ids:
+            await self._invalidate(user_id)
+        return result
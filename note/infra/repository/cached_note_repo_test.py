@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from note.domain.note import Note, Tag
+from note.infra.repository.cached_note_repo import (
+    CachedNoteRepository,
+    LocalNoteVersions,
+    NoteCache,
+    RedisNoteVersions,
+    note_size,
+)
+from utils.cache import LocalCache
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_note(title: str = "title") -> Note:
+    tag = Tag(id="TAG_ID", name="tag", created_at=NOW, updated_at=NOW)
+    return Note(
+        id="NOTE_ID",
+        user_id="USER_ID",
+        title=title,
+        content="content",
+        memo_date="20240101",
+        tags=[tag],
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def make_repo(note_repo, session=None) -> CachedNoteRepository:
+    cache = NoteCache(LocalCache(maxbytes=1 << 20, sizeof=note_size), LocalNoteVersions(period=3600))
+    return CachedNoteRepository(note_repo, cache, session=session)
+
+
+def test_reads_are_cached_until_a_write(mocker):
+    note_repo = mocker.AsyncMock()
+    note_repo.get_notes.side_effect = [(1, [make_note()]), (1, [make_note("renamed")]), (0, [])]
+    note_repo.find_by_id.return_value = make_note()
+    repo = make_repo(note_repo)
+
+    async def run():
+        _, notes = await repo.get_notes("USER_ID", 1, 10)
+        notes[0].title = "changed by a caller"
+        assert (await repo.get_notes("USER_ID", 1, 10))[1][0].title == "title"
+        await repo.find_by_id("USER_ID", "NOTE_ID")
+        await repo.update("USER_ID", make_note("renamed"))
+        assert (await repo.get_notes("USER_ID", 1, 10))[1][0].title == "renamed"
+        await repo.get_notes("OTHER_USER_ID", 1, 10)
+
+    asyncio.run(run())
+
+    assert note_repo.get_notes.call_count == 3
+    note_repo.find_by_id.assert_called_once_with("USER_ID", "NOTE_ID")
+
+
+def test_concurrent_misses_share_one_load(mocker):
+    loads = 0
+
+    async def get_notes(user_id, page, items_per_page, after_id, fields):
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return 1, [make_note()]
+
+    note_repo = mocker.AsyncMock()
+    note_repo.get_notes.side_effect = get_notes
+    repo = make_repo(note_repo)
+
+    async def run():
+        return await asyncio.gather(*(repo.get_notes("USER_ID", 1, 10) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert loads == 1
+    assert all(result == (1, [make_note()]) for result in results)
+    assert len({id(result[1][0]) for result in results}) == 5
+
+
+def test_rolled_back_writes_invalidate_again(mocker):
+    note_repo = mocker.AsyncMock()
+    note_repo.get_tags.return_value = []
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with AsyncSession(engine) as session:
+            repo = make_repo(note_repo, session=session)
+            await session.begin()
+            await repo.delete("USER_ID", "NOTE_ID")
+            # Read inside the transaction, which then rolls back.
+            await repo.get_tags("USER_ID")
+            await session.rollback()
+            await asyncio.sleep(0)
+            await repo.get_tags("USER_ID")
+        await engine.dispose()
+
+    asyncio.run(run())
+
+    assert note_repo.get_tags.call_count == 2
+
+
+def test_local_versions_roll_over():
+    now = [0.0]
+    versions = LocalNoteVersions(period=5, clock=lambda: now[0])
+
+    async def run():
+        first = await versions.get("USER_ID")
+        now[0] = 4
+        assert await versions.get("USER_ID") == first
+        now[0] = 5
+        assert await versions.get("USER_ID") != first
+
+    asyncio.run(run())
+
+
+def test_local_versions_keep_a_bounded_number_of_users():
+    versions = LocalNoteVersions(period=5, maxsize=2)
+
+    async def run():
+        for user_id in ("A", "B", "C"):
+            await versions.bump(user_id)
+        return [await versions.get(user_id) for user_id in ("A", "B", "C")]
+
+    a, b, c = asyncio.run(run())
+    assert len(versions._versions) == 2
+    assert (a.endswith(".0"), b.endswith(".1"), c.endswith(".1")) == (True, True, True)
+
+
+def test_unavailable_redis_versions_bypass_the_cache(mocker):
+    client = mocker.AsyncMock()
+    client.get.side_effect = ConnectionError("redis down")
+    client.incr.side_effect = ConnectionError("redis down")
+    note_repo = mocker.AsyncMock()
+    note_repo.get_tags.return_value = []
+    repo = CachedNoteRepository(note_repo, NoteCache(LocalCache(), RedisNoteVersions(client)))
+
+    async def run():
+        await repo.get_tags("USER_ID")
+        await repo.delete("USER_ID", "NOTE_ID")
+        await repo.get_tags("USER_ID")
+
+    asyncio.run(run())
+
+    assert note_repo.get_tags.call_count == 2
+    note_repo.delete.assert_awaited_once_with("USER_ID", "NOTE_ID")
@@ -0,0 +1,40 @@
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from note.domain.note import Note as NoteVO, SearchHit
+from note.domain.repository.note_repo import IAsyncNoteRepository
+from note.domain.repository.note_search_index import INoteSearchIndex
+from note.infra.repository.async_note_repo import NoteRepositoryAdapter
+from note.infra.search.snippet import make_snippet, query_terms
+
+
+class IndexedNoteRepository(NoteRepositoryAdapter):
+    """Answers ``search`` from a search index and everything else from ``note_repo``.
+
+    The index only ranks note ids; the notes themselves are loaded in one
+    batched query, so hits for notes deleted by another worker are dropped.
+    Ranking is CPU-bound and holds the index lock, so it runs in the threadpool.
+    """
+
+    def __init__(self, note_repo: IAsyncNoteRepository, note_index: INoteSearchIndex):
+        self.note_repo = note_repo
+        self.note_index = note_index
+
+    async def _call(self, method: str, *args, **kwargs):
+        return await getattr(self.note_repo, method)(*args, **kwargs)
+
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> AsyncIterator[NoteVO]:
+        return self.note_repo.stream_notes(user_id, batch_size)
+
+    async def search(
+        self, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None = None
+    ) -> list[SearchHit]:
+        ranked = await run_in_threadpool(self.note_index.search, user_id, query, items_per_page, after)
+        notes = {note.id: note for note in await self.note_repo.find_by_ids(user_id, [id for _, id in ranked])}
+        terms = query_terms(query)
+        return [
+            SearchHit(note=notes[id], score=score, snippet=make_snippet(notes[id].content, terms))
+            for score, id in ranked
+            if id in notes
+        ]
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+from datetime import datetime
+
+from note.domain.note import Note
+from note.infra.repository.indexed_note_repo import IndexedNoteRepository
+from note.infra.search.inverted_index import InvertedIndex
+
+
+def make_note(id: str, content: str) -> Note:
+    now = datetime(2021, 1, 1)
+    return Note(
+        id=id,
+        user_id="USER_ID",
+        title="title",
+        content=content,
+        memo_date="20210101",
+        tags=[],
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def test_search_ranks_off_the_event_loop_and_drops_deleted_notes(mocker):
+    index = InvertedIndex()
+    index.add(make_note("NOTE_1", "bread bread"))
+    index.add(make_note("NOTE_2", "bread"))
+    threads = []
+    search = index.search
+    mocker.patch.object(
+        index, "search", side_effect=lambda *args: threads.append(threading.get_ident()) or search(*args)
+    )
+    note_repo = mocker.AsyncMock()
+    # NOTE_2 was deleted by another worker.
+    note_repo.find_by_ids.return_value = [make_note("NOTE_1", "bread bread")]
+    repo = IndexedNoteRepository(note_repo, index)
+
+    async def run():
+        return threading.get_ident(), await repo.search("USER_ID", "bread", 10)
+
+    loop_thread, hits = asyncio.run(run())
+
+    assert [hit.note.id for hit in hits] == ["NOTE_1"]
+    assert threads and threads[0] != loop_thread
+    note_repo.find_by_ids.assert_called_once_with("USER_ID", ["NOTE_1", "NOTE_2"])
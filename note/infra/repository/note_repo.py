@@ -1,110 +1,478 @@
-
-
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Callable, ContextManager, Iterable, Iterator
 from fastapi import HTTPException
+from common.metrics import repository_call_duration, timed_methods
 from database import SessionLocal
-from note.domain.note import Note as NoteVO
-from note.infra.db_models.note import Note, Tag
+from note.domain.note import Note as NoteVO, SearchHit, Tag as TagVO, UserTag as UserTagVO
+from note.infra.db_models.note import Note, Tag, UserTag, note_tag_association
+from note.infra.search.snippet import ELLIPSIS, MARK_END, MARK_START, make_snippet, query_terms
 from note.domain.repository.note_repo import INoteRepository
-from sqlalchemy.orm import joinedload
+from sqlalchemy import Float, Select, String, and_, column, delete, exists, insert, or_, select, text, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from utils.db_utils import insert_ignore_duplicates, insert_or_update, paginate
+
+# Listing selects plain columns so rows skip the identity map, and tags are
+# fetched in one batched IN query instead of a Note x Tag join under LIMIT.
+NOTE_COLUMNS = (
+    Note.id,
+    Note.user_id,
+    Note.title,
+    Note.content,
+    Note.memo_date,
+    Note.created_at,
+    Note.updated_at,
+)
+TAG_COLUMNS = (Tag.id, Tag.name, Tag.created_at, Tag.updated_at)
+# Loaded whatever the projection: the id keys tags and cursors, and
+# updated_at is what ETags are built from.
+KEY_COLUMNS = ("id", "updated_at")
+UNLOADED = {column.key: None for column in NOTE_COLUMNS}
+
+
+def note_columns(fields: tuple[str, ...] | None) -> tuple:
+    """The ``NOTE_COLUMNS`` needed for ``fields``; all of them when ``fields`` is None."""
+    if fields is None:
+        return NOTE_COLUMNS
+    return tuple(column for column in NOTE_COLUMNS if column.key in fields or column.key in KEY_COLUMNS)
+
+
+def stream_notes_query(user_id: str) -> Select:
+    """The user's notes outer-joined with their tags, one row per (note, tag), in note id order."""
+    return (
+        select(*NOTE_COLUMNS, *(column.label(f"tag_{column.key}") for column in TAG_COLUMNS))
+        .outerjoin(note_tag_association, note_tag_association.c.note_id == Note.id)
+        .outerjoin(Tag, Tag.id == note_tag_association.c.tag_id)
+        .where(Note.user_id == user_id)
+        .order_by(Note.id)
+    )
+
+
+class NoteRowGrouper:
+    """Folds the rows of ``stream_notes_query`` into notes as they arrive.
+
+    A note's rows may straddle two batches, so the last note of each batch is
+    held back until a row of the next note (or ``finish``) shows it is complete.
+    """
+
+    def __init__(self):
+        self.pending: NoteVO | None = None
 
-from utils.db_utils import row_to_dict
+    def feed(self, rows: Iterable) -> list[NoteVO]:
+        done = []
+        for row in rows:
+            if self.pending is None or self.pending.id != row.id:
+                if self.pending is not None:
+                    done.append(self.pending)
+                self.pending = NoteVO(
+                    id=row.id,
+                    user_id=row.user_id,
+                    title=row.title,
+                    content=row.content,
+                    memo_date=row.memo_date,
+                    tags=[],
+                    created_at=row.created_at,
+                    updated_at=row.updated_at,
+                )
+            if row.tag_id is not None:
+                self.pending.tags.append(TagVO(row.tag_id, row.tag_name, row.tag_created_at, row.tag_updated_at))
+        return done
 
+    def finish(self) -> list[NoteVO]:
+        done = [self.pending] if self.pending is not None else []
+        self.pending = None
+        return done
 
+
+@timed_methods(repository_call_duration, "NoteRepository")
 class NoteRepository(INoteRepository):
-    def get_notes(self, user_id: str, page: int, items_per_page: int) -> tuple[int, list[NoteVO]]:
-        with SessionLocal() as session:
-           query = session.query(Note).options(joinedload(Note.tags)).filter(Note.user_id == user_id)
-           total_count = query.count()
-           notes = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
-        note_vos = [NoteVO(**row_to_dict(note)) for note in notes]
-        return total_count, note_vos
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]] | None = None,
+        collect_orphan_tags: bool = True,
+    ):
+        # Each call runs in its own transaction unless a shared session is bound.
+        self.session_factory = session_factory or SessionLocal.begin
+        # When False, tags left without notes are reclaimed by SweepOrphanTagsTask instead.
+        self.collect_orphan_tags = collect_orphan_tags
+
+    def get_notes(
+        self,
+        user_id: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[NoteVO]]:
+        """A page of the user's notes; with ``fields``, only those columns (and tags) are loaded."""
+        with self.session_factory() as session:
+            query = session.query(*note_columns(fields)).filter(Note.user_id == user_id)
+            total_count, rows = paginate(query, Note.id, page, items_per_page, after_id)
+            return total_count, self._to_note_vos(session, rows, fields)
 
     def find_by_id(self, user_id: str, id: str) -> NoteVO:
-        with SessionLocal() as session:
-            note = session.query(Note).options(joinedload(Note.tags)).filter(Note.user_id == user_id, Note.id == id).first()
-        if not note:
-            raise HTTPException(status_code=404, detail="Note not found")
-        return NoteVO(**row_to_dict(note))
+        with self.session_factory() as session:
+            row = session.query(*NOTE_COLUMNS).filter(Note.user_id == user_id, Note.id == id).first()
+            if not row:
+                raise HTTPException(status_code=404, detail="Note not found")
+            return self._to_note_vos(session, [row])[0]
+
+    def find_by_ids(self, user_id: str, ids: list[str]) -> list[NoteVO]:
+        """The user's notes among ``ids``, in no particular order; unknown ids are skipped."""
+        if not ids:
+            return []
+        with self.session_factory() as session:
+            rows = session.query(*NOTE_COLUMNS).filter(Note.user_id == user_id, Note.id.in_(ids))
+            return self._to_note_vos(session, rows)
+
+    def iter_notes(self, updated_after: datetime | None = None, batch_size: int = 1000) -> Iterator[NoteVO]:
+        """Every user's notes, optionally only those updated after ``updated_after``, in id order."""
+        with self.session_factory() as session:
+            query = session.query(*NOTE_COLUMNS)
+            if updated_after is not None:
+                query = query.filter(Note.updated_at > updated_after)
+            rows = query.order_by(Note.id).limit(batch_size).all()
+            while rows:
+                yield from self._to_note_vos(session, rows)
+                if len(rows) < batch_size:
+                    return
+                rows = query.filter(Note.id > rows[-1].id).order_by(Note.id).limit(batch_size).all()
+
+    def iter_note_keys(self, batch_size: int = 10000) -> Iterator[tuple[str, str]]:
+        """(user id, note id) of every note, in id order."""
+        with self.session_factory() as session:
+            query = session.query(Note.user_id, Note.id)
+            rows = query.order_by(Note.id).limit(batch_size).all()
+            while rows:
+                yield from ((row.user_id, row.id) for row in rows)
+                if len(rows) < batch_size:
+                    return
+                rows = query.filter(Note.id > rows[-1].id).order_by(Note.id).limit(batch_size).all()
+
+    def stream_notes(self, user_id: str, batch_size: int = 1000) -> Iterator[NoteVO]:
+        """All of the user's notes in id order, read through a server-side cursor.
+
+        Notes and their tags come from one outer-joined query, so memory stays
+        bounded by ``batch_size`` rows however many notes the user has.
+        """
+        with self.session_factory() as session:
+            result = session.execute(stream_notes_query(user_id).execution_options(yield_per=batch_size))
+            rows = NoteRowGrouper()
+            for partition in result.partitions():
+                yield from rows.feed(partition)
+            yield from rows.finish()
+
+    def _to_note_vos(self, session: Session, rows: Iterable, fields: tuple[str, ...] | None = None) -> list[NoteVO]:
+        rows = list(rows)
+        if fields is not None:
+            return self._to_partial_note_vos(session, rows, fields)
+        tags = self._find_tags(session, [row.id for row in rows])
+        return [
+            NoteVO(
+                id=row.id,
+                user_id=row.user_id,
+                title=row.title,
+                content=row.content,
+                memo_date=row.memo_date,
+                tags=tags[row.id],
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+            for row in rows
+        ]
+
+    def _to_partial_note_vos(self, session: Session, rows: list, fields: tuple[str, ...]) -> list[NoteVO]:
+        """Notes with only ``fields`` (and the key columns) loaded; the rest are None."""
+        tags = self._find_tags(session, [row.id for row in rows]) if "tags" in fields else None
+        return [
+            NoteVO(**(UNLOADED | row._asdict()), tags=tags[row.id] if tags is not None else None)  # type: ignore
+            for row in rows
+        ]
+
+    def _find_tags(self, session: Session, note_ids: list[str]) -> defaultdict[str, list[TagVO]]:
+        tags: defaultdict[str, list[TagVO]] = defaultdict(list)
+        if not note_ids:
+            return tags
+        rows = session.execute(
+            select(note_tag_association.c.note_id, *TAG_COLUMNS)
+            .join(Tag, Tag.id == note_tag_association.c.tag_id)
+            .where(note_tag_association.c.note_id.in_(note_ids))
+        )
+        for note_id, *tag in rows:
+            tags[note_id].append(TagVO(*tag))
+        return tags
 
     def save(self, user_id: str, note_vo: NoteVO):
-        with SessionLocal() as session:
-            tags: list[Tag] = []
-            for tag in note_vo.tags:
-                existing_tag = session.query(Tag).filter(Tag.name == tag).first()
-                if existing_tag:
-                    tags.append(existing_tag)
-                else:
-                    tags.append(Tag(id=tag.id, name=tag.name, created_at=tag.created_at, updated_at=tag.updated_at))
-            new_note = Note(
-                id=note_vo.id,
-                user_id=user_id,
-                title=note_vo.title,
-                content=note_vo.content,
-                memo_date=note_vo.memo_date,
-                created_at=note_vo.created_at,
-                updated_at=note_vo.updated_at,
-                tags=tags
+        self.save_many(user_id, [note_vo])
+
+    def save_many(self, user_id: str, note_vos: list[NoteVO]):
+        """Inserts ``note_vos`` with multi-row INSERTs; the statement count does not grow with the batch."""
+        if not note_vos:
+            return
+        with self.session_factory() as session:
+            session.execute(
+                insert(Note.__table__),  # type: ignore
+                [
+                    {
+                        "id": note_vo.id,
+                        "user_id": user_id,
+                        "title": note_vo.title,
+                        "content": note_vo.content,
+                        "memo_date": note_vo.memo_date,
+                        "created_at": note_vo.created_at,
+                        "updated_at": note_vo.updated_at,
+                    }
+                    for note_vo in note_vos
+                ],
+            )
+            tag_ids = self._resolve_tag_ids(session, [tag for note_vo in note_vos for tag in note_vo.tags])
+            self._link_tags(
+                session,
+                user_id,
+                [
+                    (note_vo.id, tag_ids[name])
+                    for note_vo in note_vos
+                    for name in dict.fromkeys(tag.name for tag in note_vo.tags)
+                ],
             )
-            session.add(new_note)
-            session.commit()
-                
 
     def update(self, user_id: str, note_vo: NoteVO) -> NoteVO:
-        with SessionLocal() as session:
-            self.delete_tags(user_id, note_vo.id)
+        with self.session_factory() as session:
             note = session.query(Note).filter(Note.user_id == user_id, Note.id == note_vo.id).first()
             if not note:
                 raise HTTPException(status_code=404, detail="Note not found")
             note.title = note_vo.title # type: ignore
             note.content = note_vo.content # type: ignore
             note.memo_date = note_vo.memo_date # type: ignore
-            tags: list[Tag] = []
-            for tag in note_vo.tags:
-                existing_tag = session.query(Tag).filter(Tag.name == tag).first()
-                if existing_tag:
-                    tags.append(existing_tag)
-                else:
-                    tags.append(Tag(id=tag.id, name=tag.name, created_at=tag.created_at, updated_at=tag.updated_at))
-            note.tags = tags
+            note.updated_at = note_vo.updated_at # type: ignore
             session.add(note)
-            session.commit()
+            session.flush()
+            tag_ids = list(self._resolve_tag_ids(session, note_vo.tags).values())
+            self._delete_orphan_tags(session, self._replace_tags(session, user_id, note_vo.id, tag_ids))
+            session.expire(note, ["tags"])
+
+            return self._to_note_vos(session, [note])[0]
+
+
+    def _resolve_tag_ids(self, session: Session, tags: list[TagVO]) -> dict[str, str]:
+        """Ids of ``tags`` keyed by name, creating the missing ones.
+
+        Costs one SELECT, plus one multi-row INSERT and one SELECT when some
+        names are new, however many tags there are.
+        """
+        tags_by_name = {tag.name: tag for tag in tags}
+        if not tags_by_name:
+            return {}
+        ids = dict(session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(tags_by_name))).all())
+        missing = [tag for name, tag in tags_by_name.items() if name not in ids]
+        if missing:
+            session.execute(
+                insert_ignore_duplicates(session, Tag.__table__),  # type: ignore
+                [
+                    {"id": tag.id, "name": tag.name, "created_at": tag.created_at, "updated_at": tag.updated_at}
+                    for tag in missing
+                ],
+            )
+            # Re-read so names inserted concurrently by another note resolve to the stored id.
+            ids.update(session.execute(select(Tag.name, Tag.id).where(Tag.name.in_([tag.name for tag in missing]))).all())
+        return {name: ids[name] for name in tags_by_name}
+
+    def _link_tags(self, session: Session, user_id: str, links: list[tuple[str, str]]):
+        """Inserts the (note id, tag id) ``links`` and adds them to the user's tag counts."""
+        if not links:
+            return
+        session.execute(
+            insert(note_tag_association),
+            [{"note_id": note_id, "tag_id": tag_id} for note_id, tag_id in links],
+        )
+        session.execute(
+            insert_or_update(session, UserTag.__table__, lambda new: {"note_count": UserTag.note_count + new.note_count}),  # type: ignore
+            [
+                {"user_id": user_id, "tag_id": tag_id, "note_count": count}
+                for tag_id, count in Counter(tag_id for _, tag_id in links).items()
+            ],
+        )
+
+    def _unlink_tags(self, session: Session, user_id: str, note_id: str, tag_ids: list[str]):
+        if not tag_ids:
+            return
+        session.execute(
+            delete(note_tag_association).where(
+                note_tag_association.c.note_id == note_id,
+                note_tag_association.c.tag_id.in_(tag_ids),
+            )
+        )
+        user_tags = (UserTag.user_id == user_id, UserTag.tag_id.in_(tag_ids))
+        session.execute(update(UserTag).where(*user_tags).values(note_count=UserTag.note_count - 1))
+        session.execute(delete(UserTag).where(*user_tags, UserTag.note_count <= 0))
 
-        return NoteVO(**row_to_dict(note))
+    def _replace_tags(self, session: Session, user_id: str, note_id: str, tag_ids: list[str]) -> list[str]:
+        """Links the note to exactly ``tag_ids`` and returns the ids of the tags it lost."""
+        linked_ids = set(
+            session.scalars(
+                select(note_tag_association.c.tag_id).where(note_tag_association.c.note_id == note_id)
+            )
+        )
+        lost_ids = list(linked_ids.difference(tag_ids))
+        self._unlink_tags(session, user_id, note_id, lost_ids)
+        self._link_tags(session, user_id, [(note_id, tag_id) for tag_id in tag_ids if tag_id not in linked_ids])
+        return lost_ids
 
+    def _delete_orphan_tags(self, session: Session, tag_ids: list[str], force: bool = False) -> int:
+        """Deletes those of ``tag_ids`` that no note uses any more, in one statement."""
+        if not tag_ids or not (force or self.collect_orphan_tags):
+            return 0
+        result = session.execute(
+            delete(Tag.__table__).where(  # type: ignore
+                Tag.id.in_(tag_ids),
+                ~exists().where(note_tag_association.c.tag_id == Tag.id),
+            )
+        )
+        return result.rowcount  # type: ignore
 
     def delete(self, user_id: str, id: str):
-        with SessionLocal() as session:
-            note = session.query(Note).filter(Note.user_id == user_id, Note.id == id).first()
+        with self.session_factory() as session:
+            note = session.query(Note.id).filter(Note.user_id == user_id, Note.id == id).first()
             if not note:
                 raise HTTPException(status_code=404, detail="Note not found")
-            session.delete(note)
-            session.commit()
+            self._delete_tags(session, user_id, id)
+            session.query(Note).filter(Note.id == id).delete(synchronize_session=False)
 
 
     def delete_tags(self, user_id: str, id: str):
-        with SessionLocal() as session:
-            note = session.query(Note).filter(Note.user_id == user_id, Note.id == id).first()
+        with self.session_factory() as session:
+            note = session.query(Note.id).filter(Note.user_id == user_id, Note.id == id).first()
             if not note:
                 raise HTTPException(status_code=404, detail="Note not found")
-            note.tags = []
-            session.add(note)
-            session.commit()
+            self._delete_tags(session, user_id, id)
+
+    def _delete_tags(self, session: Session, user_id: str, note_id: str):
+        self._delete_orphan_tags(session, self._replace_tags(session, user_id, note_id, []))
+
+    def delete_user_notes(self, user_ids: list[str]) -> int:
+        """Deletes the notes, tag links and tag counts of ``user_ids`` in set-based statements.
 
-            unused_tags = session.query(Tag).filter(~Tag.notes.any()).all()
-            for tag in unused_tags:
-                session.delete(tag)
-            session.commit()
+        Nothing is loaded but the ids of the tags the users had, which become
+        orphan candidates.
+        """
+        with self.session_factory() as session:
+            tag_ids = session.scalars(select(UserTag.tag_id).where(UserTag.user_id.in_(user_ids)).distinct()).all()
+            session.execute(
+                delete(note_tag_association).where(
+                    note_tag_association.c.note_id.in_(select(Note.id).where(Note.user_id.in_(user_ids)))
+                )
+            )
+            session.execute(delete(UserTag).where(UserTag.user_id.in_(user_ids)))
+            result = session.execute(delete(Note.__table__).where(Note.user_id.in_(user_ids)))  # type: ignore
+            self._delete_orphan_tags(session, list(tag_ids))
+        return result.rowcount  # type: ignore
+
+    def delete_orphan_tags(self, batch_size: int = 1000) -> int:
+        with self.session_factory() as session:
+            tag_ids = session.scalars(
+                select(Tag.id)
+                .where(~exists().where(note_tag_association.c.tag_id == Tag.id))
+                .limit(batch_size)
+            ).all()
+            return self._delete_orphan_tags(session, list(tag_ids), force=True)
 
 
     def get_notes_by_tag_name(
-        self, user_id: str, tag_name: str, page: int, items_per_page: int
-    ) -> tuple[int, list[NoteVO]]:
-        with SessionLocal() as session:
-            tag = session.query(Tag).filter_by(name=tag_name).first()
-            if not tag:
+        self,
+        user_id: str,
+        tag_name: str,
+        page: int,
+        items_per_page: int,
+        after_id: str | None = None,
+        fields: tuple[str, ...] | None = None,
+    ) -> tuple[int | None, list[NoteVO]]:
+        with self.session_factory() as session:
+            user_tag = session.execute(
+                select(UserTag.tag_id, UserTag.note_count)
+                .join(Tag, Tag.id == UserTag.tag_id)
+                .where(UserTag.user_id == user_id, Tag.name == tag_name)
+            ).first()
+            if not user_tag:
                 return 0, []
-            query = session.query(Note).options(joinedload(Note.tags)).filter(Note.user_id == user_id, Note.tags.any(id=tag.id))
-            total_count = query.count()
-            notes = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
-        note_vos = [NoteVO(**row_to_dict(note)) for note in notes]
-        return total_count, note_vos
+            query = (
+                session.query(*note_columns(fields))
+                .join(note_tag_association, note_tag_association.c.note_id == Note.id)
+                .filter(note_tag_association.c.tag_id == user_tag.tag_id, Note.user_id == user_id)
+            )
+            total_count, rows = paginate(
+                query, Note.id, page, items_per_page, after_id, total_count=user_tag.note_count
+            )
+            return total_count, self._to_note_vos(session, rows, fields)
+
+    def get_tags(self, user_id: str) -> list[UserTagVO]:
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(Tag.name, UserTag.note_count)
+                .join(Tag, Tag.id == UserTag.tag_id)
+                .where(UserTag.user_id == user_id)
+                .order_by(Tag.name)
+            )
+            return [UserTagVO(name=name, note_count=note_count) for name, note_count in rows]
+
+    def search(
+        self,
+        user_id: str,
+        query: str,
+        items_per_page: int,
+        after: tuple[float, str] | None = None,
+    ) -> list[SearchHit]:
+        """Notes matching ``query``, best first; ``after`` is the (score, id) of the previous page's last hit."""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self.session_factory() as session:
+            if session.get_bind().dialect.name == "sqlite":
+                rows = self._search_fts5(session, user_id, terms, items_per_page, after)
+                snippets = {row.id: row.snippet for row in rows}
+            else:
+                rows = self._search_fulltext(session, user_id, query, items_per_page, after)
+                snippets = {row.id: make_snippet(row.content, terms) for row in rows}
+            scores = {row.id: row.score for row in rows}
+            return [
+                SearchHit(note=note, score=scores[note.id], snippet=snippets[note.id])
+                for note in self._to_note_vos(session, rows)
+            ]
+
+    def _search_fulltext(
+        self, session: Session, user_id: str, query: str, items_per_page: int, after: tuple[float, str] | None
+    ) -> list:
+        score = match(Note.title, Note.content, against=query)
+        stmt = select(*NOTE_COLUMNS, score.label("score")).where(Note.user_id == user_id, score)
+        if after is not None:
+            stmt = stmt.where(or_(score < after[0], and_(score == after[0], Note.id > after[1])))
+        return session.execute(stmt.order_by(score.desc(), Note.id).limit(items_per_page)).all()
+
+    def _search_fts5(
+        self, session: Session, user_id: str, terms: list[str], items_per_page: int, after: tuple[float, str] | None
+    ) -> list:
+        # bm25() is lower-is-better; negate it so scores rank the same way as MATCH ... AGAINST.
+        stmt = text(
+            f"""
+            SELECT Note.id, Note.user_id, Note.title, Note.content, Note.memo_date,
+                   Note.created_at, Note.updated_at, -bm25(Note_fts) AS score,
+                   snippet(Note_fts, 1, '{MARK_START}', '{MARK_END}', '{ELLIPSIS}', 24) AS snippet
+            FROM Note_fts JOIN Note ON Note.rowid = Note_fts.rowid
+            WHERE Note_fts MATCH :match AND Note.user_id = :user_id
+              AND (:after_score IS NULL OR -bm25(Note_fts) < :after_score
+                   OR (-bm25(Note_fts) = :after_score AND Note.id > :after_id))
+            ORDER BY score DESC, Note.id
+            LIMIT :limit
+            """
+        ).columns(*NOTE_COLUMNS, column("score", Float), column("snippet", String))
+        return session.execute(
+            stmt,
+            {
+                "match": " ".join(f'"{term}"' for term in terms),
+                "user_id": user_id,
+                "after_score": after[0] if after else None,
+                "after_id": after[1] if after else None,
+                "limit": items_per_page,
+            },
+        ).all()
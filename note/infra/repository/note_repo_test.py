@@ -0,0 +1,212 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database_models  # noqa: F401
+from database import Base
+from note.domain.note import Note as NoteVO, Tag as TagVO, UserTag as UserTagVO
+from note.infra.repository.note_repo import NoteRepository
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def note_repository(engine):
+    return NoteRepository(session_factory=sessionmaker(autoflush=False, bind=engine).begin)
+
+
+def make_note(id: str, tag_names: list[str]) -> NoteVO:
+    now = datetime(2021, 1, 1)
+    return NoteVO(
+        id=id,
+        user_id="USER_ID",
+        title="title",
+        content="content",
+        memo_date="20210101",
+        tags=[TagVO(id=f"{id}-{name}", name=name, created_at=now, updated_at=now) for name in tag_names],
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def count_statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_save_reuses_existing_tags(note_repository):
+    note_repository.save("USER_ID", make_note("NOTE_1", ["a", "b"]))
+    note_repository.save("USER_ID", make_note("NOTE_2", ["b", "c", "c"]))
+
+    first = note_repository.find_by_id("USER_ID", "NOTE_1")
+    second = note_repository.find_by_id("USER_ID", "NOTE_2")
+
+    assert sorted(tag.name for tag in second.tags) == ["b", "c"]
+    shared = {tag.name: tag.id for tag in first.tags}["b"]
+    assert {tag.name: tag.id for tag in second.tags}["b"] == shared == "NOTE_1-b"
+
+
+@pytest.mark.parametrize("tag_count", [1, 32])
+def test_save_statement_count_is_independent_of_tags(engine, note_repository, tag_count):
+    statements = count_statements(engine)
+    note_repository.save("USER_ID", make_note("NOTE_1", [f"tag-{i}" for i in range(tag_count)]))
+
+    # INSERT Note, SELECT tags, INSERT tags, SELECT tags, INSERT Note_Tag, UPSERT User_Tag
+    assert len(statements) == 6
+
+
+def test_update_replaces_tags(note_repository):
+    note_repository.save("USER_ID", make_note("NOTE_1", ["a", "b"]))
+    note = note_repository.find_by_id("USER_ID", "NOTE_1")
+    note.tags = make_note("NOTE_1", ["b", "c"]).tags
+
+    updated = note_repository.update("USER_ID", note)
+
+    assert sorted(tag.name for tag in updated.tags) == ["b", "c"]
+
+
+def tag_names(engine) -> list[str]:
+    with engine.connect() as conn:
+        return sorted(conn.execute(text('SELECT name FROM "Tag"')).scalars())
+
+
+def test_update_deletes_only_orphaned_lost_tags(engine, note_repository):
+    note_repository.save("USER_ID", make_note("NOTE_1", ["a", "b"]))
+    note_repository.save("USER_ID", make_note("NOTE_2", ["b"]))
+    note = note_repository.find_by_id("USER_ID", "NOTE_1")
+    note.tags = make_note("NOTE_1", ["c"]).tags
+
+    note_repository.update("USER_ID", note)
+
+    assert tag_names(engine) == ["b", "c"]
+
+
+def test_deferred_collection_leaves_orphans_for_the_sweeper(engine):
+    note_repository = NoteRepository(
+        session_factory=sessionmaker(autoflush=False, bind=engine).begin,
+        collect_orphan_tags=False,
+    )
+    note_repository.save("USER_ID", make_note("NOTE_1", ["a", "b", "c"]))
+    note_repository.delete("USER_ID", "NOTE_1")
+    assert tag_names(engine) == ["a", "b", "c"]
+
+    assert note_repository.delete_orphan_tags(batch_size=2) == 2
+    assert note_repository.delete_orphan_tags(batch_size=2) == 1
+    assert tag_names(engine) == []
+
+
+def test_tag_counts_follow_note_edits(note_repository):
+    note_repository.save("USER_ID", make_note("NOTE_1", ["a", "b"]))
+    note_repository.save("USER_ID", make_note("NOTE_2", ["b"]))
+    note_repository.save("OTHER_USER_ID", make_note("NOTE_3", ["b"]))
+    note = note_repository.find_by_id("USER_ID", "NOTE_1")
+    note.tags = make_note("NOTE_1", ["b", "c"]).tags
+    note_repository.update("USER_ID", note)
+    note_repository.delete("USER_ID", "NOTE_2")
+
+    assert note_repository.get_tags("USER_ID") == [
+        UserTagVO(name="b", note_count=1),
+        UserTagVO(name="c", note_count=1),
+    ]
+    total_count, notes = note_repository.get_notes_by_tag_name("USER_ID", "b", 1, 10)
+    assert total_count == 1
+    assert [note.id for note in notes] == ["NOTE_1"]
+
+
+def test_delete_user_notes_cascades_without_loading_notes(engine, note_repository):
+    note_repository.save("USER_1", make_note("NOTE_1", ["a", "b"]))
+    note_repository.save("USER_2", make_note("NOTE_2", ["b", "c"]))
+    note_repository.save("USER_3", make_note("NOTE_3", ["c"]))
+    statements = count_statements(engine)
+
+    assert note_repository.delete_user_notes(["USER_1", "USER_2"]) == 2
+
+    # SELECT tag ids, DELETE Note_Tag, DELETE User_Tag, DELETE Note, DELETE orphan tags
+    assert len(statements) == 5
+    assert tag_names(engine) == ["c"]
+    assert note_repository.get_tags("USER_2") == []
+    assert note_repository.get_tags("USER_3") == [UserTagVO(name="c", note_count=1)]
+    assert [note.id for note in note_repository.get_notes("USER_3", 1, 10)[1]] == ["NOTE_3"]
+
+
+def test_search_ranks_and_pages_with_cursor(note_repository):
+    for i, content in enumerate(["clean code", "clean clean architecture", "dirty code", "clean"]):
+        note = make_note(f"NOTE_{i}", [])
+        note.content = content
+        note_repository.save("USER_ID", note)
+    other = make_note("NOTE_OTHER", [])
+    other.content = "clean"
+    other.user_id = "OTHER_USER_ID"
+    note_repository.save("OTHER_USER_ID", other)
+
+    first = note_repository.search("USER_ID", "clean", items_per_page=2)
+    second = note_repository.search("USER_ID", "clean", items_per_page=2, after=(first[-1].score, first[-1].note.id))
+
+    hits = first + second
+    assert sorted(hit.note.id for hit in hits) == ["NOTE_0", "NOTE_1", "NOTE_3"]
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert "<mark>clean</mark>" in hits[0].snippet
+
+
+def test_iter_notes_streams_in_batches_and_filters_by_update_time(note_repository):
+    for i in range(5):
+        note = make_note(f"NOTE_{i}", ["a"])
+        note.updated_at = datetime(2021, 1, 1 + i)
+        note_repository.save("USER_ID", note)
+
+    assert [note.id for note in note_repository.iter_notes(batch_size=2)] == [f"NOTE_{i}" for i in range(5)]
+    recent = list(note_repository.iter_notes(updated_after=datetime(2021, 1, 3), batch_size=2))
+    assert [note.id for note in recent] == ["NOTE_3", "NOTE_4"]
+    assert [tag.name for tag in recent[0].tags] == ["a"]
+    assert [note.id for note in note_repository.find_by_ids("USER_ID", ["NOTE_4", "MISSING"])] == ["NOTE_4"]
+    assert list(note_repository.iter_note_keys(batch_size=2)) == [("USER_ID", f"NOTE_{i}") for i in range(5)]
+
+
+@pytest.mark.parametrize("note_count", [1, 50])
+def test_save_many_statement_count_is_independent_of_batch_size(engine, note_repository, note_count):
+    statements = count_statements(engine)
+    note_repository.save_many("USER_ID", [make_note(f"NOTE_{i}", ["a", f"tag-{i}"]) for i in range(note_count)])
+
+    # INSERT Note, SELECT tags, INSERT tags, SELECT tags, INSERT Note_Tag, UPSERT User_Tag
+    assert len(statements) == 6
+    assert note_repository.get_tags("USER_ID")[0] == UserTagVO(name="a", note_count=note_count)
+
+
+def test_stream_notes_groups_tags_across_batches(note_repository):
+    note_repository.save_many("USER_ID", [make_note(f"NOTE_{i}", ["a", "b", "c"][: i + 1]) for i in range(3)])
+    note_repository.save("USER_ID", make_note("NOTE_3", []))
+    note_repository.save("OTHER_USER_ID", make_note("NOTE_4", ["a"]))
+
+    notes = list(note_repository.stream_notes("USER_ID", batch_size=2))
+
+    assert [note.id for note in notes] == ["NOTE_0", "NOTE_1", "NOTE_2", "NOTE_3"]
+    assert [sorted(tag.name for tag in note.tags) for note in notes] == [["a"], ["a", "b"], ["a", "b", "c"], []]
+
+
+def test_projected_pages_skip_unrequested_columns(engine, note_repository):
+    note_repository.save_many("USER_ID", [make_note(f"NOTE_{i}", ["a"]) for i in range(3)])
+    statements = count_statements(engine)
+
+    total_count, notes = note_repository.get_notes("USER_ID", 1, 2, fields=("id", "title"))
+
+    assert total_count == 3
+    assert [(note.id, note.title, note.content, note.tags) for note in notes] == [
+        ("NOTE_0", "title", None, None),
+        ("NOTE_1", "title", None, None),
+    ]
+    assert notes[0].updated_at == datetime(2021, 1, 1)
+    # COUNT and the page; no tag query, and the text column is never selected.
+    assert len(statements) == 2
+    assert "content" not in statements[1]
+
+    _, notes = note_repository.get_notes_by_tag_name("USER_ID", "a", 1, 10, fields=("id", "tags"))
+    assert [[tag.name for tag in note.tags] for note in notes] == [["a"]] * 3
@@ -0,0 +1,351 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from heapq import nsmallest
+from typing import Iterable
+
+from note.domain.note import Note
+from note.domain.repository.note_search_index import INoteSearchIndex
+from note.infra.search.snippet import query_terms
+
+SNAPSHOT_MAGIC = b"NIDX0001"
+HEADER = struct.Struct("<8sQ")
+ALIGNMENT = 8
+
+# BM25 parameters and the weight of a title term relative to a content term.
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 2
+
+# A user's index is rebuilt without removed documents once they make up
+# this fraction of its document slots, and at least this many.
+COMPACT_FRACTION = 0.25
+COMPACT_MIN_REMOVED = 64
+
+# How far before its start a catch-up also reads notes again, for
+# transactions that stamped updated_at earlier but commit after the query.
+CATCH_UP_OVERLAP = timedelta(minutes=1)
+
+
+class _UserIndex:
+    """Inverted index over one user's notes.
+
+    Documents get increasing integer ids, so every posting list stays sorted
+    by appending. An update removes the old document and adds a new one;
+    removed documents leave empty slots until ``compact`` renumbers the
+    rest. Postings restored from a snapshot are read-only views into the
+    mapped file and are copied into arrays on first write.
+    """
+
+    def __init__(self):
+        self.note_ids: list[str | None] = []
+        self.doc_ids: dict[str, int] = {}
+        self.lengths = array("I")
+        # Term ids of each document: doc_terms[doc_term_offsets[d]:doc_term_offsets[d + 1]].
+        self.doc_terms = array("I")
+        self.doc_term_offsets = array("Q", [0])
+        self.terms: dict[str, int] = {}
+        self.term_names: list[str] = []
+        self.posting_docs: list[array | memoryview] = []
+        self.posting_freqs: list[array | memoryview] = []
+        self.total_length = 0
+
+    def _writable(self, term_id: int) -> tuple[array, array]:
+        docs, freqs = self.posting_docs[term_id], self.posting_freqs[term_id]
+        if isinstance(docs, memoryview):
+            docs, freqs = array("I", docs), array("I", freqs)
+            self.posting_docs[term_id], self.posting_freqs[term_id] = docs, freqs
+        return docs, freqs  # type: ignore
+
+    def add(self, note_id: str, tokens: list[str]):
+        self.remove(note_id)
+        doc = len(self.note_ids)
+        self.note_ids.append(note_id)
+        self.doc_ids[note_id] = doc
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+        counts: dict[int, int] = defaultdict(int)
+        for token in tokens:
+            term_id = self.terms.get(token)
+            if term_id is None:
+                term_id = self.terms[token] = len(self.term_names)
+                self.term_names.append(token)
+                self.posting_docs.append(array("I"))
+                self.posting_freqs.append(array("I"))
+            counts[term_id] += 1
+        for term_id, count in counts.items():
+            docs, freqs = self._writable(term_id)
+            docs.append(doc)
+            freqs.append(count)
+        self.doc_terms.extend(counts)
+        self.doc_term_offsets.append(len(self.doc_terms))
+
+    def remove(self, note_id: str):
+        doc = self.doc_ids.pop(note_id, None)
+        if doc is None:
+            return
+        for term_id in self.doc_terms[self.doc_term_offsets[doc]:self.doc_term_offsets[doc + 1]]:
+            docs, freqs = self._writable(term_id)
+            position = bisect_left(docs, doc)
+            del docs[position]
+            del freqs[position]
+        self.total_length -= self.lengths[doc]
+        self.lengths[doc] = 0
+        self.note_ids[doc] = None
+        removed = len(self.note_ids) - len(self.doc_ids)
+        if removed >= COMPACT_MIN_REMOVED and removed >= COMPACT_FRACTION * len(self.note_ids):
+            self.compact()
+
+    def compact(self):
+        """Renumbers the live documents from 0 and drops removed slots and unused terms."""
+        if len(self.doc_ids) == len(self.note_ids) and all(self.posting_docs):
+            return
+        term_ids: dict[int, int] = {}
+        note_ids: list[str | None] = []
+        lengths, doc_terms, doc_term_offsets = array("I"), array("I"), array("Q", [0])
+        term_names: list[str] = []
+        posting_docs: list[array | memoryview] = []
+        posting_freqs: list[array | memoryview] = []
+        for doc, note_id in enumerate(self.note_ids):
+            if note_id is None:
+                continue
+            new_doc = len(note_ids)
+            note_ids.append(note_id)
+            lengths.append(self.lengths[doc])
+            for term_id in self.doc_terms[self.doc_term_offsets[doc]:self.doc_term_offsets[doc + 1]]:
+                docs, freqs = self.posting_docs[term_id], self.posting_freqs[term_id]
+                new_term_id = term_ids.get(term_id)
+                if new_term_id is None:
+                    new_term_id = term_ids[term_id] = len(term_names)
+                    term_names.append(self.term_names[term_id])
+                    posting_docs.append(array("I"))
+                    posting_freqs.append(array("I"))
+                posting_docs[new_term_id].append(new_doc)  # type: ignore
+                posting_freqs[new_term_id].append(freqs[bisect_left(docs, doc)])  # type: ignore
+                doc_terms.append(new_term_id)
+            doc_term_offsets.append(len(doc_terms))
+        self.note_ids = note_ids
+        self.doc_ids = {note_id: doc for doc, note_id in enumerate(note_ids)}  # type: ignore
+        self.lengths, self.doc_terms, self.doc_term_offsets = lengths, doc_terms, doc_term_offsets
+        self.term_names = term_names
+        self.terms = {term: term_id for term_id, term in enumerate(term_names)}
+        self.posting_docs, self.posting_freqs = posting_docs, posting_freqs
+
+    def search(self, terms: list[str]) -> dict[int, float]:
+        live = len(self.doc_ids)
+        if not live:
+            return {}
+        average_length = self.total_length / live
+        lengths = self.lengths
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            docs, freqs = self.posting_docs[term_id], self.posting_freqs[term_id]
+            idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, freq in zip(docs, freqs):
+                norm = K1 * (1 - B + B * lengths[doc] / average_length)
+                scores[doc] += idf * freq * (K1 + 1) / (freq + norm)
+        return scores
+
+
+class InvertedIndex(INoteSearchIndex):
+    """Per-user BM25 search over note titles, contents and tags, held in process memory.
+
+    Each worker keeps its own copy: it is updated by the NoteService calls
+    served by that worker, and warmed from a snapshot plus the notes changed
+    since the snapshot's ``covered_until`` (see ``warm_start``).
+    """
+
+    def __init__(self):
+        self.users: dict[str, _UserIndex] = {}
+        self.lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        # Every note updated up to this time is indexed, None if unknown. Only
+        # a catch-up from the database moves it: notes other workers write
+        # after that never reach this index.
+        self.covered_until: datetime | None = None
+
+    @staticmethod
+    def tokens(note: Note) -> list[str]:
+        return (
+            query_terms(note.title) * TITLE_BOOST
+            + query_terms(note.content)
+            + [term for tag in note.tags for term in query_terms(tag.name)]
+        )
+
+    def add(self, note: Note):
+        tokens = self.tokens(note)
+        with self.lock:
+            self.users.setdefault(note.user_id, _UserIndex()).add(note.id, tokens)
+
+    def remove(self, user_id: str, id: str):
+        with self.lock:
+            user_index = self.users.get(user_id)
+            if user_index is not None:
+                user_index.remove(id)
+
+    def remove_user(self, user_id: str):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.users = {}
+            self.covered_until = None
+
+    def retain(self, note_keys: Iterable[tuple[str, str]]):
+        """Removes every note missing from ``note_keys``, the (user id, note id) of each live note."""
+        live: dict[str, set[str]] = defaultdict(set)
+        for user_id, note_id in note_keys:
+            live[user_id].add(note_id)
+        with self.lock:
+            for user_id in list(self.users):
+                user_index = self.users[user_id]
+                if user_id not in live:
+                    del self.users[user_id]
+                    continue
+                for note_id in [note_id for note_id in user_index.doc_ids if note_id not in live[user_id]]:
+                    user_index.remove(note_id)
+
+    def search(
+        self, user_id: str, query: str, limit: int, after: tuple[float, str] | None = None
+    ) -> list[tuple[float, str]]:
+        """(score, note id) pairs, best first, starting after the ``after`` hit."""
+        with self.lock:
+            user_index = self.users.get(user_id)
+            if user_index is None:
+                return []
+            hits = [(score, user_index.note_ids[doc]) for doc, score in user_index.search(query_terms(query)).items()]
+        if after is not None:
+            hits = [hit for hit in hits if hit[0] < after[0] or (hit[0] == after[0] and hit[1] > after[1])]  # type: ignore
+        return nsmallest(limit, hits, key=lambda hit: (-hit[0], hit[1]))  # type: ignore
+
+    def snapshot(self, path: str):
+        """Writes the index to ``path`` atomically: a JSON manifest followed by raw arrays."""
+        blobs: list[bytes] = []
+        offset = 0
+
+        def block(values: array) -> list:
+            nonlocal offset
+            data = values.tobytes()
+            start = offset
+            blobs.append(data + b"\0" * (-len(data) % ALIGNMENT))
+            offset += len(blobs[-1])
+            return [start, values.typecode, len(values)]
+
+        with self.lock:
+            users = {}
+            for user_id, user_index in self.users.items():
+                user_index.compact()
+                posting_offsets = array("Q", [0])
+                posting_docs, posting_freqs = array("I"), array("I")
+                for docs, freqs in zip(user_index.posting_docs, user_index.posting_freqs):
+                    posting_docs.extend(docs)
+                    posting_freqs.extend(freqs)
+                    posting_offsets.append(len(posting_docs))
+                users[user_id] = {
+                    "note_ids": user_index.note_ids,
+                    "terms": user_index.term_names,
+                    "total_length": user_index.total_length,
+                    "lengths": block(user_index.lengths),
+                    "doc_terms": block(user_index.doc_terms),
+                    "doc_term_offsets": block(user_index.doc_term_offsets),
+                    "posting_offsets": block(posting_offsets),
+                    "posting_docs": block(posting_docs),
+                    "posting_freqs": block(posting_freqs),
+                }
+            manifest = json.dumps(
+                {
+                    "byteorder": sys.byteorder,
+                    "covered_until": self.covered_until.isoformat() if self.covered_until else None,
+                    "users": users,
+                }
+            ).encode()
+
+        data_start = HEADER.size + len(manifest) + (-(HEADER.size + len(manifest)) % ALIGNMENT)
+        # A file of its own in the same directory: every worker may snapshot at once.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(HEADER.pack(SNAPSHOT_MAGIC, len(manifest)))
+                file.write(manifest)
+                file.write(b"\0" * (data_start - HEADER.size - len(manifest)))
+                for blob in blobs:
+                    file.write(blob)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def restore(self, path: str) -> datetime | None:
+        """Maps a snapshot written by ``snapshot`` and returns its ``covered_until``."""
+        with open(path, "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, manifest_length = HEADER.unpack_from(mapped)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a note search snapshot")
+        manifest = json.loads(mapped[HEADER.size:HEADER.size + manifest_length])
+        if manifest["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {manifest['byteorder']}-endian machine")
+        data_start = HEADER.size + manifest_length + (-(HEADER.size + manifest_length) % ALIGNMENT)
+        view = memoryview(mapped)
+
+        def block(spec: list) -> memoryview:
+            start, typecode, count = spec
+            start += data_start
+            return view[start:start + count * array(typecode).itemsize].cast(typecode)
+
+        users = {}
+        for user_id, spec in manifest["users"].items():
+            user_index = _UserIndex()
+            user_index.note_ids = spec["note_ids"]
+            user_index.doc_ids = {note_id: doc for doc, note_id in enumerate(spec["note_ids"]) if note_id is not None}
+            user_index.term_names = spec["terms"]
+            user_index.terms = {term: term_id for term_id, term in enumerate(spec["terms"])}
+            user_index.total_length = spec["total_length"]
+            # Per-document arrays grow on every add, so they are copied; postings stay mapped.
+            user_index.lengths = array("I", block(spec["lengths"]))
+            user_index.doc_terms = array("I", block(spec["doc_terms"]))
+            user_index.doc_term_offsets = array("Q", block(spec["doc_term_offsets"]))
+            offsets = block(spec["posting_offsets"])
+            docs, freqs = block(spec["posting_docs"]), block(spec["posting_freqs"])
+            user_index.posting_docs = [docs[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            user_index.posting_freqs = [freqs[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            users[user_id] = user_index
+
+        covered_until = manifest.get("covered_until")
+        with self.lock:
+            self.users = users
+            self._mmap = mapped
+            self.covered_until = datetime.fromisoformat(covered_until) if covered_until else None
+        return self.covered_until
+
+
+def warm_start(index: InvertedIndex, note_repo, path: str):
+    """Restores the snapshot at ``path`` if there is one, then catches up with the database.
+
+    Notes deleted since the snapshot are removed and notes changed after its
+    ``covered_until`` are indexed again. A snapshot without one is dropped
+    and the index rebuilt from every note.
+    """
+    started = datetime.now()
+    updated_after = index.restore(path) if os.path.exists(path) else None
+    if updated_after is None:
+        index.clear()
+    else:
+        index.retain(note_repo.iter_note_keys())
+    for note in note_repo.iter_notes(updated_after=updated_after):
+        index.add(note)
+    index.covered_until = started - CATCH_UP_OVERLAP
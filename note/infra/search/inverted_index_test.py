@@ -0,0 +1,179 @@
+import os
+from datetime import datetime
+from typing import Iterator
+
+from note.domain.note import Note, Tag
+from note.infra.search.inverted_index import COMPACT_MIN_REMOVED, InvertedIndex, warm_start
+
+
+def make_note(
+    id: str,
+    title: str,
+    content: str,
+    tag_names: list[str] = [],
+    user_id: str = "USER_ID",
+    updated_at: datetime = datetime(2021, 1, 1),
+) -> Note:
+    now = datetime(2021, 1, 1)
+    return Note(
+        id=id,
+        user_id=user_id,
+        title=title,
+        content=content,
+        memo_date="20210101",
+        tags=[Tag(id=f"{id}-{name}", name=name, created_at=now, updated_at=now) for name in tag_names],
+        created_at=now,
+        updated_at=updated_at,
+    )
+
+
+class FakeNoteRepository:
+    """The ``iter_notes`` and ``iter_note_keys`` of a note table every worker writes to."""
+
+    def __init__(self, notes: list[Note]):
+        self.notes = {note.id: note for note in notes}
+
+    def iter_notes(self, updated_after: datetime | None = None) -> Iterator[Note]:
+        return iter([note for note in self.notes.values() if updated_after is None or note.updated_at > updated_after])
+
+    def iter_note_keys(self) -> Iterator[tuple[str, str]]:
+        return iter([(note.user_id, note.id) for note in self.notes.values()])
+
+
+def ids(hits: list[tuple[float, str]]) -> list[str]:
+    return [id for _, id in hits]
+
+
+def test_search_ranks_by_bm25():
+    index = InvertedIndex()
+    index.add(make_note("NOTE_1", "groceries", "milk and bread"))
+    index.add(make_note("NOTE_2", "garden", "plant bread tomatoes " * 2 + "bread"))
+    index.add(make_note("NOTE_3", "bread", "sourdough starter"))
+    index.add(make_note("NOTE_4", "bread", "secret", user_id="OTHER_USER"))
+
+    hits = index.search("USER_ID", "bread", 10)
+
+    assert ids(hits) == ["NOTE_3", "NOTE_2", "NOTE_1"]
+    assert hits[0][0] > hits[1][0] > hits[2][0] > 0
+    assert index.search("USER_ID", "tomatoes sourdough", 10)[0][1] in {"NOTE_2", "NOTE_3"}
+    assert index.search("USER_ID", "missing", 10) == []
+
+
+def test_search_pages_after_the_previous_hit():
+    index = InvertedIndex()
+    for i in range(5):
+        index.add(make_note(f"NOTE_{i}", "title", "word"))
+
+    first = index.search("USER_ID", "word", 2)
+    second = index.search("USER_ID", "word", 2, after=first[-1])
+
+    assert ids(first) == ["NOTE_0", "NOTE_1"]
+    assert ids(second) == ["NOTE_2", "NOTE_3"]
+
+
+def test_add_replaces_and_remove_forgets():
+    index = InvertedIndex()
+    index.add(make_note("NOTE_1", "title", "old words", ["tagged"]))
+    index.add(make_note("NOTE_2", "title", "old"))
+
+    index.add(make_note("NOTE_1", "title", "new words"))
+    assert ids(index.search("USER_ID", "old", 10)) == ["NOTE_2"]
+    assert ids(index.search("USER_ID", "new", 10)) == ["NOTE_1"]
+    assert index.search("USER_ID", "tagged", 10) == []
+
+    index.remove("USER_ID", "NOTE_1")
+    index.remove("USER_ID", "NOTE_1")
+    assert index.search("USER_ID", "new", 10) == []
+    assert ids(index.search("USER_ID", "title", 10)) == ["NOTE_2"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "notes.idx")
+    index = InvertedIndex()
+    index.add(make_note("NOTE_1", "groceries", "milk and bread", ["shopping"]))
+    index.add(make_note("NOTE_2", "garden", "tomatoes"))
+    index.add(make_note("NOTE_3", "ünïcode", "bread", user_id="OTHER_USER"))
+    index.remove("USER_ID", "NOTE_2")
+    expected = index.search("USER_ID", "bread shopping", 10)
+    index.covered_until = datetime(2021, 1, 2)
+    index.snapshot(path)
+
+    restored = InvertedIndex()
+
+    assert restored.restore(path) == datetime(2021, 1, 2)
+    assert restored.search("USER_ID", "bread shopping", 10) == expected
+    assert ids(restored.search("OTHER_USER", "ünïcode", 10)) == ["NOTE_3"]
+    assert restored.search("USER_ID", "tomatoes", 10) == []
+
+    # Restored postings are read-only views until written to.
+    restored.add(make_note("NOTE_4", "more", "bread"))
+    restored.remove("USER_ID", "NOTE_1")
+    assert ids(restored.search("USER_ID", "bread", 10)) == ["NOTE_4"]
+
+
+def test_warm_start_catches_up_with_changes_since_snapshot(tmp_path, mocker):
+    path = str(tmp_path / "notes.idx")
+    note_repo = mocker.Mock()
+    note_repo.iter_notes.return_value = [make_note(f"NOTE_{i}", "title", "bread") for i in (1, 2)]
+
+    index = InvertedIndex()
+    warm_start(index, note_repo, path)
+    note_repo.iter_notes.assert_called_once_with(updated_after=None)
+    index.snapshot(path)
+
+    # NOTE_2 is deleted and NOTE_3 created after the snapshot.
+    note_repo.iter_note_keys.return_value = [("USER_ID", "NOTE_1"), ("USER_ID", "NOTE_3")]
+    note_repo.iter_notes.return_value = [make_note("NOTE_3", "title", "bread")]
+    restored = InvertedIndex()
+    warm_start(restored, note_repo, path)
+
+    assert note_repo.iter_notes.call_args.kwargs["updated_after"] is not None
+    assert sorted(ids(restored.search("USER_ID", "bread", 10))) == ["NOTE_1", "NOTE_3"]
+    assert os.listdir(tmp_path) == ["notes.idx"]
+
+
+def test_updates_compact_removed_documents():
+    index = InvertedIndex()
+    for version in range(200):
+        index.add(make_note("NOTE_1", "title", f"bread v{version}"))
+    index.add(make_note("NOTE_2", "title", "milk"))
+
+    user_index = index.users["USER_ID"]
+    assert len(user_index.note_ids) < 2 * COMPACT_MIN_REMOVED
+    assert ids(index.search("USER_ID", "bread", 10)) == ["NOTE_1"]
+    assert index.search("USER_ID", "v0", 10) == []
+    assert ids(index.search("USER_ID", "v199", 10)) == ["NOTE_1"]
+
+    user_index.compact()
+    assert user_index.note_ids == ["NOTE_1", "NOTE_2"]
+    assert "v0" not in user_index.terms
+    assert ids(index.search("USER_ID", "milk", 10)) == ["NOTE_2"]
+
+
+def test_warm_start_indexes_notes_other_workers_wrote_before_the_snapshot(tmp_path):
+    path = str(tmp_path / "notes.idx")
+    note_repo = FakeNoteRepository([make_note("NOTE_1", "title", "bread")])
+    index = InvertedIndex()
+    warm_start(index, note_repo, path)
+
+    # Another worker saves NOTE_2; this worker never sees it, then shuts down.
+    note_repo.notes["NOTE_2"] = make_note("NOTE_2", "title", "bread", updated_at=datetime.now())
+    index.snapshot(path)
+
+    restored = InvertedIndex()
+    warm_start(restored, note_repo, path)
+
+    assert sorted(ids(restored.search("USER_ID", "bread", 10))) == ["NOTE_1", "NOTE_2"]
+
+
+def test_warm_start_rebuilds_from_a_snapshot_without_coverage(tmp_path):
+    path = str(tmp_path / "notes.idx")
+    index = InvertedIndex()
+    index.add(make_note("NOTE_1", "title", "bread"))
+    index.snapshot(path)
+
+    restored = InvertedIndex()
+    warm_start(restored, FakeNoteRepository([make_note("NOTE_2", "title", "bread")]), path)
+
+    assert ids(restored.search("USER_ID", "bread", 10)) == ["NOTE_2"]
+    assert restored.covered_until is not None
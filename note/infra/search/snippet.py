@@ -0,0 +1,18 @@
+import re
+
+MARK_START, MARK_END, ELLIPSIS = "<mark>", "</mark>", "…"
+
+
+def query_terms(query: str) -> list[str]:
+    return [term.lower() for term in re.findall(r"\w+", query)]
+
+
+def make_snippet(text: str, terms: list[str], width: int = 160) -> str:
+    """Window of ``text`` around the first matching term, with every term highlighted."""
+    if not terms:
+        return text[:width] + (ELLIPSIS if len(text) > width else "")
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+    found = pattern.search(text)
+    start = max(0, found.start() - width // 4) if found else 0
+    window = pattern.sub(lambda m: f"{MARK_START}{m.group(0)}{MARK_END}", text[start:start + width])
+    return (ELLIPSIS if start else "") + window + (ELLIPSIS if start + width < len(text) else "")
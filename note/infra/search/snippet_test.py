@@ -0,0 +1,15 @@
+from note.infra.search.snippet import make_snippet, query_terms
+
+
+def test_query_terms_drop_operators():
+    assert query_terms('FastAPI "clean" -architecture*') == ["fastapi", "clean", "architecture"]
+
+
+def test_snippet_highlights_terms_around_first_match():
+    text = "intro " * 40 + "Clean architecture keeps the domain clean."
+
+    snippet = make_snippet(text, ["clean"], width=60)
+
+    assert snippet.startswith("…")
+    assert "<mark>Clean</mark> architecture" in snippet
+    assert snippet.count("<mark>") == 2
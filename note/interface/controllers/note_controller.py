@@ -1,18 +1,35 @@
 
-from dataclasses import asdict
 from datetime import datetime
 from typing import Annotated
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from dependency_injector.wiring import Provide, inject
 
 from common.auth import CurrentUser, get_current_user
 from containers import Container
 from note.application.note_service import NoteService
+from note.domain.note import Note
+from utils.cursor import (
+    ItemsPerPage,
+    Page,
+    decode_cursor,
+    decode_ranked_cursor,
+    encode_ranked_cursor,
+    next_cursor,
+)
+from utils.http_cache import cache_headers, check_not_modified, make_etag
+from utils.json_response import FastJSONResponse, dumps
+from utils.ndjson import NDJSON_MEDIA_TYPE, iter_lines
 
 
 router = APIRouter(prefix="/notes")
 
+# Notes validated from an import body before they are inserted together.
+IMPORT_BATCH_SIZE = 1000
+# Longest import line accepted; a body without newlines is refused at this size.
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+
 class NoteResponse(BaseModel):
     id: str
     user_id: str
@@ -33,10 +50,43 @@ class CreateNoteBody(BaseModel):
         max_length=32
     )
 
+# Fields a list request can ask for with ``fields``; the id is always included.
+NOTE_FIELDS = tuple(NoteResponse.model_fields)
+
+class PartialNoteResponse(BaseModel):
+    """A ``NoteResponse`` holding only the requested ``fields``."""
+    id: str
+    user_id: str | None = None
+    title: str | None = None
+    content: str | None = None
+    memo_date: str | None = None
+    tags: list[str] | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
 class GetNotesResponse(BaseModel):
-    total_count: int
+    total_count: int | None
     page: int
-    notes: list[NoteResponse]
+    notes: list[PartialNoteResponse]
+    next_cursor: str | None = None
+
+class TagResponse(BaseModel):
+    name: str
+    note_count: int
+
+class GetTagsResponse(BaseModel):
+    tags: list[TagResponse]
+
+class SearchNoteResponse(NoteResponse):
+    score: float
+    snippet: str
+
+class SearchNotesResponse(BaseModel):
+    notes: list[SearchNoteResponse]
+    next_cursor: str | None = None
+
+class ImportNotesResponse(BaseModel):
+    imported_count: int
 
 class UpdateNoteBody(BaseModel):
     title: str | None = Field(default=None, min_length=1, max_length=64)
@@ -46,14 +96,51 @@ class UpdateNoteBody(BaseModel):
         default=None,
     )
 
+def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """The comma-separated ``fields`` of a list request, in ``NOTE_FIELDS`` order; None for all of them."""
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    unknown = names.difference(NOTE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in NOTE_FIELDS if name in names or name == "id")
+
+def note_version(note: Note) -> str:
+    return f"{note.id}:{note.updated_at.isoformat()}"
+
+def note_json(note: Note) -> dict:
+    """``note`` shaped like ``NoteResponse``, read field by field instead of deep-copied by ``asdict``."""
+    return {
+        "id": note.id,
+        "user_id": note.user_id,
+        "title": note.title,
+        "content": note.content,
+        "memo_date": note.memo_date,
+        "tags": [tag.name for tag in note.tags],
+        "created_at": note.created_at,
+        "updated_at": note.updated_at,
+    }
+
+def notes_json(notes: list[Note], fields: tuple[str, ...] | None) -> list[dict]:
+    if fields is None:
+        return [note_json(note) for note in notes]
+    res_notes = []
+    for note in notes:
+        note_dict = {name: getattr(note, name) for name in fields}
+        if "tags" in note_dict:
+            note_dict["tags"] = [tag.name for tag in note.tags]
+        res_notes.append(note_dict)
+    return res_notes
+
 @router.post("", status_code=201, response_model=NoteResponse)
 @inject
-def create_note(
+async def create_note(
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     body: CreateNoteBody,
     note_service: NoteService = Depends(Provide[Container.note_service]),
 ):
-    note = note_service.create_note(
+    note = await note_service.create_note(
         user_id=current_user.id,
         title=body.title,
         content=body.content,
@@ -61,61 +148,160 @@ def create_note(
         tag_names=body.tags if body.tags else [],
     )
 
-    response = asdict(note)
-    response.update({"tags": [tag.name for tag in note.tags]})
-    return response
+    return FastJSONResponse(note_json(note), status_code=201)
+
+@router.post(":batchImport", status_code=201, response_model=ImportNotesResponse)
+@inject
+async def import_notes(
+    request: Request,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    note_service: NoteService = Depends(Provide[Container.note_service]),
+):
+    """Creates one note per NDJSON line of the body, each shaped like the ``POST /notes`` body.
+
+    The body is read as it arrives and inserted in batches, all in the
+    request's transaction: an invalid line rejects the whole import, and
+    one over ``IMPORT_MAX_LINE_BYTES`` rejects it with a 413.
+    """
+    imported_count = 0
+    batch: list[dict] = []
+    async for line_number, line in iter_lines(request.stream(), IMPORT_MAX_LINE_BYTES):
+        try:
+            body = CreateNoteBody.model_validate_json(line)
+        except ValidationError as e:
+            # The input is left out: for a line that isn't JSON it is raw bytes.
+            errors = e.errors(include_url=False, include_context=False, include_input=False)
+            raise HTTPException(status_code=400, detail={"line": line_number, "errors": errors})
+        batch.append(
+            {"title": body.title, "content": body.content, "memo_date": body.memo_date, "tag_names": body.tags or []}
+        )
+        if len(batch) == IMPORT_BATCH_SIZE:
+            imported_count += len(await note_service.import_notes(current_user.id, batch))
+            batch = []
+    if batch:
+        imported_count += len(await note_service.import_notes(current_user.id, batch))
+
+    return {"imported_count": imported_count}
+
+@router.get(":export", response_class=StreamingResponse)
+@inject
+async def export_notes(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    note_service: NoteService = Depends(Provide[Container.note_service]),
+):
+    """Streams all of the user's notes as NDJSON, one ``NoteResponse`` per line."""
+
+    async def lines():
+        async for note in note_service.export_notes(current_user.id):
+            yield dumps(note_json(note)) + b"\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
 
 @router.get("", response_model=GetNotesResponse)
 @inject
-def get_notes(
-    page: int = 1,
-    items_per_page: int = 10,
+async def get_notes(
+    request: Request,
+    page: Page = 1,
+    items_per_page: ItemsPerPage = 10,
+    cursor: str | None = None,
+    fields: str | None = None,
     current_user: CurrentUser = Depends(get_current_user),
     note_service: NoteService = Depends(Provide[Container.note_service]),
 ):
-    total_count, notes = note_service.get_notes(
+    """A page of notes; ``fields`` (e.g. ``id,title,tags``) limits what is loaded and returned for each."""
+    note_fields = parse_fields(fields)
+    total_count, notes = await note_service.get_notes(
         user_id=current_user.id,
         page=page,
         items_per_page=items_per_page,
+        after_id=decode_cursor(cursor) if cursor else None,
+        fields=note_fields,
     )
 
-    res_notes = []
-    for note in notes:
-        note_dict = asdict(note)
-        note_dict.update({"tags": [tag.name for tag in note.tags]})
-        res_notes.append(note_dict)
+    etag = make_etag(str(total_count), *map(note_version, notes))
+    if unchanged := check_not_modified(request, etag):
+        return unchanged
 
-    return {
-        "total_count": total_count,
-        "page": page,
-        "notes": res_notes,
-    }
+    return FastJSONResponse(
+        {
+            "total_count": total_count,
+            "page": page,
+            "notes": notes_json(notes, note_fields),
+            "next_cursor": next_cursor(notes, items_per_page),
+        },
+        headers=cache_headers(etag),
+    )
+
+@router.get("/tags", response_model=GetTagsResponse)
+@inject
+async def get_tags(
+    request: Request,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    note_service: NoteService = Depends(Provide[Container.note_service]),
+):
+    tags = await note_service.get_tags(user_id=current_user.id)
+
+    etag = make_etag(*(f"{tag.name}:{tag.note_count}" for tag in tags))
+    if unchanged := check_not_modified(request, etag):
+        return unchanged
+
+    return FastJSONResponse(
+        {"tags": [{"name": tag.name, "note_count": tag.note_count} for tag in tags]},
+        headers=cache_headers(etag),
+    )
+
+@router.get("/search", response_model=SearchNotesResponse)
+@inject
+async def search_notes(
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    items_per_page: ItemsPerPage = 10,
+    cursor: str | None = None,
+    note_service: NoteService = Depends(Provide[Container.note_service]),
+):
+    hits = await note_service.search_notes(
+        user_id=current_user.id,
+        query=q,
+        items_per_page=items_per_page,
+        after=decode_ranked_cursor(cursor) if cursor else None,
+    )
+
+    last = hits[-1] if hits and len(hits) == items_per_page else None
+    return FastJSONResponse(
+        {
+            "notes": [{**note_json(hit.note), "score": hit.score, "snippet": hit.snippet} for hit in hits],
+            "next_cursor": encode_ranked_cursor(last.score, last.note.id) if last else None,
+        }
+    )
 
 @router.get("/{id}", response_model=NoteResponse)
 @inject
-def get_note(
+async def get_note(
     id: str,
+    request: Request,
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     note_service: NoteService = Depends(Provide[Container.note_service]),
 ):
-    note = note_service.get_note(
+    note = await note_service.get_note(
         user_id=current_user.id,
         id=id,
     )
 
-    response = asdict(note)
-    response.update({"tags": [tag.name for tag in note.tags]})
-    return response
+    etag = make_etag(note_version(note))
+    if unchanged := check_not_modified(request, etag):
+        return unchanged
+
+    return FastJSONResponse(note_json(note), headers=cache_headers(etag))
 
 @router.put("/{id}", response_model=NoteResponse)
 @inject
-def update_note(
+async def update_note(
     id: str,
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     body: UpdateNoteBody,
     note_service: NoteService = Depends(Provide[Container.note_service]),
 ):
-    note = note_service.update_note(
+    note = await note_service.update_note(
         user_id=current_user.id,
         id=id,
         title=body.title,
@@ -124,47 +310,52 @@ def update_note(
         tag_names=body.tags if body.tags else [],
     )
 
-    response = asdict(note)
-    response.update({"tags": [tag.name for tag in note.tags]})
-    return response
+    return FastJSONResponse(note_json(note))
 
 @router.delete("/{id}", status_code=204)
 @inject
-def delete_note(
+async def delete_note(
     id: str,
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     note_service: NoteService = Depends(Provide[Container.note_service]),
 ):
-    note_service.delete_note(
+    await note_service.delete_note(
         user_id=current_user.id,
         id=id,
     )
 
 @router.get("/tags/{tag_name}/notes", response_model=GetNotesResponse)
 @inject
-def get_notes_by_tag(
+async def get_notes_by_tag(
     tag_name: str,
+    request: Request,
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     note_service: NoteService = Depends(Provide[Container.note_service]),
-    page: int = 1,
-    items_per_page: int = 10,
-
+    page: Page = 1,
+    items_per_page: ItemsPerPage = 10,
+    cursor: str | None = None,
+    fields: str | None = None,
 ):
-    total_count, notes = note_service.get_notes_by_tag(
+    note_fields = parse_fields(fields)
+    total_count, notes = await note_service.get_notes_by_tag(
         user_id=current_user.id,
         tag_name=tag_name,
         page=page,
         items_per_page=items_per_page,
+        after_id=decode_cursor(cursor) if cursor else None,
+        fields=note_fields,
     )
 
-    res_notes = []
-    for note in notes:
-        note_dict = asdict(note)
-        note_dict.update({"tags": [tag.name for tag in note.tags]})
-        res_notes.append(note_dict)
+    etag = make_etag(str(total_count), *map(note_version, notes))
+    if unchanged := check_not_modified(request, etag):
+        return unchanged
 
-    return {
-        "total_count": total_count,
-        "page": page,
-        "notes": res_notes,
-    }
+    return FastJSONResponse(
+        {
+            "total_count": total_count,
+            "page": page,
+            "notes": notes_json(notes, note_fields),
+            "next_cursor": next_cursor(notes, items_per_page),
+        },
+        headers=cache_headers(etag),
+    )
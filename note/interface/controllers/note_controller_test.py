@@ -0,0 +1,176 @@
+import json
+
+import pytest
+from dependency_injector import providers
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database_models  # noqa: F401
+from common.auth import CurrentUser, Role, get_current_user
+from containers import Container
+from database import Base, session_scope, unit_of_work
+from note.infra.repository.async_note_repo import AsyncNoteRepository
+from note.infra.search.inverted_index import InvertedIndex
+from note.interface.controllers.note_controller import IMPORT_MAX_LINE_BYTES, router
+from utils.ndjson import NDJSON_MEDIA_TYPE
+
+USER_ID = "USER_ID"
+
+
+def note_body(title: str, content: str = "content", tags: list[str] | None = None) -> dict:
+    return {"title": title, "content": content, "memo_date": "20250101", "tags": tags}
+
+
+@pytest.fixture
+def client(tmp_path):
+    """The note routes on a SQLite file, searched through an ``InvertedIndex``, as ``USER_ID``."""
+    path = tmp_path / "notes.sqlite3"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(autoflush=False, bind=async_engine)
+
+    async def test_unit_of_work():
+        async with session_scope(session_factory) as session:
+            yield session
+
+    container = Container()
+    container.database_io.override(providers.Object("native"))
+    container.async_note_repo.override(
+        providers.Factory(AsyncNoteRepository, session_factory=session_factory, session=container.db_session)
+    )
+    container.note_search.override(providers.Object("inverted_index"))
+    container.inverted_index.override(providers.Object(InvertedIndex()))
+    container.note_cache_backend.override(providers.Object("none"))
+
+    app = FastAPI(dependencies=[Depends(unit_of_work)])
+    app.include_router(router)
+    app.dependency_overrides[unit_of_work] = test_unit_of_work
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(id=USER_ID, role=Role.USER)
+    with TestClient(app) as client:
+        yield client
+    container.unwire()
+    engine.dispose()
+
+
+def test_note_etag_answers_304_until_the_note_changes(client):
+    note_id = client.post("/notes", json=note_body("first")).json()["id"]
+
+    response = client.get(f"/notes/{note_id}")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    unchanged = client.get(f"/notes/{note_id}", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+    assert unchanged.content == b""
+
+    assert client.put(f"/notes/{note_id}", json={"title": "renamed"}).status_code == 200
+    changed = client.get(f"/notes/{note_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["title"] == "renamed"
+
+
+def test_list_etag_changes_with_any_note_on_the_page(client):
+    note_ids = [client.post("/notes", json=note_body(f"note {i}")).json()["id"] for i in range(2)]
+
+    response = client.get("/notes")
+    etag = response.headers["ETag"]
+    assert [note["id"] for note in response.json()["notes"]] == note_ids
+    assert client.get("/notes", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+    client.put(f"/notes/{note_ids[1]}", json={"content": "edited"})
+    assert client.get("/notes", headers={"If-None-Match": etag}).status_code == 200
+
+    etag = client.get("/notes").headers["ETag"]
+    client.delete(f"/notes/{note_ids[0]}")
+    response = client.get("/notes", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total_count"] == 1
+
+
+def test_ndjson_import_and_export_round_trip(client):
+    notes = [note_body(f"imported {i}", f"line {i}", ["imported"] if i % 2 else None) for i in range(3)]
+    body = "\n".join(json.dumps(note) for note in notes) + "\n\n"
+
+    response = client.post("/notes:batchImport", content=body.encode(), headers={"Content-Type": NDJSON_MEDIA_TYPE})
+    assert response.status_code == 201
+    assert response.json() == {"imported_count": 3}
+
+    response = client.get("/notes:export")
+    assert response.headers["Content-Type"] == NDJSON_MEDIA_TYPE
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    # Exported in id order; ids made within one millisecond are not ordered.
+    assert sorted((note["title"], note["content"], note["tags"]) for note in exported) == [
+        (note["title"], note["content"], note["tags"] or []) for note in notes
+    ]
+
+
+@pytest.mark.parametrize(
+    "line, status_code",
+    [
+        (b'{"title": "", "content": "x", "memo_date": "20250101"}', 400),
+        (b"not json", 400),
+        (b"x" * (IMPORT_MAX_LINE_BYTES + 1), 413),
+    ],
+)
+def test_ndjson_import_reports_the_bad_line_and_imports_nothing(client, line, status_code):
+    body = json.dumps(note_body("valid")).encode() + b"\n" + line + b"\n"
+
+    response = client.post("/notes:batchImport", content=body)
+
+    assert response.status_code == status_code
+    assert response.json()["detail"]["line"] == 2
+    assert client.get("/notes").json()["total_count"] == 0
+
+
+def test_search_orders_by_score_and_pages_with_the_cursor(client):
+    client.post("/notes", json=note_body("groceries", "milk and bread"))
+    best = client.post("/notes", json=note_body("bread", "sourdough bread")).json()["id"]
+    client.post("/notes", json=note_body("garden", "tomatoes"))
+    middle = client.post("/notes", json=note_body("baking", "bread bread rolls")).json()["id"]
+
+    response = client.get("/notes/search", params={"q": "bread"})
+    hits = response.json()["notes"]
+    assert response.status_code == 200
+    assert [hit["id"] for hit in hits][:2] == [best, middle]
+    assert len(hits) == 3
+    assert hits[0]["score"] > hits[1]["score"] > hits[2]["score"] > 0
+    assert "bread" in hits[0]["snippet"]
+    assert response.json()["next_cursor"] is None
+
+    pages = []
+    cursor = None
+    while True:
+        page = client.get("/notes/search", params={"q": "bread", "items_per_page": 2, "cursor": cursor}).json()
+        pages.append([hit["id"] for hit in page["notes"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [id for page in pages for id in page] == [hit["id"] for hit in hits]
+    assert client.get("/notes/search", params={"q": "missing"}).json() == {"notes": [], "next_cursor": None}
+
+
+def test_tags_count_notes_and_list_them(client):
+    first = client.post("/notes", json=note_body("first", tags=["work", "home"])).json()["id"]
+    second = client.post("/notes", json=note_body("second", tags=["work"])).json()["id"]
+
+    response = client.get("/notes/tags")
+    etag = response.headers["ETag"]
+    assert response.json() == {"tags": [{"name": "home", "note_count": 1}, {"name": "work", "note_count": 2}]}
+    assert client.get("/notes/tags", headers={"If-None-Match": etag}).status_code == 304
+
+    tagged = client.get("/notes/tags/work/notes").json()
+    assert tagged["total_count"] == 2
+    assert sorted(note["id"] for note in tagged["notes"]) == sorted([first, second])
+
+    client.put(f"/notes/{first}", json={"tags": ["home"]})
+    client.delete(f"/notes/{second}")
+    response = client.get("/notes/tags", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == {"tags": [{"name": "home", "note_count": 1}]}
+    assert client.get("/notes/tags/work/notes").json()["total_count"] == 0
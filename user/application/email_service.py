@@ -1,27 +1,147 @@
-from config import get_settings
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
+import asyncio
+from email.message import EmailMessage
+from email.policy import SMTP
+
+from common.logger import logger
+from utils.async_smtp_pool import AsyncSMTPPool
+from utils.smtp_pool import SMTPPool
+
+WELCOME_SUBJECT = "회원 가입을 환영합니다."
+WELCOME_BODY = "TIL 서비스를 이용해주셔서 감사합니다."
+
+
+class MessageTemplate:
+    """A message rendered to bytes once; sending it only prepends the To header."""
+
+    def __init__(self, sender: str, subject: str, body: str):
+        message = EmailMessage(policy=SMTP)
+        message["From"] = sender
+        message["Subject"] = subject
+        message.set_content(body)
+        self.sender = sender
+        self.rendered = message.as_bytes()
+
+    def render(self, receiver_email: str) -> bytes:
+        if not receiver_email.isascii() or any(c in receiver_email for c in "\r\n,"):
+            raise ValueError(f"Unsupported receiver address: {receiver_email!r}")
+        return b"To: " + receiver_email.encode() + b"\r\n" + self.rendered
 
-settings = get_settings()
 
 class EmailService:
+    def __init__(self, smtp_pool: SMTPPool, sender: str):
+        self.smtp_pool = smtp_pool
+        self.welcome_email = MessageTemplate(sender, WELCOME_SUBJECT, WELCOME_BODY)
+
     def send_email(
             self,
             receiver_email: str,
     ):
-        sender_email = "syw5141@gmail.com"
-        password = settings.email_password
+        if self.send_welcome_emails([receiver_email]):
+            raise ConnectionError(f"Welcome email to {receiver_email} was not delivered")
+
+    def send_welcome_emails(self, receiver_emails: list[str]) -> list[str]:
+        """Sends the welcome email to each receiver over one pooled connection; returns those to retry."""
+        envelopes = []
+        for receiver_email in receiver_emails:
+            try:
+                envelopes.append((self.welcome_email.sender, [receiver_email], self.welcome_email.render(receiver_email)))
+            except ValueError:
+                logger.warning("Skipped welcome email to %r", receiver_email)
+        return [recipients[0] for _, recipients, _ in self.smtp_pool.send(envelopes)]
+
+
+class AsyncEmailService:
+    """Sends welcome emails from the event loop, for running without a Celery worker.
+
+    Queued addresses are taken by ``concurrency`` workers, up to
+    ``batch_size`` at a time, and sent over one pooled connection each.
+    Deferred emails are queued again after ``retry_delay`` seconds, doubled
+    on every attempt, until ``max_attempts``. The queue lives in memory:
+    emails still in it when the process exits are lost.
+    """
+
+    def __init__(
+        self,
+        smtp_pool: AsyncSMTPPool,
+        sender: str,
+        concurrency: int = 2,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        retry_delay: float = 30,
+    ):
+        self.smtp_pool = smtp_pool
+        self.welcome_email = MessageTemplate(sender, WELCOME_SUBJECT, WELCOME_BODY)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue[tuple[str, int]] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+
+    async def send_email(self, receiver_email: str):
+        if await self.send_welcome_emails([receiver_email]):
+            raise ConnectionError(f"Welcome email to {receiver_email} was not delivered")
+
+    async def send_welcome_emails(self, receiver_emails: list[str]) -> list[str]:
+        """Sends the welcome email to each receiver over one pooled connection; returns those to retry."""
+        envelopes = []
+        for receiver_email in receiver_emails:
+            try:
+                envelopes.append((self.welcome_email.sender, [receiver_email], self.welcome_email.render(receiver_email)))
+            except ValueError:
+                logger.warning("Skipped welcome email to %r", receiver_email)
+        return [recipients[0] for _, recipients, _ in await self.smtp_pool.send(envelopes)]
+
+    def enqueue_welcome_email(self, receiver_email: str):
+        """Queues the welcome email and returns at once; the workers start on first use."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._queue.put_nowait((receiver_email, 1))
+
+    async def _work(self):
+        assert self._queue is not None
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                retry = set(await self.send_welcome_emails([receiver_email for receiver_email, _ in batch]))
+            except Exception:
+                logger.exception("Failed to send %d welcome emails", len(batch))
+                retry = {receiver_email for receiver_email, _ in batch}
+            for receiver_email, attempt in batch:
+                if receiver_email in retry:
+                    self._retry(receiver_email, attempt)
+                self._queue.task_done()
 
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = receiver_email
-        message["Subject"] = "회원 가입을 환영합니다."
+    def _retry(self, receiver_email: str, attempt: int):
+        if attempt >= self.max_attempts:
+            logger.error("Gave up on the welcome email to %s after %d attempts", receiver_email, attempt)
+            return
+        task = asyncio.create_task(self._requeue(receiver_email, attempt + 1, self.retry_delay * 2 ** (attempt - 1)))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
 
-        body = "TIL 서비스를 이용해주셔서 감사합니다."
-        message.attach(MIMEText(body, "plain"))
+    async def _requeue(self, receiver_email: str, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        assert self._queue is not None
+        self._queue.put_nowait((receiver_email, attempt))
 
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(sender_email, password)
-            server.send_message(message)
\ No newline at end of file
+    async def close(self, timeout: float = 5):
+        """Waits up to ``timeout`` seconds for queued emails, then stops the workers and closes the pool."""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except TimeoutError:
+                pass
+            unsent = self._queue.qsize() + len(self._retries)
+            if unsent:
+                logger.warning("%d welcome emails were not sent before shutdown", unsent)
+            tasks = [*self._workers, *self._retries]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._queue, self._workers = None, []
+        await self.smtp_pool.close()
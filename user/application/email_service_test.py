@@ -0,0 +1,41 @@
+import asyncio
+
+from user.application.email_service import AsyncEmailService
+from utils.async_smtp_pool import AsyncSMTPPool
+
+
+def test_retries_deferred_emails_until_sent_or_out_of_attempts(mocker):
+    smtp_pool = mocker.Mock(spec=AsyncSMTPPool)
+    sent: list[str] = []
+
+    async def send(envelopes):
+        deferred = []
+        for envelope in envelopes:
+            receiver_email = envelope[1][0]
+            if receiver_email.startswith("later") and sent.count(receiver_email) < 1:
+                sent.append(receiver_email)
+                deferred.append(envelope)
+            elif receiver_email.startswith("never"):
+                deferred.append(envelope)
+            else:
+                sent.append(receiver_email)
+        return deferred
+
+    smtp_pool.send.side_effect = send
+
+    async def scenario():
+        service = AsyncEmailService(smtp_pool, "sender@example.com", concurrency=2, max_attempts=3, retry_delay=0.01)
+        for receiver_email in ["a@example.com", "later@example.com", "never@example.com", "b@example.com"]:
+            service.enqueue_welcome_email(receiver_email)
+        await asyncio.sleep(0.2)
+        await service.close()
+
+    asyncio.run(scenario())
+
+    assert sorted(sent) == ["a@example.com", "b@example.com", "later@example.com", "later@example.com"]
+    never_attempts = [
+        call for call in smtp_pool.send.call_args_list
+        if any(envelope[1] == ["never@example.com"] for envelope in call.args[0])
+    ]
+    assert len(never_attempts) == 3
+    smtp_pool.close.assert_awaited_once()
@@ -1,30 +1,38 @@
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-import smtplib
 from celery import Task
-from config import get_settings
+from celery.utils.time import get_exponential_backoff_interval
 
+from user.application.email_service import EmailService
 
-settings = get_settings()
 
 class SendWelcomeEmailTask(Task):
     name = "send_welcome_email_task"
+    # Deferred by the SMTP server or the connection broke: try again later.
+    autoretry_for = (ConnectionError,)
+    retry_backoff = True
+    max_retries = 5
+
+    def __init__(self, email_service: EmailService):
+        self.email_service = email_service
 
     def run(self, receiver_email: str):
-        sender_email = "syw5141@gmail.com"
-        password = settings.email_password
-
-        message = MIMEMultipart()
-        message["From"] = sender_email
-        message["To"] = receiver_email
-        message["Subject"] = "회원 가입을 환영합니다."
-
-        body = "TIL 서비스를 이용해주셔서 감사합니다."
-        message.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(sender_email, password)
-            server.send_message(message)
-        
-    
\ No newline at end of file
+        self.email_service.send_email(receiver_email)
+
+
+class SendWelcomeEmailsTask(Task):
+    """Sends the welcome emails the outbox relay merged into one call, over one pooled connection."""
+
+    name = "send_welcome_emails_task"
+    max_retries = 5
+
+    def __init__(self, email_service: EmailService):
+        self.email_service = email_service
+
+    def run(self, receiver_emails: list[str]):
+        deferred = self.email_service.send_welcome_emails(receiver_emails)
+        if deferred:
+            # Only the deferred emails, with the backoff ``retry_backoff`` gives the single task.
+            raise self.retry(
+                kwargs={"receiver_emails": deferred},
+                countdown=get_exponential_backoff_interval(1, self.request.retries, 600, full_jitter=True),
+                exc=ConnectionError(f"{len(deferred)} welcome emails were not delivered"),
+            )
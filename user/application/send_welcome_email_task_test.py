@@ -0,0 +1,41 @@
+from celery import Celery
+
+from user.application.email_service import EmailService, MessageTemplate
+from user.application.send_welcome_email_task import SendWelcomeEmailTask, SendWelcomeEmailsTask
+
+
+def test_retries_deferred_welcome_email(mocker):
+    email_service = mocker.Mock(spec=EmailService)
+    email_service.send_email.side_effect = [ConnectionError("deferred"), None]
+    app = Celery("send-welcome-email-test", broker="memory://localhost/")
+    task = app.register_task(SendWelcomeEmailTask(email_service))
+
+    result = task.apply(kwargs={"receiver_email": "user@example.com"})
+
+    assert result.successful()
+    assert email_service.send_email.call_count == 2
+
+
+def test_retries_only_the_deferred_emails_of_a_batch(mocker):
+    email_service = mocker.Mock(spec=EmailService)
+    email_service.send_welcome_emails.side_effect = [["b@example.com"], []]
+    app = Celery("send-welcome-emails-test", broker="memory://localhost/")
+    task = app.register_task(SendWelcomeEmailsTask(email_service))
+
+    result = task.apply(kwargs={"receiver_emails": ["a@example.com", "b@example.com"]})
+
+    assert result.successful()
+    assert [call.args for call in email_service.send_welcome_emails.call_args_list] == [
+        (["a@example.com", "b@example.com"],),
+        (["b@example.com"],),
+    ]
+
+
+def test_message_template_only_adds_the_receiver():
+    template = MessageTemplate("sender@example.com", "환영합니다", "본문")
+
+    message = template.render("user@example.com")
+
+    assert message.startswith(b"To: user@example.com\r\n")
+    assert message.endswith(template.rendered)
+    assert b"From: sender@example.com\r\n" in message
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import AsyncContextManager, Awaitable, Callable
+
+from common.auth import forget_active_users
+from note.application.note_service import NoteService
+from user.domain.repository.user_repo import IAsyncUserRepository
+from user.domain.user import UserFilter
+
+
+class UserAdminService:
+    """Changes every user a ``UserFilter`` selects, ``batch_size`` users per transaction.
+
+    Users are never loaded: each chunk of ids is read with a keyset query and
+    changed with one UPDATE or DELETE, then committed in a ``transaction`` of
+    its own, so the rows locked at a time stay bounded however many users
+    match. The repositories are made inside each transaction. A failure
+    keeps the chunks already committed; repeating the request finishes the
+    job.
+    """
+
+    def __init__(
+        self,
+        user_repo: Callable[[], IAsyncUserRepository],
+        note_service: Callable[[], NoteService],
+        transaction: Callable[[], AsyncContextManager],
+        batch_size: int = 1000,
+    ):
+        self.user_repo = user_repo
+        self.note_service = note_service
+        self.transaction = transaction
+        self.batch_size = batch_size
+
+    async def _in_chunks(
+        self,
+        user_filter: UserFilter,
+        change: Callable[[IAsyncUserRepository, NoteService, list[str]], Awaitable[int]],
+        revokes_tokens: bool = False,
+    ) -> int:
+        count = 0
+        after_id = None
+        while True:
+            async with self.transaction():
+                user_repo = self.user_repo()
+                ids = await user_repo.find_ids(user_filter, after_id, self.batch_size)
+                if ids:
+                    count += await change(user_repo, self.note_service(), ids)
+            if revokes_tokens:
+                # After the commit, so no request can remember them as active again.
+                forget_active_users(*ids)
+            if len(ids) < self.batch_size:
+                return count
+            after_id = ids[-1]
+
+    async def deactivate_users(self, user_filter: UserFilter) -> int:
+        return await self._in_chunks(
+            user_filter, lambda user_repo, _, ids: user_repo.deactivate_many(ids, datetime.now()), revokes_tokens=True
+        )
+
+    async def update_memos(self, user_filter: UserFilter, memo: str | None) -> int:
+        return await self._in_chunks(
+            user_filter, lambda user_repo, _, ids: user_repo.update_memo_many(ids, memo, datetime.now())
+        )
+
+    async def delete_users(self, user_filter: UserFilter) -> int:
+        """Deletes the users with their notes; a chunk's notes go before its users."""
+
+        async def delete(user_repo: IAsyncUserRepository, note_service: NoteService, ids: list[str]) -> int:
+            await note_service.delete_user_notes(ids)
+            return await user_repo.delete_many(ids)
+
+        return await self._in_chunks(user_filter, delete, revokes_tokens=True)
@@ -0,0 +1,76 @@
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+
+from note.application.note_service import NoteService
+from user.application.user_admin_service import UserAdminService
+from user.domain.repository.user_repo import IAsyncUserRepository
+from user.domain.user import UserFilter
+
+
+def test_delete_users_walks_chunks_and_deletes_notes_first(mocker):
+    user_repo_mock = mocker.Mock(spec=IAsyncUserRepository)
+    note_service_mock = mocker.Mock(spec=NoteService)
+    user_repo_mock.find_ids.side_effect = [["ID_1", "ID_2"], ["ID_3", "ID_4"], ["ID_5"]]
+    user_repo_mock.delete_many.side_effect = lambda ids: len(ids)
+    calls = mocker.Mock()
+    calls.attach_mock(note_service_mock.delete_user_notes, "delete_user_notes")
+    calls.attach_mock(user_repo_mock.delete_many, "delete_many")
+
+    @asynccontextmanager
+    async def transaction():
+        yield
+        calls.commit()
+
+    user_filter = UserFilter(name_prefix="test")
+    service = UserAdminService(lambda: user_repo_mock, lambda: note_service_mock, transaction, batch_size=2)
+
+    assert asyncio.run(service.delete_users(user_filter)) == 5
+
+    assert [call.args for call in user_repo_mock.find_ids.call_args_list] == [
+        (user_filter, None, 2),
+        (user_filter, "ID_2", 2),
+        (user_filter, "ID_4", 2),
+    ]
+    # Each chunk commits on its own.
+    assert [(name, args[0] if args else None) for name, args, _ in calls.mock_calls] == [
+        ("delete_user_notes", ["ID_1", "ID_2"]),
+        ("delete_many", ["ID_1", "ID_2"]),
+        ("commit", None),
+        ("delete_user_notes", ["ID_3", "ID_4"]),
+        ("delete_many", ["ID_3", "ID_4"]),
+        ("commit", None),
+        ("delete_user_notes", ["ID_5"]),
+        ("delete_many", ["ID_5"]),
+        ("commit", None),
+    ]
+
+
+def test_empty_selection_changes_nothing(mocker):
+    user_repo_mock = mocker.Mock(spec=IAsyncUserRepository)
+    user_repo_mock.find_ids.return_value = []
+    note_service_mock = mocker.Mock(spec=NoteService)
+    service = UserAdminService(lambda: user_repo_mock, lambda: note_service_mock, nullcontext, batch_size=2)
+
+    assert asyncio.run(service.deactivate_users(UserFilter(ids=["NOT_EXIST"]))) == 0
+    user_repo_mock.deactivate_many.assert_not_called()
+
+
+def test_deactivated_users_are_looked_up_again_after_commit(mocker):
+    user_repo_mock = mocker.Mock(spec=IAsyncUserRepository)
+    user_repo_mock.find_ids.return_value = ["ID_1"]
+    user_repo_mock.deactivate_many.return_value = 1
+    committed = []
+    forget = mocker.patch(
+        "user.application.user_admin_service.forget_active_users", side_effect=lambda *ids: committed.append(ids)
+    )
+
+    @asynccontextmanager
+    async def transaction():
+        yield
+        committed.append("commit")
+
+    service = UserAdminService(lambda: user_repo_mock, mocker.Mock, transaction, batch_size=2)
+
+    assert asyncio.run(service.deactivate_users(UserFilter(ids=["ID_1"]))) == 1
+    assert committed == ["commit", ("ID_1",)]
+    forget.assert_called_once_with("ID_1")
@@ -1,32 +1,49 @@
 from datetime import datetime
+from functools import partial
 
 from fastapi import BackgroundTasks, HTTPException
 from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from common.auth import Role, create_access_token
-from user.application.email_service import EmailService
+from common.auth import Role, create_access_token, forget_active_users
+from common.outbox import OutboxMessage
+from note.application.note_service import NoteService
+from user.application.email_service import AsyncEmailService
 from user.application.send_welcome_email_task import SendWelcomeEmailTask
 from user.domain.exceptions import UserNotFoundException, EmailAlreadyExistsException
 from ulid import ULID  # type: ignore
-from user.domain.repository.user_repo import IUserRepository
-from user.domain.user import User
+from user.domain.repository.user_repo import IAsyncUserRepository
+from user.domain.user import User, UserFilter, UserSort
 from utils.crypto import Crypto
+from utils.db_utils import after_commit_on_loop
 from dependency_injector.wiring import inject
 
 
 class UserService:
     @inject
-    def __init__(self, user_repo: IUserRepository, email_service: EmailService, ulid: ULID, crypto: Crypto, send_welcome_email_task: SendWelcomeEmailTask):
+    def __init__(
+        self,
+        user_repo: IAsyncUserRepository,
+        note_service: NoteService,
+        email_service: AsyncEmailService | None,
+        ulid: ULID,
+        crypto: Crypto,
+        session: AsyncSession | Session | None = None,
+    ):
         self.user_repo = user_repo
+        self.note_service = note_service
+        self.email_service = email_service
         self.ulid = ulid
         self.crypto = crypto
-        self.send_welcome_email_task = send_welcome_email_task
+        # The request's unit of work, if any; the in-process welcome email waits for its commit.
+        self.session = session
 
-    def create_user(self, name: str, email: str, password: str, memo: str|None = None):
+    async def create_user(self, name: str, email: str, password: str, memo: str|None = None):
         _user = None
 
         try:
-            _user = self.user_repo.find_by_email(email)
+            _user = await self.user_repo.find_by_email(email)
         except Exception as e:
             if getattr(e, "status_code", None) != 422:
                 raise e
@@ -39,49 +56,84 @@ class UserService:
             id=self.ulid.generate(),
             name=name,
             email=email,
-            password=self.crypto.encrypt(password),
+            password=await self.crypto.encrypt(password),
             created_at=now,
             updated_at=now,
             memo=memo,
         )
-        self.user_repo.save(user)
-
-        self.send_welcome_email_task.delay(user.email)
+        if self.email_service is not None:
+            await self.user_repo.save(user)
+            enqueue = partial(self.email_service.enqueue_welcome_email, user.email)
+            if self.session is not None:
+                after_commit_on_loop(self.session, enqueue)
+            else:
+                enqueue()
+            return user
+
+        # Committed with the user; the outbox relay hands it to the broker.
+        welcome_email = OutboxMessage(
+            id=self.ulid.generate(),
+            task=SendWelcomeEmailTask.name,
+            kwargs={"receiver_email": user.email},
+            created_at=now,
+        )
+        await self.user_repo.save(user, [welcome_email])
         return user
 
-    def update_user(
+    async def update_user(
         self, user_id: str, name: str | None = None, password: str | None = None
     ):
-        user = self.user_repo.find_by_id(user_id)
+        user = await self.user_repo.find_by_id(user_id)
         if not user:
             raise UserNotFoundException("User not found")
 
         if name:
             user.name = name
         if password:
-            user.password = self.crypto.encrypt(password)
+            user.password = await self.crypto.encrypt(password)
 
         user.updated_at = datetime.now()
-        self.user_repo.update(user)
+        await self.user_repo.update(user)
         return user
 
-    def get_users(self, page: int, items_per_page: int) -> tuple[int, list[User]]:
-        return self.user_repo.get_users(page, items_per_page)
-
-    def delete_user(self, user_id: str):
-        user = self.user_repo.find_by_id(user_id)
+    async def get_users(
+        self,
+        page: int,
+        items_per_page: int,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[User]]:
+        return await self.user_repo.get_users(page, items_per_page, after, user_filter, sort)
+
+    async def delete_user(self, user_id: str):
+        user = await self.user_repo.find_by_id(user_id)
         if not user:
             raise UserNotFoundException("User not found")
 
-        self.user_repo.delete(user_id)
+        # The user's notes and tag links go first, as in ``UserAdminService.delete_users``.
+        await self.note_service.delete_user_notes([user_id])
+        await self.user_repo.delete(user_id)
+        forget = partial(forget_active_users, user_id)
+        if self.session is not None:
+            after_commit_on_loop(self.session, forget)
+        else:
+            forget()
         return user
 
-    def login(self, email: str, password: str):
-        user = self.user_repo.find_by_email(email)
+    async def login(self, email: str, password: str):
+        user = await self.user_repo.find_by_email(email)
 
-        if not self.crypto.verify(password, user.password):
+        verified, new_hash = await self.crypto.verify_and_update(password, user.password)
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
             )
+        if not user.is_active:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is deactivated")
+        if new_hash:
+            # The hash predates the configured bcrypt rounds.
+            user.password = new_hash
+            await self.user_repo.update(user)
         access_token = create_access_token({"user_id": user.id}, role=Role.USER)
         return access_token
@@ -1,11 +1,14 @@
 
+import asyncio
 from freezegun import freeze_time
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
-from user.application.email_service import EmailService
-from user.application.send_welcome_email_task import SendWelcomeEmailTask
+from common.outbox import OutboxMessage
+from note.application.note_service import NoteService
+from user.application.email_service import AsyncEmailService
 from user.application.user_service import UserService
-from user.domain.repository.user_repo import IUserRepository
+from user.domain.repository.user_repo import IAsyncUserRepository
 from ulid import ULID # type: ignore
 from datetime import datetime
 
@@ -15,36 +18,36 @@ from utils.crypto import Crypto
 
 @pytest.fixture
 def user_service_dependencies(mocker):
-    user_repo_mock = mocker.Mock(spec=IUserRepository)
-    email_service_mock = mocker.Mock(spec=EmailService)
+    user_repo_mock = mocker.Mock(spec=IAsyncUserRepository)
+    note_service_mock = mocker.Mock(spec=NoteService)
+    email_service_mock = mocker.Mock(spec=AsyncEmailService)
     ulid_mock = mocker.Mock(spec=ULID)
     crypto_mock = mocker.Mock(spec=Crypto)
-    send_welcome_email_task_mock = mocker.Mock(spec=SendWelcomeEmailTask)
 
     return (
         user_repo_mock,
+        note_service_mock,
         email_service_mock,
         ulid_mock,
         crypto_mock,
-        send_welcome_email_task_mock,
     )
 
 @freeze_time("2021-01-01")
 def test_create_user_success(user_service_dependencies):
     (
         user_repo_mock,
+        note_service_mock,
         email_service_mock,
         ulid_mock,
         crypto_mock,
-        send_welcome_email_task_mock,
     ) = user_service_dependencies
 
     user_service = UserService(
         user_repo=user_repo_mock,
-        email_service=email_service_mock,
+        note_service=note_service_mock,
+        email_service=None,
         ulid=ulid_mock,
         crypto=crypto_mock,
-        send_welcome_email_task=send_welcome_email_task_mock,
     )
 
     id = "ID_TEST"
@@ -58,10 +61,8 @@ def test_create_user_success(user_service_dependencies):
     user_repo_mock.find_by_email.return_value = None
     user_repo_mock.save.return_value = None
     crypto_mock.encrypt.return_value = password
-    send_welcome_email_task_mock.delay.return_value = None
-    send_welcome_email_task_mock.run.return_value = None
 
-    user = user_service.create_user(name, email, password, memo)
+    user = asyncio.run(user_service.create_user(name, email, password, memo))
 
     assert isinstance(user, User)
     assert user.id == id
@@ -72,10 +73,103 @@ def test_create_user_success(user_service_dependencies):
     assert user.created_at == now
     assert user.updated_at == now
 
-    user_service.user_repo.find_by_email.assert_called_once_with(email)
-    user_service.user_repo.save.assert_called_once_with(user)
-    user_service.crypto.encrypt.assert_called_once_with(password)
-    send_welcome_email_task_mock.delay.assert_called_once_with(email)
+    user_service.user_repo.find_by_email.assert_awaited_once_with(email)
+    user_service.user_repo.save.assert_awaited_once_with(
+        user,
+        [OutboxMessage(id=id, task="send_welcome_email_task", kwargs={"receiver_email": email}, created_at=now)],
+    )
+    user_service.crypto.encrypt.assert_awaited_once_with(password)
+
+
+def test_create_user_hands_welcome_email_to_in_process_service(user_service_dependencies):
+    user_repo_mock, note_service_mock, email_service_mock, ulid_mock, crypto_mock = user_service_dependencies
+    user_service = UserService(
+        user_repo=user_repo_mock,
+        note_service=note_service_mock,
+        email_service=email_service_mock,
+        ulid=ulid_mock,
+        crypto=crypto_mock,
+    )
+    ulid_mock.generate.return_value = "ID_TEST"
+    user_repo_mock.find_by_email.return_value = None
+    crypto_mock.encrypt.return_value = "HASH"
+
+    user = asyncio.run(user_service.create_user("Test User", "test@example.com", "123456"))
+
+    user_repo_mock.save.assert_awaited_once_with(user)
+    email_service_mock.enqueue_welcome_email.assert_called_once_with("test@example.com")
+
 
 
 
+
+@pytest.mark.parametrize("commit", [True, False])
+def test_in_process_welcome_email_waits_for_the_commit(user_service_dependencies, commit):
+    user_repo_mock, note_service_mock, email_service_mock, ulid_mock, crypto_mock = user_service_dependencies
+    ulid_mock.generate.return_value = "ID_TEST"
+    user_repo_mock.find_by_email.return_value = None
+    crypto_mock.encrypt.return_value = "HASH"
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with AsyncSession(engine) as session:
+            await session.begin()
+            user_service = UserService(
+                user_repo=user_repo_mock,
+                note_service=note_service_mock,
+                email_service=email_service_mock,
+                ulid=ulid_mock,
+                crypto=crypto_mock,
+                session=session,
+            )
+            await user_service.create_user("Test User", "test@example.com", "123456")
+            email_service_mock.enqueue_welcome_email.assert_not_called()
+            await (session.commit() if commit else session.rollback())
+        await engine.dispose()
+
+    asyncio.run(run())
+
+    assert email_service_mock.enqueue_welcome_email.call_count == int(commit)
+
+
+@pytest.mark.parametrize("new_hash", [None, "NEW_HASH"])
+def test_login_rehashes_outdated_password(user_service_dependencies, new_hash):
+    user_repo_mock, note_service_mock, email_service_mock, ulid_mock, crypto_mock = user_service_dependencies
+    user_service = UserService(
+        user_repo=user_repo_mock,
+        note_service=note_service_mock,
+        email_service=email_service_mock,
+        ulid=ulid_mock,
+        crypto=crypto_mock,
+    )
+    now = datetime.now()
+    user = User(id="ID_TEST", name="Test User", email="test@example.com", password="OLD_HASH", memo=None, created_at=now, updated_at=now)
+    user_repo_mock.find_by_email.return_value = user
+    crypto_mock.verify_and_update.return_value = (True, new_hash)
+
+    asyncio.run(user_service.login("test@example.com", "123456"))
+
+    crypto_mock.verify_and_update.assert_awaited_once_with("123456", "OLD_HASH")
+    if new_hash:
+        assert user.password == new_hash
+        user_repo_mock.update.assert_awaited_once_with(user)
+    else:
+        user_repo_mock.update.assert_not_awaited()
+
+
+def test_delete_user_deletes_the_users_notes_first(user_service_dependencies, mocker):
+    user_repo_mock, note_service_mock, email_service_mock, ulid_mock, crypto_mock = user_service_dependencies
+    user_service = UserService(
+        user_repo=user_repo_mock,
+        note_service=note_service_mock,
+        email_service=email_service_mock,
+        ulid=ulid_mock,
+        crypto=crypto_mock,
+    )
+    calls = mocker.Mock()
+    calls.attach_mock(note_service_mock.delete_user_notes, "delete_user_notes")
+    calls.attach_mock(user_repo_mock.delete, "delete")
+
+    asyncio.run(user_service.delete_user("ID_TEST"))
+
+    assert calls.mock_calls == [mocker.call.delete_user_notes(["ID_TEST"]), mocker.call.delete("ID_TEST")]
@@ -1,11 +1,13 @@
 from abc import ABCMeta, abstractmethod
+from datetime import datetime
 
-from user.domain.user import User
+from common.outbox import OutboxMessage
+from user.domain.user import User, UserFilter, UserSort
 
 
 class IUserRepository(metaclass=ABCMeta):
     @abstractmethod
-    def save(self, user: User):
+    def save(self, user: User, outbox: list[OutboxMessage] | None = None):
         raise NotImplementedError
 
     @abstractmethod
@@ -21,9 +23,86 @@ class IUserRepository(metaclass=ABCMeta):
         raise NotImplementedError
 
     @abstractmethod
-    def get_users(self, page: int, items_per_page: int) -> tuple[int, list[User]]:
+    def get_users(
+        self,
+        page: int,
+        items_per_page: int,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[User]]:
+        """A page of users in ``sort`` order; ``after`` holds the previous page's last sort value and id.
+
+        Only the ``UserResponse`` fields are loaded: password and memo are None.
+        """
         raise NotImplementedError
 
     @abstractmethod
     def delete(self, id: str):
         raise NotImplementedError
+
+    @abstractmethod
+    def find_ids(self, user_filter: UserFilter, after_id: str | None = None, limit: int = 1000) -> list[str]:
+        """Ids of the users ``user_filter`` selects, in id order, after ``after_id``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def deactivate_many(self, ids: list[str], updated_at: datetime) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_memo_many(self, ids: list[str], memo: str | None, updated_at: datetime) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_many(self, ids: list[str]) -> int:
+        raise NotImplementedError
+
+
+class IAsyncUserRepository(metaclass=ABCMeta):
+    @abstractmethod
+    async def save(self, user: User, outbox: list[OutboxMessage] | None = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> User:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_by_id(self, id: str) -> User:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, user: User):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_users(
+        self,
+        page: int,
+        items_per_page: int,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[User]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, id: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_ids(self, user_filter: UserFilter, after_id: str | None = None, limit: int = 1000) -> list[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def deactivate_many(self, ids: list[str], updated_at: datetime) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_memo_many(self, ids: list[str], memo: str | None, updated_at: datetime) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_many(self, ids: list[str]) -> int:
+        raise NotImplementedError
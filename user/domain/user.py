@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Literal
 
 
 @dataclass
@@ -11,3 +12,19 @@ class User:
     created_at: datetime
     updated_at: datetime
     memo: str | None
+    is_active: bool = True
+
+
+@dataclass
+class UserFilter:
+    """Selects users for admin operations; unset fields match every user."""
+
+    ids: list[str] | None = None
+    name_prefix: str | None = None
+    email_domain: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+# Orders admins can list users in; a leading "-" sorts descending, ties go by id.
+UserSort = Literal["id", "-id", "created_at", "-created_at", "name", "-name"]
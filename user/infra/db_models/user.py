@@ -1,11 +1,16 @@
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text
+from sqlalchemy import Boolean, Index, String, DateTime, Text, true
 from sqlalchemy.orm import Mapped, mapped_column
 from database import Base
 
 
 class User(Base):
     __tablename__ = "User"
+    __table_args__ = (
+        # Admin listings sorted by signup time or name.
+        Index("ix_User_created_at_id", "created_at", "id"),
+        Index("ix_User_name", "name"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     name: Mapped[str] = mapped_column(String(32), nullable=False)
@@ -14,3 +19,4 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     memo: Mapped[str] = mapped_column(Text, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
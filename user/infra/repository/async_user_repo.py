@@ -0,0 +1,100 @@
+from abc import abstractmethod
+from datetime import datetime
+
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from common.outbox import OutboxMessage
+from database import AsyncSessionLocal
+from user.domain.repository.user_repo import IAsyncUserRepository, IUserRepository
+from user.domain.user import User as UserVO, UserFilter, UserSort
+from user.infra.repository.user_repo import UserRepository
+from utils.db_utils import bind_session
+
+
+class UserRepositoryAdapter(IAsyncUserRepository):
+    """Exposes the ``UserRepository`` queries through the async interface."""
+
+    @abstractmethod
+    async def _call(self, method: str, *args, **kwargs):
+        """Runs ``UserRepository.<method>`` and returns its result."""
+        raise NotImplementedError
+
+    async def save(self, user: UserVO, outbox: list[OutboxMessage] | None = None):
+        return await self._call("save", user, outbox)
+
+    async def find_by_email(self, email: str) -> UserVO:
+        return await self._call("find_by_email", email)
+
+    async def find_by_id(self, id: str) -> UserVO:
+        return await self._call("find_by_id", id)
+
+    async def update(self, user: UserVO):
+        return await self._call("update", user)
+
+    async def get_users(
+        self,
+        page: int = 1,
+        items_per_page: int = 10,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[UserVO]]:
+        return await self._call("get_users", page, items_per_page, after, user_filter, sort)
+
+    async def delete(self, id: str):
+        return await self._call("delete", id)
+
+    async def find_ids(self, user_filter: UserFilter, after_id: str | None = None, limit: int = 1000) -> list[str]:
+        return await self._call("find_ids", user_filter, after_id, limit)
+
+    async def deactivate_many(self, ids: list[str], updated_at: datetime) -> int:
+        return await self._call("deactivate_many", ids, updated_at)
+
+    async def update_memo_many(self, ids: list[str], memo: str | None, updated_at: datetime) -> int:
+        return await self._call("update_memo_many", ids, memo, updated_at)
+
+    async def delete_many(self, ids: list[str]) -> int:
+        return await self._call("delete_many", ids)
+
+
+class AsyncUserRepository(UserRepositoryAdapter):
+    """Runs the repository on the async engine.
+
+    The ORM code is shared with ``UserRepository`` through ``run_sync``, which
+    drives the blocking session API over the async driver without a thread.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        session: AsyncSession | None = None,
+    ):
+        self.session_factory = session_factory
+        # The request's unit of work, if any; otherwise each call gets its own transaction.
+        self.session = session
+
+    async def _call(self, method: str, *args, **kwargs):
+        if self.session is not None:
+            return await self.session.run_sync(self._run, method, *args, **kwargs)
+        async with self.session_factory.begin() as session:
+            return await session.run_sync(self._run, method, *args, **kwargs)
+
+    @staticmethod
+    def _run(sync_session: Session, method: str, *args, **kwargs):
+        return getattr(UserRepository(bind_session(sync_session)), method)(*args, **kwargs)
+
+
+class ThreadedUserRepository(UserRepositoryAdapter):
+    """Runs a blocking repository in Starlette's threadpool."""
+
+    def __init__(self, user_repo: IUserRepository, session: Session | None = None):
+        self.user_repo = user_repo
+        # The request's unit of work (``database.sync_session_scope``), if any;
+        # otherwise each call gets ``user_repo``'s own transaction.
+        self.session = session
+
+    async def _call(self, method: str, *args, **kwargs):
+        user_repo = UserRepository(bind_session(self.session)) if self.session is not None else self.user_repo
+        return await run_in_threadpool(getattr(user_repo, method), *args, **kwargs)
@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime
+from fastapi import HTTPException
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from common.outbox import Outbox, OutboxMessage
+from database import Base, session_scope, sync_session_scope
+from user.domain.user import User as UserVO, UserFilter
+from user.infra.repository.async_user_repo import AsyncUserRepository, ThreadedUserRepository, UserRepositoryAdapter
+from user.infra.repository.user_repo import UserRepository
+
+
+@pytest.fixture
+def async_session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(autoflush=False, bind=engine)
+    asyncio.run(engine.dispose())
+
+
+def make_user(id: str = "ID_TEST", email: str = "test@example.com") -> UserVO:
+    now = datetime(2021, 1, 1)
+    return UserVO(
+        id=id,
+        name="Test User",
+        email=email,
+        password="hashed",
+        created_at=now,
+        updated_at=now,
+        memo=None,
+    )
+
+
+def test_save_and_find_by_email(async_session_factory):
+    user_repository = AsyncUserRepository(session_factory=async_session_factory)
+
+    async def scenario():
+        await user_repository.save(make_user())
+        return await user_repository.find_by_email("test@example.com")
+
+    assert asyncio.run(scenario()) == make_user()
+
+
+def test_find_by_id_user_not_exist(async_session_factory):
+    user_repository = AsyncUserRepository(session_factory=async_session_factory)
+
+    with pytest.raises(HTTPException) as exception:
+        asyncio.run(user_repository.find_by_id("NOT_EXIST"))
+    assert exception.value.status_code == 422
+
+
+def test_threaded_repository_delegates(mocker):
+    user_repo_mock = mocker.Mock(spec=UserRepository)
+    user_repo_mock.find_by_id.return_value = make_user()
+    user_repository = ThreadedUserRepository(user_repo=user_repo_mock)
+
+    assert asyncio.run(user_repository.find_by_id("ID_TEST")) == make_user()
+    user_repo_mock.find_by_id.assert_called_once_with("ID_TEST")
+
+
+def test_threaded_repository_reads_users_from_a_database():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    user_repository = ThreadedUserRepository(user_repo=UserRepository(sessionmaker(bind=engine).begin))
+
+    async def scenario():
+        await user_repository.save(make_user())
+        return await user_repository.find_by_email("test@example.com"), await user_repository.find_by_id("ID_TEST")
+
+    assert asyncio.run(scenario()) == (make_user(), make_user())
+    engine.dispose()
+
+
+def test_unit_of_work_shares_one_transaction(async_session_factory):
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with session_scope(async_session_factory) as session:
+                user_repository = AsyncUserRepository(session=session)
+                await user_repository.save(make_user())
+                assert await user_repository.find_by_id("ID_TEST") == make_user()
+                raise RuntimeError("rollback")
+
+        await AsyncUserRepository(session_factory=async_session_factory).find_by_id("ID_TEST")
+
+    with pytest.raises(HTTPException):
+        asyncio.run(scenario())
+
+
+def test_threaded_unit_of_work_shares_one_transaction():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    user_repo = UserRepository(session_factory.begin)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with sync_session_scope(session_factory) as session:
+                user_repository = ThreadedUserRepository(user_repo=user_repo, session=session)
+                await user_repository.save(make_user())
+                assert await user_repository.find_by_id("ID_TEST") == make_user()
+                raise RuntimeError("rollback")
+
+        async with sync_session_scope(session_factory) as session:
+            await ThreadedUserRepository(user_repo=user_repo, session=session).save(make_user())
+        return await ThreadedUserRepository(user_repo=user_repo).find_by_id("ID_TEST")
+
+    assert asyncio.run(scenario()) == make_user()
+    engine.dispose()
+
+
+def test_outbox_messages_commit_and_roll_back_with_the_user(async_session_factory):
+    message = OutboxMessage(
+        id="MESSAGE_ID", task="send_welcome_email_task", kwargs={"receiver_email": "test@example.com"},
+        created_at=datetime(2021, 1, 1),
+    )
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            async with session_scope(async_session_factory) as session:
+                await AsyncUserRepository(session=session).save(make_user(), [message])
+                raise RuntimeError("rollback")
+        async with async_session_factory() as session:
+            assert (await session.scalars(select(Outbox))).all() == []
+
+        await AsyncUserRepository(session_factory=async_session_factory).save(make_user(), [message])
+        async with async_session_factory() as session:
+            return (await session.scalars(select(Outbox))).all()
+
+    [row] = asyncio.run(scenario())
+    assert (row.id, row.task, row.kwargs) == ("MESSAGE_ID", "send_welcome_email_task", {"receiver_email": "test@example.com"})
+
+
+def test_bulk_changes_select_users_in_id_chunks(async_session_factory):
+    user_repository = AsyncUserRepository(session_factory=async_session_factory)
+    now = datetime(2021, 1, 2)
+
+    async def scenario():
+        for i in range(5):
+            await user_repository.save(make_user(id=f"ID_{i}", email=f"user{i}@{'example.com' if i % 2 else 'test.com'}"))
+        user_filter = UserFilter(email_domain="example.com")
+        first = await user_repository.find_ids(user_filter, limit=1)
+        rest = await user_repository.find_ids(user_filter, after_id=first[-1])
+        deactivated = await user_repository.deactivate_many(["ID_0", "ID_1"], now)
+        again = await user_repository.deactivate_many(["ID_0", "ID_1"], now)
+        memos = await user_repository.update_memo_many(["ID_2", "NOT_EXIST"], "memo", now)
+        deleted = await user_repository.delete_many(["ID_3", "ID_4"])
+        remaining = await user_repository.find_ids(UserFilter())
+        return first, rest, deactivated, again, memos, deleted, remaining, [
+            await user_repository.find_by_id(id) for id in ("ID_0", "ID_2")
+        ]
+
+    first, rest, deactivated, again, memos, deleted, remaining, (user_0, user_2) = asyncio.run(scenario())
+
+    assert (first, rest) == (["ID_1"], ["ID_3"])
+    assert (deactivated, again, memos, deleted) == (2, 0, 1, 2)
+    assert remaining == ["ID_0", "ID_1", "ID_2"]
+    assert (user_0.is_active, user_0.updated_at) == (False, now)
+    assert (user_2.memo, user_2.is_active) == ("memo", True)
+
+
+def test_get_users_filters_sorts_and_pages_by_keyset(async_session_factory):
+    user_repository = AsyncUserRepository(session_factory=async_session_factory)
+    names = ["bob", "alice", "bob", "carol", "alicia"]
+
+    async def scenario():
+        for i, name in enumerate(names):
+            user = make_user(id=f"ID_{i}", email=f"{name}{i}@{'example.com' if i != 3 else 'test.com'}")
+            user.name, user.memo = name, "memo"
+            await user_repository.save(user)
+        user_filter = UserFilter(email_domain="example.com")
+        total, first = await user_repository.get_users(1, 2, user_filter=user_filter, sort="-name")
+        last = first[-1]
+        _, second = await user_repository.get_users(1, 2, (last.name, last.id), user_filter, "-name")
+        _, prefixed = await user_repository.get_users(1, 10, user_filter=UserFilter(name_prefix="ali"), sort="name")
+        return total, first, second, prefixed
+
+    total, first, second, prefixed = asyncio.run(scenario())
+
+    assert total == 4
+    assert [(user.name, user.id) for user in first + second] == [
+        ("bob", "ID_2"), ("bob", "ID_0"), ("alicia", "ID_4"), ("alice", "ID_1"),
+    ]
+    assert [user.id for user in prefixed] == ["ID_1", "ID_4"]
+    # List views leave the password hash and memo unloaded.
+    assert {(user.password, user.memo) for user in first} == {(None, None)}
+
+
+def test_adapters_must_implement_call():
+    class Incomplete(UserRepositoryAdapter):
+        pass
+
+    with pytest.raises(TypeError, match="_call"):
+        Incomplete()  # type: ignore
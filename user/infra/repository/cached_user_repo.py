@@ -0,0 +1,198 @@
+import asyncio
+import dataclasses
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from common.metrics import cache_requests
+from common.outbox import OutboxMessage
+from user.domain.repository.user_repo import IAsyncUserRepository
+from user.domain.user import User as UserVO, UserFilter, UserSort
+from utils.cache import LocalCache, RedisCache
+from utils.db_utils import after_transaction_on_loop
+
+# Cached for emails no user has; stored as an empty id in Redis.
+NOT_FOUND = ""
+
+
+def user_key(id: str) -> str:
+    return f"id:{id}"
+
+
+def email_key(email: str) -> str:
+    return f"email:{email.lower()}"
+
+
+def encode_user(user: UserVO) -> str:
+    """The user as JSON for Redis, without its password hash."""
+    values = dataclasses.asdict(user)
+    del values["password"]
+    values["created_at"] = user.created_at.isoformat()
+    values["updated_at"] = user.updated_at.isoformat()
+    return json.dumps(values)
+
+
+def decode_user(value: str) -> UserVO:
+    values = json.loads(value)
+    values["created_at"] = datetime.fromisoformat(values["created_at"])
+    values["updated_at"] = datetime.fromisoformat(values["updated_at"])
+    return UserVO(password=None, **values)  # type: ignore
+
+
+class UserCache:
+    """Users by id, and user ids by email, in a local LRU backed by an optional Redis tier.
+
+    Emails map to ids rather than users, so deleting a user only has to drop
+    its id entry. Emails without a user are cached for ``negative_ttl``.
+    Password hashes stay in process: users read from Redis have password None.
+    """
+
+    def __init__(self, local: LocalCache, remote: RedisCache | None = None, negative_ttl: float = 5):
+        self.local = local
+        self.remote = remote
+        self.negative_ttl = negative_ttl
+        self._pending: set[asyncio.Task] = set()
+
+    async def _get(self, key: str, decode) -> object | None:
+        value = self.local.get(key)
+        if value is not None:
+            cache_requests.labels("user", "local", "hit").inc()
+            return value
+        cache_requests.labels("user", "local", "miss").inc()
+        if self.remote is None:
+            return None
+        raw = await self.remote.get(key)
+        if raw is None:
+            cache_requests.labels("user", "redis", "miss").inc()
+            return None
+        cache_requests.labels("user", "redis", "hit").inc()
+        value = decode(raw)
+        self.local.set(key, value, ttl=self.negative_ttl if value == NOT_FOUND else None)
+        return value
+
+    async def get_user(self, id: str) -> UserVO | None:
+        user = await self._get(user_key(id), decode_user)
+        # Services modify the users they load, so never hand out the cached instance.
+        return dataclasses.replace(user) if user is not None else None  # type: ignore
+
+    async def get_user_id(self, email: str) -> str | None:
+        """The id of the user with ``email``, ``NOT_FOUND`` if there is none, or None if unknown."""
+        return await self._get(email_key(email), str)  # type: ignore
+
+    async def put_user(self, user: UserVO):
+        user = dataclasses.replace(user)
+        self.local.set(user_key(user.id), user)
+        self.local.set(email_key(user.email), user.id)
+        if self.remote is not None:
+            await self.remote.set(user_key(user.id), encode_user(user))
+            await self.remote.set(email_key(user.email), user.id)
+
+    async def put_missing_email(self, email: str):
+        self.local.set(email_key(email), NOT_FOUND, ttl=self.negative_ttl)
+        if self.remote is not None:
+            await self.remote.set(email_key(email), NOT_FOUND, ttl=self.negative_ttl)
+
+    async def invalidate(self, *keys: str):
+        self.local.delete(*keys)
+        if self.remote is not None:
+            await self.remote.delete(*keys)
+
+    def invalidate_soon(self, *keys: str):
+        """``invalidate`` from synchronous code running on the event loop."""
+        self.local.delete(*keys)
+        if self.remote is not None:
+            task = asyncio.get_running_loop().create_task(self.remote.delete(*keys))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+
+class CachedUserRepository(IAsyncUserRepository):
+    """Serves ``find_by_id`` and ``find_by_email`` from a ``UserCache`` and invalidates it on writes.
+
+    Entries are dropped when written and again when ``session``'s transaction
+    ends, so a lookup racing an uncommitted write can't keep the old row
+    cached, and neither can one of a write that is rolled back.
+
+    ``find_by_id`` may return a user whose password is None; ``find_by_email``,
+    which login verifies against, and ``update`` load the hash from the database.
+    """
+
+    def __init__(self, user_repo: IAsyncUserRepository, cache: UserCache, session: AsyncSession | Session | None = None):
+        self.user_repo = user_repo
+        self.cache = cache
+        self.session = session
+
+    async def find_by_id(self, id: str) -> UserVO:
+        user = await self.cache.get_user(id)
+        if user is None:
+            user = await self.user_repo.find_by_id(id)
+            await self.cache.put_user(user)
+        return user
+
+    async def find_by_email(self, email: str) -> UserVO:
+        user_id = await self.cache.get_user_id(email)
+        if user_id == NOT_FOUND:
+            raise HTTPException(status_code=422, detail="User not found")
+        if user_id is not None:
+            user = await self.cache.get_user(user_id)
+            if user is not None and user.email.lower() == email.lower() and user.password is not None:
+                return user
+        try:
+            user = await self.user_repo.find_by_email(email)
+        except HTTPException as e:
+            if e.status_code == 422:
+                await self.cache.put_missing_email(email)
+            raise
+        await self.cache.put_user(user)
+        return user
+
+    async def save(self, user: UserVO, outbox: list[OutboxMessage] | None = None):
+        await self.user_repo.save(user, outbox)
+        await self._invalidate(user_key(user.id), email_key(user.email))
+
+    async def update(self, user: UserVO):
+        if user.password is None:
+            user.password = (await self.user_repo.find_by_id(user.id)).password
+        result = await self.user_repo.update(user)
+        await self._invalidate(user_key(user.id))
+        return result
+
+    async def get_users(
+        self,
+        page: int = 1,
+        items_per_page: int = 10,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[UserVO]]:
+        return await self.user_repo.get_users(page, items_per_page, after, user_filter, sort)
+
+    async def delete(self, id: str):
+        await self.user_repo.delete(id)
+        await self._invalidate(user_key(id))
+
+    async def find_ids(self, user_filter: UserFilter, after_id: str | None = None, limit: int = 1000) -> list[str]:
+        return await self.user_repo.find_ids(user_filter, after_id, limit)
+
+    async def deactivate_many(self, ids: list[str], updated_at: datetime) -> int:
+        count = await self.user_repo.deactivate_many(ids, updated_at)
+        await self._invalidate(*map(user_key, ids))
+        return count
+
+    async def update_memo_many(self, ids: list[str], memo: str | None, updated_at: datetime) -> int:
+        count = await self.user_repo.update_memo_many(ids, memo, updated_at)
+        await self._invalidate(*map(user_key, ids))
+        return count
+
+    async def delete_many(self, ids: list[str]) -> int:
+        count = await self.user_repo.delete_many(ids)
+        await self._invalidate(*map(user_key, ids))
+        return count
+
+    async def _invalidate(self, *keys: str):
+        await self.cache.invalidate(*keys)
+        if self.session is not None:
+            after_transaction_on_loop(self.session, lambda: self.cache.invalidate_soon(*keys))
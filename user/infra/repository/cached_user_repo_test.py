@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from common.metrics import cache_requests
+from user.domain.user import User
+from user.infra.repository.cached_user_repo import CachedUserRepository, UserCache, user_key
+from utils.cache import LocalCache, RedisCache
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_user(**overrides) -> User:
+    values = dict(
+        id="USER_ID",
+        name="tester",
+        email="tester@example.com",
+        password="hashed",
+        created_at=NOW,
+        updated_at=NOW,
+        memo=None,
+    )
+    values.update(overrides)
+    return User(**values)  # type: ignore
+
+
+def not_found():
+    return HTTPException(status_code=422, detail="User not found")
+
+
+def test_find_by_id_and_email_are_read_through(mocker):
+    user_repo = mocker.AsyncMock()
+    user_repo.find_by_id.return_value = make_user()
+    repo = CachedUserRepository(user_repo, UserCache(LocalCache()))
+    hits, misses = (cache_requests.labels("user", "local", result).get() for result in ("hit", "miss"))
+
+    async def run():
+        first = await repo.find_by_id("USER_ID")
+        first.name = "changed"
+        assert (await repo.find_by_id("USER_ID")).name == "tester"
+        assert (await repo.find_by_email("TESTER@example.com")).id == "USER_ID"
+
+    asyncio.run(run())
+
+    user_repo.find_by_id.assert_called_once_with("USER_ID")
+    user_repo.find_by_email.assert_not_called()
+    # find_by_email reads the email's id, then the user, both from the local tier.
+    assert cache_requests.labels("user", "local", "hit").get() == hits + 3
+    assert cache_requests.labels("user", "local", "miss").get() == misses + 1
+    assert len(repo.cache.local) == 2
+
+
+def test_unknown_emails_are_cached_until_a_user_signs_up(mocker):
+    user_repo = mocker.AsyncMock()
+    user_repo.find_by_email.side_effect = [not_found(), make_user()]
+    repo = CachedUserRepository(user_repo, UserCache(LocalCache()))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                await repo.find_by_email("tester@example.com")
+            assert exc_info.value.status_code == 422
+        await repo.save(make_user())
+        return await repo.find_by_email("tester@example.com")
+
+    assert asyncio.run(run()).id == "USER_ID"
+    assert user_repo.find_by_email.call_count == 2
+
+
+def test_update_and_delete_invalidate(mocker):
+    user_repo = mocker.AsyncMock()
+    user_repo.find_by_id.side_effect = [make_user(), make_user(name="renamed")]
+    user_repo.find_by_email.side_effect = not_found()
+    repo = CachedUserRepository(user_repo, UserCache(LocalCache()))
+
+    async def run():
+        await repo.find_by_id("USER_ID")
+        await repo.update(make_user(name="renamed"))
+        assert (await repo.find_by_id("USER_ID")).name == "renamed"
+        await repo.delete("USER_ID")
+        with pytest.raises(HTTPException):
+            await repo.find_by_email("tester@example.com")
+
+    asyncio.run(run())
+
+    user_repo.find_by_email.assert_called_once_with("tester@example.com")
+
+
+def test_invalidates_again_after_commit(mocker):
+    user_repo = mocker.AsyncMock()
+    cache = UserCache(LocalCache())
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with AsyncSession(engine) as session:
+            async with session.begin():
+                repo = CachedUserRepository(user_repo, cache, session=session)
+                await repo.update(make_user(name="renamed"))
+                # A concurrent request reads the row before this one commits.
+                await cache.put_user(make_user())
+            assert cache.local.get(user_key("USER_ID")) is None
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_redis_tier_is_shared_between_processes(mocker):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis()
+    user_repo = mocker.AsyncMock()
+    user_repo.find_by_id.return_value = make_user()
+    first = CachedUserRepository(user_repo, UserCache(LocalCache(), RedisCache(client, prefix="user:")))
+    second = CachedUserRepository(user_repo, UserCache(LocalCache(), RedisCache(client, prefix="user:")))
+
+    async def run():
+        await first.find_by_id("USER_ID")
+        assert await second.find_by_id("USER_ID") == make_user(password=None)
+        await first.update(make_user(name="renamed"))
+        assert await client.get("user:id:USER_ID") is None
+
+    asyncio.run(run())
+
+    user_repo.find_by_id.assert_called_once_with("USER_ID")
+
+
+def test_password_hashes_stay_out_of_redis(mocker):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis()
+    user_repo = mocker.AsyncMock()
+    user_repo.find_by_id.return_value = make_user()
+    user_repo.find_by_email.return_value = make_user()
+    first = CachedUserRepository(user_repo, UserCache(LocalCache(), RedisCache(client, prefix="user:")))
+    second = CachedUserRepository(user_repo, UserCache(LocalCache(), RedisCache(client, prefix="user:")))
+
+    async def run():
+        await first.find_by_id("USER_ID")
+        assert b"hashed" not in await client.get("user:id:USER_ID")
+        # Login verifies the hash, so it comes from the database.
+        assert (await second.find_by_email("tester@example.com")).password == "hashed"
+        user = await CachedUserRepository(
+            user_repo, UserCache(LocalCache(), RedisCache(client, prefix="user:"))
+        ).find_by_id("USER_ID")
+        user.name = "renamed"
+        await second.update(user)
+
+    asyncio.run(run())
+
+    user_repo.find_by_email.assert_called_once_with("tester@example.com")
+    assert user_repo.update.call_args.args[0].password == "hashed"
@@ -1,13 +1,46 @@
+from datetime import datetime
+from typing import Callable, ContextManager
 from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
 from user.domain.repository.user_repo import IUserRepository
+from common.metrics import repository_call_duration, timed_methods
+from common.outbox import OutboxMessage, add_to_outbox
 from database import SessionLocal
-from user.domain.user import User as UserVO
+from user.domain.user import User as UserVO, UserFilter, UserSort
 from user.infra.db_models.user import User
-from utils.db_utils import row_to_dict
+from utils.db_utils import paginate_sorted, row_to_dict
 
+# What list views return (``UserResponse``); the password hash and the
+# memo, a TEXT column, are left unloaded.
+LIST_COLUMNS = (User.id, User.name, User.email, User.created_at, User.updated_at, User.is_active)
+UNLOADED = {"password": None, "memo": None}
+SORT_COLUMNS = {"id": User.id, "created_at": User.created_at, "name": User.name}
 
+
+def filter_conditions(user_filter: UserFilter) -> list:
+    conditions = []
+    if user_filter.ids is not None:
+        conditions.append(User.id.in_(user_filter.ids))
+    if user_filter.name_prefix:
+        conditions.append(User.name.startswith(user_filter.name_prefix, autoescape=True))
+    if user_filter.email_domain:
+        conditions.append(User.email.endswith("@" + user_filter.email_domain, autoescape=True))
+    if user_filter.created_after is not None:
+        conditions.append(User.created_at >= user_filter.created_after)
+    if user_filter.created_before is not None:
+        conditions.append(User.created_at < user_filter.created_before)
+    return conditions
+
+
+@timed_methods(repository_call_duration, "UserRepository")
 class UserRepository(IUserRepository):
-    def save(self, user: UserVO):
+    def __init__(self, session_factory: Callable[[], ContextManager[Session]] | None = None):
+        # Each call runs in its own transaction unless a shared session is bound.
+        self.session_factory = session_factory or SessionLocal.begin
+
+    def save(self, user: UserVO, outbox: list[OutboxMessage] | None = None):
+        """Inserts ``user``, and the ``outbox`` messages in the same transaction."""
         new_user = User(
             id=user.id,
             name=user.name,
@@ -18,27 +51,28 @@ class UserRepository(IUserRepository):
             memo=user.memo,
         )
 
-        with SessionLocal() as session:
+        with self.session_factory() as session:
             session.add(new_user)
-            session.commit()
+            session.flush()
+            add_to_outbox(session, outbox or [])
 
     def find_by_email(self, email: str) -> UserVO:
-        with SessionLocal() as session:
+        with self.session_factory() as session:
             user = session.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(status_code=422, detail="User not found")
-        return UserVO(**row_to_dict(user))
+            if not user:
+                raise HTTPException(status_code=422, detail="User not found")
+            # Read inside the block: committing expires the instance's attributes.
+            return UserVO(**row_to_dict(user))
 
     def find_by_id(self, id: str) -> UserVO:
-        with SessionLocal() as session:
+        with self.session_factory() as session:
             user = session.query(User).filter(User.id == id).first()
-        if not user:
-            raise HTTPException(status_code=422, detail="User not found")
-
-        return UserVO(**row_to_dict(user))
+            if not user:
+                raise HTTPException(status_code=422, detail="User not found")
+            return UserVO(**row_to_dict(user))
 
     def update(self, user: UserVO):
-        with SessionLocal() as session:
+        with self.session_factory() as session:
             session.query(User).filter(User.id == user.id).update(
                 {
                     "name": user.name,
@@ -47,21 +81,63 @@ class UserRepository(IUserRepository):
                     "memo": user.memo,
                 }
             )
-            session.commit()
 
         return user
 
     def get_users(
-        self, page: int = 1, items_per_page: int = 10
-    ) -> tuple[int, list[UserVO]]:
-        with SessionLocal() as session:
-            query = session.query(User)
-            total = query.count()
-            offset = (page - 1) * items_per_page
-            users = query.offset(offset).limit(items_per_page).all()
-        return total, [UserVO(**row_to_dict(user)) for user in users]
+        self,
+        page: int = 1,
+        items_per_page: int = 10,
+        after: tuple | None = None,
+        user_filter: UserFilter | None = None,
+        sort: UserSort = "id",
+    ) -> tuple[int | None, list[UserVO]]:
+        sort_column = SORT_COLUMNS[sort.lstrip("-")]
+        # (created_at, id) and (name) indexes serve these orders; InnoDB
+        # secondary indexes end with the primary key, so ties sort by id too.
+        keys = (User.id,) if sort_column is User.id else (sort_column, User.id)
+        with self.session_factory() as session:
+            query = session.query(*LIST_COLUMNS).filter(*filter_conditions(user_filter or UserFilter()))
+            total, rows = paginate_sorted(
+                query, keys, page, items_per_page, after, descending=sort.startswith("-")
+            )
+        return total, [UserVO(**(UNLOADED | row._asdict())) for row in rows]
 
     def delete(self, id: str):
-        with SessionLocal() as session:
+        with self.session_factory() as session:
             session.query(User).filter(User.id == id).delete()
-            session.commit()
+
+    def find_ids(self, user_filter: UserFilter, after_id: str | None = None, limit: int = 1000) -> list[str]:
+        query = select(User.id).where(*filter_conditions(user_filter))
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        with self.session_factory() as session:
+            return list(session.scalars(query.order_by(User.id).limit(limit)))
+
+    def deactivate_many(self, ids: list[str], updated_at: datetime) -> int:
+        """Deactivates the still active users among ``ids`` in one UPDATE; returns how many changed."""
+        with self.session_factory() as session:
+            result = session.execute(
+                update(User)
+                .where(User.id.in_(ids), User.is_active.is_(True))
+                .values(is_active=False, updated_at=updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        return result.rowcount  # type: ignore
+
+    def update_memo_many(self, ids: list[str], memo: str | None, updated_at: datetime) -> int:
+        with self.session_factory() as session:
+            result = session.execute(
+                update(User)
+                .where(User.id.in_(ids))
+                .values(memo=memo, updated_at=updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        return result.rowcount  # type: ignore
+
+    def delete_many(self, ids: list[str]) -> int:
+        with self.session_factory() as session:
+            result = session.execute(
+                delete(User).where(User.id.in_(ids)).execution_options(synchronize_session=False)
+            )
+        return result.rowcount  # type: ignore
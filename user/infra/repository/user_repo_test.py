@@ -18,7 +18,7 @@ def test_find_by_email_user_exist(mock_session_local):
     mock_db = Mock()
     mock_db.query.return_value.filter.return_value.first.return_value = mock_user
 
-    mock_session_local.return_value.__enter__.return_value = mock_db
+    mock_session_local.begin.return_value.__enter__.return_value = mock_db
     user_repository = UserRepository()
 
     result = user_repository.find_by_email("test@example.com")
@@ -27,7 +27,7 @@ def test_find_by_email_user_exist(mock_session_local):
 def test_find_by_email_user_not_exist(mock_session_local):
     mock_db = Mock()
     mock_db.query.return_value.filter.return_value.first.return_value = None
-    mock_session_local.return_value.__enter__.return_value = mock_db
+    mock_session_local.begin.return_value.__enter__.return_value = mock_db
     user_repository = UserRepository()
 
     with pytest.raises(HTTPException) as exception:
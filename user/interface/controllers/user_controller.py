@@ -1,13 +1,17 @@
 from datetime import datetime
 from typing import Annotated
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field
 
 from common.auth import CurrentUser, get_admin_user, get_current_user
 from containers import Container
+from user.application.user_admin_service import UserAdminService
 from user.application.user_service import UserService
+from user.domain.user import User, UserFilter, UserSort
+from utils.cursor import ItemsPerPage, Page, decode_cursor, decode_sorted_cursor, encode_sorted_cursor, next_cursor
+from utils.json_response import FastJSONResponse
 
 router = APIRouter(prefix="/users")
 
@@ -24,24 +28,37 @@ class UserResponse(BaseModel):
     email: str
     created_at: datetime
     updated_at: datetime
+    is_active: bool
+
+
+def user_json(user: User) -> dict:
+    """``user`` shaped like ``UserResponse``; the password hash and memo are left out."""
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "created_at": user.created_at,
+        "updated_at": user.updated_at,
+        "is_active": user.is_active,
+    }
 
 
 @router.post("", status_code=201, response_model=UserResponse)
 @inject
-def create_user(
+async def create_user(
     user: CreateUserBody,
     # background_tasks: BackgroundTasks,
     user_service: UserService = Depends(Provide[Container.user_service]),
     # user_service: UserService = Depends(Provide["user_service"]),
 ):
-    created_user = user_service.create_user(
+    created_user = await user_service.create_user(
         # background_tasks=background_tasks,
         name=user.name,
         email=user.email,
         password=user.password,
     )
 
-    return created_user
+    return FastJSONResponse(user_json(created_user), status_code=201)
 
 
 class UpdateUserBody(BaseModel):
@@ -51,55 +68,155 @@ class UpdateUserBody(BaseModel):
 
 @router.put("", response_model=UserResponse)
 @inject
-def update_user(
+async def update_user(
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     body: UpdateUserBody,
     user_service: UserService = Depends(Provide[Container.user_service]),
 ):
-    user = user_service.update_user(
+    user = await user_service.update_user(
         user_id=current_user.id,
         name=body.name,
         password=body.password,
     )
 
-    return user
+    return FastJSONResponse(user_json(user))
 
 
 class GetUsersResponse(BaseModel):
-    total_count: int
+    total_count: int | None
     page: int
     users: list[UserResponse]
+    next_cursor: str | None = None
+
+
+def decode_users_cursor(cursor: str, sort: UserSort) -> tuple:
+    """The sort key values of the row a ``sort``-ordered page ended at."""
+    key = sort.lstrip("-")
+    if key == "id":
+        return (decode_cursor(cursor),)
+    value, id = decode_sorted_cursor(cursor)
+    if key == "created_at":
+        try:
+            return datetime.fromisoformat(value), id
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, id
+
 
+def next_users_cursor(users: list[User], items_per_page: int, sort: UserSort) -> str | None:
+    key = sort.lstrip("-")
+    if key == "id" or len(users) < items_per_page:
+        return next_cursor(users, items_per_page)
+    value = getattr(users[-1], key)
+    return encode_sorted_cursor(value.isoformat() if key == "created_at" else value, users[-1].id)
 
-@router.get("")
+
+@router.get("", response_model=GetUsersResponse)
 @inject
-def get_users(
-    page: int = 1,
-    items_per_page: int = 10,
+async def get_users(
+    page: Page = 1,
+    items_per_page: ItemsPerPage = 10,
+    cursor: str | None = None,
+    name_prefix: str | None = Query(default=None, min_length=1, max_length=32),
+    email_domain: str | None = Query(default=None, min_length=1, max_length=64),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    sort: UserSort = "id",
     current_user: CurrentUser = Depends(get_admin_user),
     user_service: UserService = Depends(Provide[Container.user_service]),
-) -> GetUsersResponse:
-    total_count, users = user_service.get_users(page, items_per_page)
-
-    return GetUsersResponse(total_count=total_count, page=page, users=users)
+):
+    after = decode_users_cursor(cursor, sort) if cursor else None
+    user_filter = UserFilter(
+        name_prefix=name_prefix,
+        email_domain=email_domain,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    total_count, users = await user_service.get_users(page, items_per_page, after, user_filter, sort)
+
+    return FastJSONResponse(
+        {
+            "total_count": total_count,
+            "page": page,
+            "users": [user_json(user) for user in users],
+            "next_cursor": next_users_cursor(users, items_per_page, sort),
+        }
+    )
 
 
 @router.delete("", status_code=204)
 @inject
-def delete_user(
+async def delete_user(
     current_user: Annotated[CurrentUser, Depends(get_current_user)],
     user_service: UserService = Depends(Provide[Container.user_service]),
 ):
-    user_service.delete_user(current_user.id)
+    await user_service.delete_user(current_user.id)
+
+
+class UserFilterBody(BaseModel):
+    ids: list[str] | None = Field(default=None, max_length=10_000)
+    name_prefix: str | None = Field(default=None, min_length=1, max_length=32)
+    email_domain: str | None = Field(default=None, min_length=1, max_length=64)
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+class BulkMemoBody(UserFilterBody):
+    memo: str | None
+
+
+class BulkUsersResponse(BaseModel):
+    count: int
+
+
+def user_filter(body: UserFilterBody) -> UserFilter:
+    """The filter ``body`` describes; an empty one is refused rather than matching every user."""
+    values = body.model_dump(include=set(UserFilterBody.model_fields))
+    if all(value is None for value in values.values()):
+        raise HTTPException(status_code=400, detail="Select users by ids or a filter")
+    return UserFilter(**values)
+
+
+@router.post("/bulk/deactivate", response_model=BulkUsersResponse)
+@inject
+async def deactivate_users(
+    body: UserFilterBody,
+    current_user: CurrentUser = Depends(get_admin_user),
+    user_admin_service: UserAdminService = Depends(Provide[Container.user_admin_service]),
+):
+    count = await user_admin_service.deactivate_users(user_filter(body))
+    return FastJSONResponse({"count": count})
+
+
+@router.post("/bulk/memo", response_model=BulkUsersResponse)
+@inject
+async def update_memos(
+    body: BulkMemoBody,
+    current_user: CurrentUser = Depends(get_admin_user),
+    user_admin_service: UserAdminService = Depends(Provide[Container.user_admin_service]),
+):
+    count = await user_admin_service.update_memos(user_filter(body), body.memo)
+    return FastJSONResponse({"count": count})
+
+
+@router.post("/bulk/delete", response_model=BulkUsersResponse)
+@inject
+async def delete_users(
+    body: UserFilterBody,
+    current_user: CurrentUser = Depends(get_admin_user),
+    user_admin_service: UserAdminService = Depends(Provide[Container.user_admin_service]),
+):
+    count = await user_admin_service.delete_users(user_filter(body))
+    return FastJSONResponse({"count": count})
 
 
 @router.post("/login")
 @inject
-def login(
+async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: UserService = Depends(Provide[Container.user_service]),
 ):
-    access_token = user_service.login(
+    access_token = await user_service.login(
         email=form_data.username,
         password=form_data.password,
     )
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from user.application.user_service import UserService
 
@@ -26,13 +27,15 @@ def test_create_user(user_interface_dependencies):
 
     user_service_mock.create_user.return_value = user_mock
 
-    user_controller.create_user(
-        user=user_controller.CreateUserBody(
-            name="Dexter",
-            email="dexter.haan@test.com",
-            password="password",
-        ),
-        user_service=user_service_mock,
+    asyncio.run(
+        user_controller.create_user(
+            user=user_controller.CreateUserBody(
+                name="Dexter",
+                email="dexter.haan@test.com",
+                password="password",
+            ),
+            user_service=user_service_mock,
+        )
     )
 
-    user_service_mock.create_user.assert_called_once()
\ No newline at end of file
+    user_service_mock.create_user.assert_awaited_once()
\ No newline at end of file
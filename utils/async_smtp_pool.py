@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterable
+
+from common.logger import logger
+from utils.smtp_pool import Envelope
+
+try:
+    import aiosmtplib  # type: ignore
+except ImportError:  # optional: only needed to send emails from the event loop
+    aiosmtplib = None
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether the server rejected a message for good (5xx) rather than for now (4xx)."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(recipient.code >= 500 for recipient in error.recipients)
+    return getattr(error, "code", 0) >= 500
+
+
+class AsyncSMTPPool:
+    """``SMTPPool`` for coroutines: aiosmtplib connections kept open on the event loop.
+
+    At most ``size`` connections are in use at once; idle ones are checked
+    with NOOP after ``check_after`` seconds and closed after ``max_idle``.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = True,
+        size: int = 2,
+        timeout: float = 10,
+        check_after: float = 30,
+        max_idle: float = 300,
+        factory: Callable[..., "aiosmtplib.SMTP"] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self.factory = factory or aiosmtplib.SMTP
+        self.clock = clock
+        self.connects = 0
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[tuple[float, "aiosmtplib.SMTP"]] = []
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        smtp = self.factory(
+            hostname=self.host,
+            port=self.port,
+            username=self.username or None,
+            password=self.password if self.username else None,
+            start_tls=self.starttls,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        self.connects += 1
+        return smtp
+
+    async def _take(self) -> "aiosmtplib.SMTP | None":
+        while self._idle:
+            last_used, smtp = self._idle.pop()
+            idle = self.clock() - last_used
+            if idle < self.check_after or (idle < self.max_idle and await self._is_healthy(smtp)):
+                return smtp
+            await self._close(smtp)
+        return None
+
+    async def _is_healthy(self, smtp: "aiosmtplib.SMTP") -> bool:
+        try:
+            return (await smtp.noop()).code == 250
+        except (aiosmtplib.SMTPException, OSError):
+            return False
+
+    async def _close(self, smtp: "aiosmtplib.SMTP"):
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["aiosmtplib.SMTP"]:
+        """A connection for the block; it goes back to the pool unless the block raises."""
+        async with self._slots:
+            smtp = await self._take() or await self._connect()
+            try:
+                yield smtp
+            except BaseException:
+                smtp.close()
+                raise
+            self._idle.append((self.clock(), smtp))
+
+    async def send(self, envelopes: Iterable[Envelope]) -> list[Envelope]:
+        """Sends ``envelopes`` over one connection; returns those to try again later.
+
+        Permanent rejections are logged and dropped; a broken connection is
+        replaced once, as in ``SMTPPool.send``.
+        """
+        pending = deque(envelopes)
+        deferred: list[Envelope] = []
+        if not pending:
+            return deferred
+        for attempt in range(2):
+            try:
+                async with self.connection() as smtp:
+                    while pending:
+                        sender, recipients, message = pending[0]
+                        try:
+                            await smtp.sendmail(sender, recipients, message)
+                        except (
+                            aiosmtplib.SMTPRecipientsRefused,
+                            aiosmtplib.SMTPSenderRefused,
+                            aiosmtplib.SMTPDataError,
+                        ) as e:
+                            if is_permanent(e):
+                                logger.warning("SMTP server rejected a message to %s: %s", recipients, e)
+                            else:
+                                deferred.append(pending[0])
+                        pending.popleft()
+                return deferred
+            except (aiosmtplib.SMTPException, OSError):
+                logger.warning("SMTP connection failed (attempt %d)", attempt + 1, exc_info=True)
+        return deferred + list(pending)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, smtp in idle:
+            await self._close(smtp)
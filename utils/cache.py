@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+from common.logger import logger
+
+V = TypeVar("V")
+
+
+class LocalCache(Generic[V]):
+    """In-process LRU whose entries expire ``ttl`` seconds after being set.
+
+    Holds at most ``maxsize`` entries and, when ``maxbytes`` is given, at most
+    that many bytes as estimated by ``sizeof``. Not thread-safe: meant to be
+    used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+        maxbytes: int | None = None,
+        sizeof: Callable[[V], int] | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= self.clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            self._remove(key)
+            return
+        self._remove(key)
+        self._entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), value)
+        if size:
+            self._sizes[key] = size
+            self.bytes += size
+        while len(self._entries) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            self._remove(next(iter(self._entries)))
+
+    def delete(self, *keys: Hashable):
+        for key in keys:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        if self._entries.pop(key, None) is not None:
+            self.bytes -= self._sizes.pop(key, 0)
+
+
+class RedisCache:
+    """Shared cache tier on a ``redis.asyncio`` client, or anything with its get/set/delete API.
+
+    Errors are logged and treated as misses, so an unavailable Redis only
+    costs the database round trips it would have saved.
+    """
+
+    def __init__(self, client: Any, ttl: float = 300, prefix: str = ""):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        try:
+            value = await self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning("Cache read failed", exc_info=True)
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: float | None = None):
+        try:
+            await self.client.set(self.prefix + key, value, px=int((self.ttl if ttl is None else ttl) * 1000))
+        except Exception:
+            logger.warning("Cache write failed", exc_info=True)
+
+    async def delete(self, *keys: str):
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            logger.warning("Cache invalidation failed", exc_info=True)
+
+
+def redis_client(url: str):
+    # redis is only needed when a Redis tier is configured.
+    from redis.asyncio import Redis
+
+    return Redis.from_url(url)
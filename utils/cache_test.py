@@ -0,0 +1,48 @@
+import asyncio
+
+from utils.cache import LocalCache, RedisCache
+
+
+def test_local_cache_expires_and_evicts_least_recently_used():
+    now = [0.0]
+    cache = LocalCache(maxsize=2, ttl=10, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("short", 4, ttl=1)
+    now[0] = 5
+    assert cache.get("short") is None
+    now[0] = 10
+    assert cache.get("c") is None
+
+
+def test_redis_cache_treats_errors_as_misses(mocker):
+    client = mocker.AsyncMock()
+    client.get.side_effect = ConnectionError("down")
+    client.set.side_effect = ConnectionError("down")
+
+    async def run():
+        cache = RedisCache(client, prefix="user:")
+        await cache.set("id:1", "value")
+        return await cache.get("id:1")
+
+    assert asyncio.run(run()) is None
+
+
+def test_local_cache_evicts_to_stay_within_maxbytes():
+    cache = LocalCache(maxbytes=10, sizeof=len)
+
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.set("c", "cccc")
+    assert cache.get("a") is None
+    assert cache.bytes == 8
+
+    cache.set("huge", "x" * 11)
+    assert cache.get("huge") is None
+    assert cache.bytes == 8
@@ -0,0 +1,58 @@
+import zlib
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional: without it responses are only gzipped
+    brotli = None
+
+
+class GzipCompressor:
+    def __init__(self, level: int = 6):
+        # wbits 16 + 15 writes a gzip container with a fixed header, so equal bodies compress equally.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compressed output so far; may be empty until ``final``, which ends the stream."""
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush() if final else output
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + self._compressor.finish() if final else output
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Content codings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str, supported: tuple[str, ...]) -> str | None:
+    """The ``supported`` coding with the highest q-value in ``accept_encoding``; ties go to the earlier one."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith(("json", "xml", "javascript"))
@@ -0,0 +1,33 @@
+import gzip
+
+import pytest
+
+from utils.compression import GzipCompressor, is_compressible, negotiate_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, *", "gzip"),
+        ("identity", None),
+        ("gzip;q=0", None),
+    ],
+)
+def test_negotiate_encoding_follows_q_values(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, ("br", "gzip")) == expected
+
+
+def test_gzip_compressor_streams_a_valid_member():
+    compressor = GzipCompressor()
+    chunks = [compressor.compress(b"line\n" * 100, final=False), compressor.compress(b"end", final=True)]
+
+    assert gzip.decompress(b"".join(chunks)) == b"line\n" * 100 + b"end"
+
+
+def test_only_textual_types_are_compressible():
+    assert is_compressible("application/json")
+    assert is_compressible("application/x-ndjson")
+    assert is_compressible("text/plain; charset=utf-8")
+    assert not is_compressible("image/png")
@@ -1,12 +1,88 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Iterator
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
+from common.metrics import password_hash_duration, password_hash_pending, password_hash_rejected
+
+
+@lru_cache
+def _pwd_context(rounds: int) -> CryptContext:
+    # Pinning min and max rounds makes hashes of any other cost "need update".
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(secret: str, rounds: int) -> str:
+    return _pwd_context(rounds).hash(secret)
+
+
+def _verify_and_update(secret: str, hash: str, rounds: int) -> tuple[bool, str | None]:
+    return _pwd_context(rounds).verify_and_update(secret, hash)
+
+
+def hash_executor(workers: int | None = None) -> Iterator[Executor]:
+    """Process pool for bcrypt, one worker per core unless ``workers`` is given."""
+    # Spawned rather than forked: the server process already runs threads.
+    executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=get_context("spawn"))
+    yield executor
+    executor.shutdown(cancel_futures=True)
+
 
 class Crypto:
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    """bcrypt hashing and verification run on ``executor``, off the event loop.
+
+    At most ``max_pending`` calls may be queued or running at once; beyond
+    that a 503 with Retry-After is raised, so a burst of logins is shed
+    instead of queueing up ahead of every other request.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        rounds: int = 12,
+        max_pending: int = 16,
+        retry_after: int = 1,
+    ):
+        # None runs on the event loop's default threadpool.
+        self.executor = executor
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+
+    async def _submit(self, operation: str, fn, *args):
+        if self.pending >= self.max_pending:
+            password_hash_rejected.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Too many password checks in progress",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.pending += 1
+        try:
+            with password_hash_pending.track_inprogress(), password_hash_duration.labels(operation).time():
+                return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def encrypt(self, secret: str) -> str:
+        return await self._submit("hash", _hash, secret, self.rounds)
 
-    def encrypt(self, secret: str) -> str:
-        return self.pwd_context.hash(secret)
+    async def verify(self, secret: str, hash: str) -> bool:
+        verified, _ = await self.verify_and_update(secret, hash)
+        return verified
 
-    def verify(self, secret: str, hash: str) -> bool:
-        return self.pwd_context.verify(secret, hash)
+    async def verify_and_update(self, secret: str, hash: str) -> tuple[bool, str | None]:
+        """Whether ``secret`` matches ``hash``, plus a new hash when ``hash`` was made with other rounds."""
+        return await self._submit("verify", _verify_and_update, secret, hash, self.rounds)
@@ -0,0 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from utils.crypto import Crypto
+
+
+def test_verify_and_update_rehashes_when_rounds_change():
+    old = Crypto(rounds=4)
+    new = Crypto(rounds=5)
+    hash = asyncio.run(old.encrypt("secret"))
+
+    assert asyncio.run(old.verify_and_update("secret", hash)) == (True, None)
+    assert asyncio.run(new.verify("wrong", hash)) is False
+    verified, new_hash = asyncio.run(new.verify_and_update("secret", hash))
+    assert verified and new_hash and new_hash.startswith("$2b$05$")
+
+
+def test_refuses_work_beyond_max_pending():
+    crypto = Crypto(executor=ThreadPoolExecutor(max_workers=1), rounds=4, max_pending=2, retry_after=3)
+
+    async def burst():
+        return await asyncio.gather(*(crypto.encrypt("secret") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(burst())
+
+    refused = [result for result in results if isinstance(result, HTTPException)]
+    assert len(refused) == 1
+    assert refused[0].status_code == 503
+    assert refused[0].headers == {"Retry-After": "3"}
+    assert crypto.pending == 0
@@ -0,0 +1,50 @@
+import base64
+from typing import Annotated
+
+from fastapi import HTTPException, Query
+
+# Query parameters of the paginated list endpoints.
+Page = Annotated[int, Query(ge=1)]
+ItemsPerPage = Annotated[int, Query(ge=1, le=100)]
+
+
+def encode_cursor(id: str) -> str:
+    return base64.urlsafe_b64encode(id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_ranked_cursor(score: float, id: str) -> str:
+    return encode_cursor(f"{score!r}:{id}")
+
+
+def decode_ranked_cursor(cursor: str) -> tuple[float, str]:
+    score, _, id = decode_cursor(cursor).partition(":")
+    try:
+        return float(score), id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_sorted_cursor(value: str, id: str) -> str:
+    return encode_cursor(f"{value}:{id}")
+
+
+def decode_sorted_cursor(cursor: str) -> tuple[str, str]:
+    """The sort value and id of a row; ids have no colon, so the value may."""
+    value, separator, id = decode_cursor(cursor).rpartition(":")
+    if not separator:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, id
+
+
+def next_cursor(items: list, items_per_page: int) -> str | None:
+    """Cursor for the page after ``items``, or None when this page is the last one."""
+    if not items or len(items) < items_per_page:
+        return None
+    return encode_cursor(items[-1].id)
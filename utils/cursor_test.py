@@ -0,0 +1,25 @@
+from fastapi import HTTPException
+import pytest
+
+from utils.cursor import decode_cursor, decode_ranked_cursor, encode_cursor, encode_ranked_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    id = "01JQ3Z6Y7M8N9P0QRSTVWXYZAB"
+    assert decode_cursor(encode_cursor(id)) == id
+
+
+def test_decode_invalid_cursor():
+    with pytest.raises(HTTPException) as exception:
+        decode_cursor("%%%")
+    assert exception.value.status_code == 400
+
+
+def test_next_cursor_on_last_page(mocker):
+    items = [mocker.Mock(id="A"), mocker.Mock(id="B")]
+    assert next_cursor(items, items_per_page=3) is None
+    assert decode_cursor(next_cursor(items, items_per_page=2)) == "B"  # type: ignore
+
+
+def test_ranked_cursor_round_trip():
+    assert decode_ranked_cursor(encode_ranked_cursor(-1.2345e-06, "ID")) == (-1.2345e-06, "ID")
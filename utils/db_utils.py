@@ -1,5 +1,162 @@
-from sqlalchemy import inspect
+import asyncio
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Callable, ContextManager
+
+from sqlalchemy import Insert, Table, and_, event, inspect, or_
+from sqlalchemy.sql.base import ReadOnlyColumnCollection
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+
+
+@lru_cache
+def _attr_keys(cls) -> tuple[str, ...]:
+    return tuple(inspect(cls).attrs.keys())
 
 
 def row_to_dict(row) -> dict:
-    return {key: getattr(row, key) for key in inspect(row).attrs.keys()}
+    return {key: getattr(row, key) for key in _attr_keys(type(row))}
+
+
+def bind_session(session: Session) -> Callable[[], ContextManager[Session]]:
+    """Session factory that hands out an already open session without closing it."""
+    return lambda: nullcontext(session)
+
+
+def after_transaction(session: Session, callback: Callable[[], None]):
+    """Calls ``callback`` once ``session``'s transaction commits or rolls back."""
+    for name in ("after_commit", "after_rollback"):
+        event.listen(session, name, lambda session: callback(), once=True)
+
+
+def after_commit(session: Session, callback: Callable[[], None]):
+    """Calls ``callback`` once ``session``'s transaction commits; a rollback drops it."""
+    pending = True
+
+    def on_commit(session):
+        nonlocal pending
+        if pending:
+            pending = False
+            callback()
+
+    def on_rollback(session):
+        nonlocal pending
+        pending = False
+
+    event.listen(session, "after_commit", on_commit, once=True)
+    event.listen(session, "after_rollback", on_rollback, once=True)
+
+
+def _on_loop(callback: Callable[[], None]) -> Callable[[], None]:
+    """``callback``, run on the current event loop whichever thread calls it."""
+    loop = asyncio.get_running_loop()
+    loop_thread = threading.get_ident()
+
+    def on_loop():
+        if threading.get_ident() == loop_thread:
+            callback()
+        else:
+            loop.call_soon_threadsafe(callback)
+
+    return on_loop
+
+
+def after_transaction_on_loop(session: Session | AsyncSession, callback: Callable[[], None]):
+    """``after_transaction`` for a callback that must run on the current event loop.
+
+    ``session`` may be an AsyncSession or a blocking session committed from
+    a worker thread, in which case ``callback`` is handed back to the loop.
+    """
+    after_transaction(getattr(session, "sync_session", session), _on_loop(callback))
+
+
+def after_commit_on_loop(session: Session | AsyncSession, callback: Callable[[], None]):
+    """``after_commit`` for a callback that must run on the current event loop."""
+    after_commit(getattr(session, "sync_session", session), _on_loop(callback))
+
+
+def paginate(
+    query: Query,
+    id_column,
+    page: int,
+    items_per_page: int,
+    after_id: str | None = None,
+    total_count: int | None = None,
+) -> tuple[int | None, list]:
+    """Offset pagination when ``after_id`` is None, keyset pagination on ``id_column`` otherwise.
+
+    ULID ids sort by creation time, so ordering by id is stable across pages.
+    The total is only counted in offset mode, and only when the caller does
+    not already know it; keyset pages skip the extra scan.
+    """
+    after = (after_id,) if after_id is not None else None
+    return paginate_sorted(query, (id_column,), page, items_per_page, after, total_count=total_count)
+
+
+def paginate_sorted(
+    query: Query,
+    keys: tuple,
+    page: int,
+    items_per_page: int,
+    after: tuple | None = None,
+    descending: bool = False,
+    total_count: int | None = None,
+) -> tuple[int | None, list]:
+    """``paginate`` ordered by ``keys``, the last of which must be unique; ``after`` holds a row's key values.
+
+    The keyset condition is spelled out as ``k1 > v1 OR (k1 = v1 AND k2 > v2)``
+    rather than a row comparison, which MySQL does not always turn into an
+    index range.
+    """
+    ordering = [key.desc() for key in keys] if descending else list(keys)
+    if after is None:
+        if total_count is None:
+            total_count = query.count()
+        query = query.order_by(*ordering).offset((page - 1) * items_per_page)
+    else:
+        total_count = None
+        query = query.filter(after_keys(keys, after, descending)).order_by(*ordering)
+    return total_count, query.limit(items_per_page).all()
+
+
+def after_keys(keys: tuple, values: tuple, descending: bool = False):
+    """Rows that come after ``values`` in the order of ``keys``."""
+    terms = []
+    for i, (key, value) in enumerate(zip(keys, values)):
+        beyond = key < value if descending else key > value
+        terms.append(and_(*(k == v for k, v in zip(keys[:i], values[:i])), beyond))
+    return or_(*terms)
+
+
+def insert_ignore_duplicates(session: Session, table: Table) -> Insert:
+    """INSERT that skips rows colliding with an existing unique key."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        # Assigning the primary key to itself turns the duplicate into a no-op.
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({column.name: column for column in table.primary_key.columns})
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    raise NotImplementedError(f"insert_ignore_duplicates is not supported on {dialect}")
+
+
+def insert_or_update(session: Session, table: Table, values: Callable[[ReadOnlyColumnCollection], dict]) -> Insert:
+    """INSERT that applies ``values(new)`` to the existing row when the primary key collides.
+
+    ``new`` holds the columns of the row that was about to be inserted.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(values(stmt.inserted))
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(index_elements=list(table.primary_key.columns), set_=values(stmt.excluded))
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table)
+        return stmt.on_conflict_do_update(index_elements=list(table.primary_key.columns), set_=values(stmt.excluded))
+    raise NotImplementedError(f"insert_or_update is not supported on {dialect}")
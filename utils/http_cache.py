@@ -0,0 +1,33 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Responses are per user and must be revalidated before reuse.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: str) -> str:
+    """A strong ETag over ``parts``; ``CompressionMiddleware`` weakens it on compressed responses."""
+    digest = hashlib.blake2b("\x1f".join(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether ``etag`` is in an If-None-Match header, compared weakly as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def check_not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 if the client already has ``etag``; the full response should carry ``cache_headers(etag)``."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
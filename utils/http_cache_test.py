@@ -0,0 +1,14 @@
+from utils.http_cache import etag_matches, make_etag
+
+
+def test_etag_matches_compares_weakly():
+    strong = make_etag("USER_ID", "1")
+    etag = f"W/{strong}"
+
+    assert strong.startswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {strong}', etag)
+    assert etag_matches(etag, strong)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("USER_ID", "2"), etag)
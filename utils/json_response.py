@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional: the standard library encoder produces the same output, slower
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; datetimes are written in ISO 8601, as pydantic writes them."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Renders content that is already shaped like the route's response model, without validating it.
+
+    Returning a response instance makes FastAPI skip the response model, so
+    the content is serialized once, straight from plain dicts and lists.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
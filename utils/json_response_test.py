@@ -0,0 +1,25 @@
+from datetime import datetime
+
+import pytest
+
+from utils import json_response
+from utils.json_response import FastJSONResponse, dumps
+
+CONTENT = {"title": "é", "tags": ["a"], "count": 1, "score": 0.5, "next": None, "at": datetime(2024, 1, 1, 12, 0, 0, 5)}
+EXPECTED = '{"title":"é","tags":["a"],"count":1,"score":0.5,"next":null,"at":"2024-01-01T12:00:00.000005"}'.encode()
+
+
+def test_standard_library_fallback_matches_orjson(monkeypatch):
+    pytest.importorskip("orjson")
+    assert dumps(CONTENT) == EXPECTED
+
+    monkeypatch.setattr(json_response, "orjson", None)
+    assert dumps(CONTENT) == EXPECTED
+
+
+def test_fast_json_response_renders_without_validation():
+    response = FastJSONResponse(CONTENT, headers={"ETag": '"abc"'})
+
+    assert response.body == EXPECTED
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["etag"] == '"abc"'
@@ -0,0 +1,45 @@
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int | None = None
+) -> AsyncIterator[tuple[int, bytes]]:
+    """Numbered, non-blank lines of a newline-delimited body, split as the chunks arrive.
+
+    Each chunk is searched once and the pieces of an unfinished line are kept
+    until its newline arrives. A line longer than ``max_line_bytes`` is
+    rejected with a 413 as soon as that many bytes have been buffered.
+    """
+    line_number = 0
+    pieces: list[bytes] = []
+    pending = 0
+
+    def too_long():
+        return HTTPException(
+            status_code=413,
+            detail={"line": line_number + 1, "error": f"Lines may be at most {max_line_bytes} bytes"},
+        )
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if max_line_bytes is not None and pending + end - start > max_line_bytes:
+                raise too_long()
+            line = b"".join(pieces) + chunk[start:end] if pieces else chunk[start:end]
+            pieces, pending = [], 0
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+            start = end + 1
+        if start < len(chunk):
+            pieces.append(chunk[start:])
+            pending += len(chunk) - start
+            if max_line_bytes is not None and pending > max_line_bytes:
+                raise too_long()
+    line = b"".join(pieces)
+    if line.strip():
+        yield line_number + 1, line
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils.ndjson import iter_lines
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def collect(*parts: bytes, max_line_bytes: int | None = None) -> list[tuple[int, bytes]]:
+    return [line async for line in iter_lines(chunks(*parts), max_line_bytes)]
+
+
+def test_iter_lines_splits_across_chunks():
+    assert asyncio.run(collect(b'{"a": 1}\n{"b"', b': 2}\n\n{"c": 3}')) == [
+        (1, b'{"a": 1}'),
+        (2, b'{"b": 2}'),
+        (4, b'{"c": 3}'),
+    ]
+
+
+def test_iter_lines_ignores_trailing_newline():
+    assert asyncio.run(collect(b"x\n", b"")) == [(1, b"x")]
+
+
+def test_iter_lines_rejects_long_lines_before_buffering_them():
+    assert asyncio.run(collect(b"1234\n12", b"34\n", max_line_bytes=4)) == [(1, b"1234"), (2, b"1234")]
+
+    received = []
+
+    async def endless():
+        while True:
+            received.append(b"x" * 3)
+            yield received[-1]
+
+    async def read():
+        return [line async for line in iter_lines(endless(), max_line_bytes=10)]
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read())
+    assert exc_info.value.status_code == 413
+    assert exc_info.value.detail["line"] == 1  # type: ignore
+    assert len(received) == 4
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(collect(b"ok\n12345\n", max_line_bytes=4))
+    assert exc_info.value.detail["line"] == 2  # type: ignore
@@ -0,0 +1,149 @@
+import os
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+from common.logger import logger
+
+# (sender, recipients, message) as passed to ``SMTP.sendmail``.
+Envelope = tuple[str, list[str], bytes]
+
+
+def is_permanent(error: smtplib.SMTPException) -> bool:
+    """Whether the server rejected a message for good (5xx) rather than for now (4xx)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return getattr(error, "smtp_code", 0) >= 500
+
+
+class SMTPPool:
+    """Logged-in SMTP connections kept open and reused across messages.
+
+    At most ``size`` connections are in use at once. An idle connection is
+    checked with NOOP before reuse once it has been idle for ``check_after``
+    seconds, and closed once idle for ``max_idle``. Connections are never
+    shared across a fork: a Celery worker child starts with an empty pool.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = True,
+        size: int = 2,
+        timeout: float = 10,
+        check_after: float = 30,
+        max_idle: float = 300,
+        factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self.factory = factory
+        self.clock = clock
+        self.connects = 0
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: list[tuple[float, smtplib.SMTP]] = []
+        self._pid = os.getpid()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = self.factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except BaseException:
+            smtp.close()
+            raise
+        self.connects += 1
+        return smtp
+
+    def _take(self) -> smtplib.SMTP | None:
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Forked: the sockets belong to the parent's sessions.
+                    self._idle, self._pid = [], os.getpid()
+                if not self._idle:
+                    return None
+                last_used, smtp = self._idle.pop()
+            idle = self.clock() - last_used
+            if idle < self.check_after or (idle < self.max_idle and self._is_healthy(smtp)):
+                return smtp
+            self._close(smtp)
+
+    def _is_healthy(self, smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _close(self, smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """A connection for the block; it goes back to the pool unless the block raises."""
+        with self._slots:
+            smtp = self._take() or self._connect()
+            try:
+                yield smtp
+            except BaseException:
+                self._close(smtp)
+                raise
+            with self._lock:
+                if self._pid == os.getpid():
+                    self._idle.append((self.clock(), smtp))
+                    return
+            self._close(smtp)
+
+    def send(self, envelopes: Iterable[Envelope]) -> list[Envelope]:
+        """Sends ``envelopes`` over one connection; returns those to try again later.
+
+        Messages the server rejects permanently are logged and dropped. When
+        the connection breaks, sending resumes once on a fresh one.
+        """
+        pending = deque(envelopes)
+        deferred: list[Envelope] = []
+        if not pending:
+            return deferred
+        for attempt in range(2):
+            try:
+                with self.connection() as smtp:
+                    while pending:
+                        sender, recipients, message = pending[0]
+                        try:
+                            smtp.sendmail(sender, recipients, message)
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            if is_permanent(e):
+                                logger.warning("SMTP server rejected a message to %s: %s", recipients, e)
+                            else:
+                                deferred.append(pending[0])
+                        pending.popleft()
+                return deferred
+            except (smtplib.SMTPException, OSError):
+                logger.warning("SMTP connection failed (attempt %d)", attempt + 1, exc_info=True)
+        return deferred + list(pending)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, smtp in idle:
+            self._close(smtp)
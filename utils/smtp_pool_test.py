@@ -0,0 +1,116 @@
+import asyncio
+import smtplib
+import socket
+
+import pytest
+
+from utils.async_smtp_pool import AsyncSMTPPool
+from utils.smtp_pool import SMTPPool
+
+
+class Recorder:
+    def __init__(self):
+        self.messages: list[tuple[str, bytes]] = []
+        self.peers: set = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("refused"):
+            return "550 No such user"
+        if address.startswith("later"):
+            return "451 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.peers.add(session.peer)
+        self.messages.append((envelope.rcpt_tos[0], envelope.content))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    recorder = Recorder()
+    controller = controller_module.Controller(recorder, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield recorder, port
+    controller.stop()
+
+
+def envelope(receiver: str):
+    return ("sender@example.com", [receiver], f"To: {receiver}\r\nSubject: hi\r\n\r\nhello\r\n".encode())
+
+
+def test_sends_a_batch_over_one_session(smtp_server):
+    recorder, port = smtp_server
+    pool = SMTPPool("127.0.0.1", port, starttls=False)
+
+    deferred = pool.send(envelope(f"user{i}@example.com") for i in range(50))
+    deferred += pool.send([envelope("refused@example.com"), envelope("later@example.com"), envelope("last@example.com")])
+    pool.close()
+
+    assert [receiver for _, [receiver], _ in deferred] == ["later@example.com"]
+    assert [receiver for receiver, _ in recorder.messages] == [f"user{i}@example.com" for i in range(50)] + ["last@example.com"]
+    assert pool.connects == 1
+    assert len(recorder.peers) == 1
+
+
+def test_checks_idle_connections_and_reconnects(mocker):
+    now = [0.0]
+    stale, fresh = mocker.Mock(spec=smtplib.SMTP), mocker.Mock(spec=smtplib.SMTP)
+    stale.noop.side_effect = smtplib.SMTPServerDisconnected()
+    fresh.sendmail.side_effect = smtplib.SMTPServerDisconnected()
+    newest = mocker.Mock(spec=smtplib.SMTP)
+    pool = SMTPPool("smtp", starttls=False, check_after=10, factory=mocker.Mock(side_effect=[stale, fresh, newest]), clock=lambda: now[0])
+
+    assert pool.send([envelope("a@example.com")]) == []
+    now[0] = 5
+    assert pool.send([envelope("b@example.com")]) == []
+    assert stale.sendmail.call_count == 2
+    now[0] = 20
+
+    # The idle connection fails its NOOP; the next one breaks mid-send and is replaced.
+    assert pool.send([envelope("c@example.com"), envelope("d@example.com")]) == []
+    assert pool.connects == 3
+    assert fresh.sendmail.call_count == 1
+    assert [call.args[1] for call in newest.sendmail.call_args_list] == [["c@example.com"], ["d@example.com"]]
+
+
+def test_async_pool_sends_batches_over_one_session(smtp_server):
+    pytest.importorskip("aiosmtplib")
+    recorder, port = smtp_server
+
+    async def scenario():
+        pool = AsyncSMTPPool("127.0.0.1", port, starttls=False)
+        deferred = await pool.send(envelope(f"user{i}@example.com") for i in range(20))
+        deferred += await pool.send(
+            [envelope("refused@example.com"), envelope("later@example.com"), envelope("last@example.com")]
+        )
+        await pool.close()
+        return pool, deferred
+
+    pool, deferred = asyncio.run(scenario())
+
+    assert [receiver for _, [receiver], _ in deferred] == ["later@example.com"]
+    assert [receiver for receiver, _ in recorder.messages] == [f"user{i}@example.com" for i in range(20)] + ["last@example.com"]
+    assert pool.connects == 1
+    assert len(recorder.peers) == 1
+
+
+def test_async_pool_limits_concurrent_sessions(smtp_server):
+    pytest.importorskip("aiosmtplib")
+    recorder, port = smtp_server
+
+    async def scenario():
+        pool = AsyncSMTPPool("127.0.0.1", port, starttls=False, size=2)
+        await asyncio.gather(*(pool.send([envelope(f"user{i}@example.com")]) for i in range(10)))
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(scenario())
+
+    assert len(recorder.messages) == 10
+    assert pool.connects == 2